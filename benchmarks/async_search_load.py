@@ -0,0 +1,118 @@
+'''
+Durchsatz gleichzeitiger Hotelsuchen: AsyncSearchManager (aiosqlite) gegen SearchManager in einem Thread-Pool.
+Beide Varianten führen dieselben Suchen mit derselben Anzahl gleichzeitig laufender Anfragen aus.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.async_search_load --hotels 1000 --searches 2000 --concurrency 1 8 32
+'''
+import argparse
+import asyncio
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from random import Random
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from benchmarks.no_date_search import CITIES, fill_catalog
+from business.AsyncManagers import AsyncSearchManager, create_async_session_factory
+from business.SearchManager import SearchManager
+from data_models.models import Base
+
+
+def make_searches(count, rng: Random):
+    searches = []
+    for _ in range(count):
+        start_date = date(2024, 1, 1) + timedelta(days=rng.randrange(300))
+        searches.append((rng.choice(CITIES), start_date, start_date + timedelta(days=rng.randint(1, 7)),
+                         rng.randint(1, 4), None))
+    return searches
+
+
+def percentile(latencies, p):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+
+async def run_async(db_file, searches, concurrency):
+    # Verbindungen wie beim Thread-Pool wiederverwenden, statt pro Suche eine aiosqlite-Verbindung zu öffnen
+    session_factory = create_async_session_factory(db_file, poolclass=AsyncAdaptedQueuePool, pool_size=concurrency)
+    search_manager = AsyncSearchManager(session_factory)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def search(params):
+        async with semaphore:
+            started = time.perf_counter()
+            result = await search_manager.search_available_hotels(*params)
+            latencies.append(time.perf_counter() - started)
+            return result
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(search(params) for params in searches))
+    elapsed = time.perf_counter() - started
+    await session_factory.kw["bind"].dispose()
+    return results, elapsed, latencies
+
+
+def run_threaded(db_file, searches, concurrency):
+    engine = create_engine(f"sqlite:///{db_file}", pool_size=concurrency)
+    session = scoped_session(sessionmaker(bind=engine))
+    search_manager = SearchManager(session)
+    latencies = []
+
+    def search(params):
+        started = time.perf_counter()
+        try:
+            return search_manager.search_available_hotels(*params)
+        finally:
+            latencies.append(time.perf_counter() - started)
+            session.remove()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(search, searches))
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return results, elapsed, latencies
+
+
+def report(label, concurrency, searches, elapsed, latencies):
+    print(f"{label:<10} {concurrency:>6} {len(searches) / elapsed:>12.1f} {percentile(latencies, 0.5):>9.2f} "
+          f"{percentile(latencies, 0.95):>9.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=1000)
+    parser.add_argument("--rooms-per-hotel", type=int, default=20)
+    parser.add_argument("--bookings-per-room", type=int, default=10)
+    parser.add_argument("--searches", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    rng = Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / "bench.db"
+        engine = create_engine(f"sqlite:///{db_file}")
+        Base.metadata.create_all(engine)
+        fill_catalog(engine, args.hotels, args.rooms_per_hotel, args.bookings_per_room, rng)
+        engine.dispose()
+
+        searches = make_searches(args.searches, rng)
+        print(f"{'mode':<10} {'tasks':>6} {'searches/s':>12} {'p50 ms':>9} {'p95 ms':>9}")
+        for concurrency in args.concurrency:
+            async_results, elapsed, latencies = asyncio.run(run_async(db_file, searches, concurrency))
+            report("async", concurrency, searches, elapsed, latencies)
+            threaded_results, elapsed, latencies = run_threaded(db_file, searches, concurrency)
+            report("threads", concurrency, searches, elapsed, latencies)
+            # Beide Varianten müssen dieselben Resultate liefern
+            assert async_results == threaded_results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+'''
+Vergleicht ReservationManager.is_room_available über SQL mit dem In-Memory AvailabilityIndex.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.availability_index --bookings 1000000
+'''
+import argparse
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from random import Random
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker, scoped_session
+
+from business.AvailabilityIndex import AvailabilityIndex
+from business.ReservationManager import ReservationManager
+from data_models.models import Address, Base, Booking, Guest, Hotel, Room
+
+
+def fill_rooms(engine, rooms: int):
+    # Zimmer wie in fill_bookings: 50 pro Hotel, Nummern "00" bis "49". booking_conflict_query sucht die belegten
+    # Nächte über room und room_night, ohne die Zimmer fänden die SQL-Prüfungen keine Konflikte.
+    hotels = (rooms + 49) // 50
+    with engine.begin() as connection:
+        connection.execute(insert(Address), [{"id": 1, "street": "Bahnhofstrasse 1", "zip": "3000", "city": "Bern"}])
+        connection.execute(insert(Guest), [
+            {"id": 1, "firstname": "Anna", "lastname": "Muster", "email": "anna@example.ch", "address_id": 1,
+             "type": "guest"}
+        ])
+        connection.execute(insert(Hotel), [
+            {"id": hotel_id, "name": f"Hotel {hotel_id}", "stars": 3, "address_id": 1}
+            for hotel_id in range(1, hotels + 1)
+        ])
+        connection.execute(insert(Room), [
+            {"hotel_id": room // 50 + 1, "number": f"{room % 50:02d}", "max_guests": 2, "price": 100.0}
+            for room in range(rooms)
+        ])
+
+
+def fill_bookings(engine, bookings: int, rooms: int, rng: Random, chunk_size: int = 50000):
+    # Pro Zimmer werden lückenlos hintereinander liegende, nicht überlappende Buchungen erzeugt, die Trigger auf
+    # booking tragen sie in room_night ein
+    first_day = date(2020, 1, 1)
+    cursors = [first_day] * rooms
+    with engine.begin() as connection:
+        chunk = []
+        for booking_id in range(1, bookings + 1):
+            room = booking_id % rooms
+            start_date = cursors[room] + timedelta(days=rng.randint(1, 3))
+            end_date = start_date + timedelta(days=rng.randint(1, 5))
+            cursors[room] = end_date
+            chunk.append({
+                "id": booking_id,
+                "room_hotel_id": room // 50 + 1,
+                "room_number": f"{room % 50:02d}",
+                "guest_id": 1,
+                "number_of_guests": 1,
+                "start_date": start_date,
+                "end_date": end_date,
+            })
+            if len(chunk) == chunk_size:
+                connection.execute(insert(Booking), chunk)
+                chunk = []
+        if chunk:
+            connection.execute(insert(Booking), chunk)
+    return cursors
+
+
+def measure(label, check, probes):
+    started = time.perf_counter()
+    free = sum(1 for probe in probes if check(*probe))
+    elapsed = time.perf_counter() - started
+    print(f"{label:<22} {len(probes):>8} checks  {elapsed / len(probes) * 1e6:>10.1f} µs/check  ({free} free)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--rooms", type=int, default=20000)
+    parser.add_argument("--sql-probes", type=int, default=200)
+    parser.add_argument("--index-probes", type=int, default=200000)
+    args = parser.parse_args()
+
+    rng = Random(1)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(engine)
+
+        started = time.perf_counter()
+        fill_rooms(engine, args.rooms)
+        cursors = fill_bookings(engine, args.bookings, args.rooms, rng)
+        print(f"{args.bookings} bookings inserted in {time.perf_counter() - started:.1f} s")
+
+        last_day = max(cursors)
+        span = (last_day - date(2020, 1, 1)).days
+
+        def probe():
+            room = rng.randrange(args.rooms)
+            start_date = date(2020, 1, 1) + timedelta(days=rng.randrange(span))
+            return f"{room % 50:02d}", room // 50 + 1, start_date, start_date + timedelta(days=rng.randint(1, 7))
+
+        session = scoped_session(sessionmaker(bind=engine))
+
+        started = time.perf_counter()
+        index = AvailabilityIndex.load(session)
+        print(f"index loaded in {time.perf_counter() - started:.1f} s ({len(index)} bookings)")
+
+        sql_manager = ReservationManager(session)
+        index_manager = ReservationManager(session, availability_index=index)
+
+        sql_probes = [probe() for _ in range(args.sql_probes)]
+        index_probes = [probe() for _ in range(args.index_probes)]
+
+        # Beide Varianten müssen dieselben Antworten liefern
+        for p in sql_probes:
+            assert sql_manager.is_room_available(*p) == index_manager.is_room_available(*p), p
+
+        measure("SQL", sql_manager.is_room_available, sql_probes)
+        measure("AvailabilityIndex", index_manager.is_room_available, index_probes)
+
+        session.remove()
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+'''
+Durchsatz beim Anlegen vieler Buchungen: create_booking in einer Schleife (eine Prüfung und ein Commit pro Buchung)
+im Vergleich zu create_bookings (eine Konfliktabfrage, ein executemany, ein Commit). Ein Teil der Anfragen
+überschneidet sich mit bestehenden Buchungen oder mit anderen Anfragen desselben Batches.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.batch_booking --requests 1000 --batch-size 1000
+'''
+import argparse
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from random import Random
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+
+from business.ReservationManager import ReservationManager, BookingRequest
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_access.occupancy import check_room_nights
+from data_models.models import Base, Booking, Room
+
+
+def booking_requests(rooms, first_day, count, rng):
+    # Zufällige Aufenthalte von 1-4 Nächten in einem Fenster von 60 Tagen, damit es Konflikte gibt
+    requests = []
+    for _ in range(count):
+        hotel_id, number = rng.choice(rooms)
+        start = first_day + timedelta(days=rng.randrange(60))
+        requests.append(BookingRequest(hotel_id, number, 1, 1, start, start + timedelta(days=rng.randrange(1, 5))))
+    return requests
+
+
+def run_loop(engine, requests):
+    with Session(engine) as session:
+        manager = ReservationManager(session)
+        return [manager.create_booking(*request).startswith("Booking successfully") for request in requests]
+
+
+def run_batch(engine, requests, batch_size):
+    with Session(engine) as session:
+        manager = ReservationManager(session)
+        results = []
+        for i in range(0, len(requests), batch_size):
+            results += [result.error is None for result in manager.create_bookings(requests[i:i + batch_size])]
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=100)
+    parser.add_argument("--rooms-per-hotel", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--profile", default="performance")
+    args = parser.parse_args()
+
+    start = date(date.today().year, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {}
+        for name in ("loop", "batch"):
+            engine = create_db_engine(Path(tmp) / f"{name}.db", profile=args.profile)
+            Base.metadata.create_all(engine)
+            generate_bulk_data(engine, hotels=args.hotels, rooms_per_hotel=args.rooms_per_hotel, guests=1000,
+                               bookings=args.bookings, start_date=start)
+            with Session(engine) as session:
+                rooms = session.execute(select(Room.hotel_id, Room.number).order_by(Room.id)).all()
+            requests = booking_requests(rooms, start + timedelta(days=300), args.requests, Random(2))
+
+            started = time.perf_counter()
+            if name == "loop":
+                accepted = run_loop(engine, requests)
+            else:
+                accepted = run_batch(engine, requests, args.batch_size)
+            elapsed = time.perf_counter() - started
+
+            with engine.begin() as connection:
+                report = check_room_nights(connection)
+                bookings = connection.execute(select(func.count()).select_from(Booking)).scalar()
+            assert not report["missing"] and not report["extra"], "room_night differs from booking"
+            results[name] = accepted
+            print(f"{name:>6}: {len(requests) / elapsed:>8.0f} bookings/s, {sum(accepted)} accepted, "
+                  f"{len(requests) - sum(accepted)} rejected, {bookings} bookings total")
+            engine.dispose()
+
+        # Beide Varianten nehmen dieselben Anfragen an: in der Schleife gewinnt ebenfalls die frühere Anfrage
+        assert results["loop"] == results["batch"], "create_bookings accepts different requests than create_booking"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+'''
+Export aller Buchungen mit data_access.booking_export (eine Datei pro Lauf, gestreamt mit yield_per) im Vergleich zur
+früheren CSV-Datei pro Buchung. Jeder Export läuft in einem eigenen Prozess, damit dessen Speicherspitze (peak RSS)
+gemessen werden kann. Exportiert wird einmal ein Zehntel und einmal der ganze Zeitraum: bei konstantem
+Speicherbedarf bleibt peak RSS gleich, obwohl zehnmal mehr Zeilen geschrieben werden.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.booking_export --bookings 1000000 --legacy-files 10000
+'''
+import argparse
+import csv
+import multiprocessing
+import os
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import select
+
+from data_access.booking_export import export_bookings, zstandard, pyarrow
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_models.models import Base, Booking
+
+
+def legacy_save(db_file, directory, limit):
+    # Frühere save_booking_details: eine CSV-Datei mit Schlüssel/Wert-Zeilen pro Buchung
+    engine = create_db_engine(db_file)
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        for booking in connection.execute(select(Booking).limit(limit)):
+            with open(Path(directory) / f"booking_{booking.id}_details.csv", "w", newline="") as file:
+                csv.writer(file).writerows([
+                    ["booking_id", booking.id], ["room_hotel_id", booking.room_hotel_id],
+                    ["room_number", booking.room_number], ["guest_id", booking.guest_id],
+                    ["number_of_guests", booking.number_of_guests],
+                    ["start_date", booking.start_date.strftime('%Y-%m-%d')],
+                    ["end_date", booking.end_date.strftime('%Y-%m-%d')], ["comment", booking.comment]
+                ])
+    engine.dispose()
+    return time.perf_counter() - started
+
+
+def peak_rss_mb():
+    # VmHWM gilt nur für diesen Prozess, ru_maxrss übernimmt unter Linux den Wert des forkenden Elternprozesses
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_export(db_file, path, end_date):
+    # Profil "safe" ohne mmap_size, sonst zählen die gemappten Seiten der Datenbankdatei zu peak RSS
+    engine = create_db_engine(db_file, profile="safe")
+    started = time.perf_counter()
+    with engine.connect() as connection:
+        count = export_bookings(connection, path, end_date=end_date)
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return count, elapsed, peak_rss_mb()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=1000)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--legacy-files", type=int, default=10000, help="Dateien der früheren Variante, hochgerechnet")
+    args = parser.parse_args()
+
+    start = date(date.today().year, 1, 1)
+    suffixes = ["csv", "csv.gz", "jsonl", "jsonl.gz"]
+    if zstandard is not None:
+        suffixes += ["csv.zst"]
+    if pyarrow is not None:
+        suffixes += ["parquet"]
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = str(Path(tmp) / "bench.db")
+        engine = create_db_engine(db_file)
+        Base.metadata.create_all(engine)
+        generate_bulk_data(engine, hotels=args.hotels, guests=10000, bookings=args.bookings, start_date=start)
+        engine.dispose()
+
+        legacy_directory = Path(tmp) / "Bookings"
+        legacy_directory.mkdir()
+        legacy = legacy_save(db_file, legacy_directory, args.legacy_files)
+        print(f"per-booking files: {args.legacy_files / legacy:.0f} bookings/s, "
+              f"~{legacy / args.legacy_files * args.bookings:.0f} s and {args.bookings} files for all bookings")
+
+        print(f"{'file':>10} {'period':>7} {'bookings':>9} {'bookings/s':>11} {'MB':>7} {'peak RSS MB':>12}")
+        with context.Pool(1, maxtasksperchild=1) as pool:
+            for suffix in suffixes:
+                for period, end_date in (("1/10", start + timedelta(days=73)), ("all", None)):
+                    path = Path(tmp) / f"bookings.{suffix}"
+                    count, elapsed, rss = pool.apply(run_export, (db_file, str(path), end_date))
+                    print(f"{suffix:>10} {period:>7} {count:>9} {count / elapsed:>11.0f} "
+                          f"{os.path.getsize(path) / 2 ** 20:>7.1f} {rss:>12.0f}")
+                    path.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+'''
+Abfragen und Zeit pro Seite der Buchungsliste für Administratoren: früher select(Booking) mit Lazy Loads für Zimmer,
+Hotel, Gast und Adresse pro Zeile, jetzt InventoryManager.list_bookings mit joinedload oder selectinload. Die Anzahl
+Abfragen pro Seite muss unabhängig von der Seitengrösse sein (1 mit "joined", 5 mit "selectin").
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.booking_list --hotels 1000 --bookings 200000 --page-sizes 50 200 500 --pages 20
+'''
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from business.InventoryManager import InventoryManager, all_bookings_query
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_models.models import Base, Booking
+
+QUERIES_PER_PAGE = {"joined": 1, "selectin": 5}
+
+
+class QueryCounter:
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._count)
+
+    def _count(self, *args):
+        self.count += 1
+
+
+def lazy_page(session_factory, after_id, limit):
+    # Bisheriger Weg: Buchungs-Objekte laden, die Anzeige greift dann pro Zeile auf die Beziehungen zu
+    with session_factory() as session:
+        query = all_bookings_query().where(Booking.id > after_id).order_by(Booking.id).limit(limit)
+        bookings = session.execute(query).scalars().all()
+        return [(booking.id, booking.room.hotel.name, booking.room.type, booking.guest.lastname,
+                 booking.guest.address.city) for booking in bookings]
+
+
+def measure(counter, pages, load_page):
+    # Liefert (Abfragen pro Seite, Millisekunden pro Seite), blättert mit after_id durch die Seiten
+    counts, after_id = set(), 0
+    started = time.perf_counter()
+    for _ in range(pages):
+        before = counter.count
+        rows = load_page(after_id)
+        counts.add(counter.count - before)
+        after_id = rows[-1][0]
+    return counts, (time.perf_counter() - started) / pages * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=1000)
+    parser.add_argument("--guests", type=int, default=20000)
+    parser.add_argument("--bookings", type=int, default=200000)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[50, 200, 500])
+    parser.add_argument("--pages", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "bench.db")
+        Base.metadata.create_all(engine)
+        generate_bulk_data(engine, hotels=args.hotels, guests=args.guests, bookings=args.bookings)
+        session_factory = sessionmaker(bind=engine)
+        manager = InventoryManager(session_factory)
+        manager.user_manager.is_admin = lambda: True
+        counter = QueryCounter(engine)
+
+        print(f"{'page size':>9} {'loader':>9} {'queries/page':>13} {'ms/page':>8}")
+        for limit in args.page_sizes:
+            counts, ms = measure(counter, args.pages, lambda after_id: lazy_page(session_factory, after_id, limit))
+            print(f"{limit:>9} {'lazy':>9} {max(counts):>13} {ms:>8.1f}")
+            for loader, expected in QUERIES_PER_PAGE.items():
+                counts, ms = measure(counter, args.pages, lambda after_id: manager.list_bookings(
+                    after_id=after_id, limit=limit, loader=loader
+                ))
+                assert counts == {expected}, f"{loader}: {sorted(counts)} queries per page, expected {expected}"
+                print(f"{limit:>9} {loader:>9} {expected:>13} {ms:>8.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+'''
+Laufzeit und Speicherbedarf von data_generator.generate_bulk_data.
+Nach dem Erzeugen wird geprüft, dass sich keine zwei Buchungen desselben Zimmers überschneiden.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bulk_data --hotels 5000 --guests 1000000 --bookings 10000000
+'''
+import argparse
+import resource
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import create_engine, text
+
+from data_access.data_generator import generate_bulk_data
+from data_models.models import Base
+
+OVERLAPS = text('''
+    SELECT count(*) FROM (
+        SELECT start_date, lag(end_date) OVER (PARTITION BY room_hotel_id, room_number ORDER BY start_date) AS previous_end
+        FROM booking
+    ) WHERE previous_end >= start_date
+''')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=1000)
+    parser.add_argument("--rooms-per-hotel", type=int, default=20)
+    parser.add_argument("--guests", type=int, default=100000)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--chunk-size", type=int, default=50000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(engine)
+
+        started = time.perf_counter()
+        counts = generate_bulk_data(engine, hotels=args.hotels, rooms_per_hotel=args.rooms_per_hotel,
+                                    guests=args.guests, bookings=args.bookings, days=args.days,
+                                    chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - started
+        # ru_maxrss ist unter Linux in KiB
+        peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+        for name, count in counts.items():
+            print(f"{name:<10} {count:>12}")
+        print(f"{sum(counts.values())} rows in {elapsed:.1f} s ({sum(counts.values()) / elapsed:.0f} rows/s), "
+              f"peak RSS {peak_mb:.0f} MB")
+
+        with engine.connect() as connection:
+            overlaps = connection.execute(OVERLAPS).scalar_one()
+        print(f"overlapping bookings: {overlaps}")
+        engine.dispose()
+        assert overlaps == 0
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+'''
+Import einer Hotelkette aus CSV/JSON-Lines-Dateien mit data_access.bulk_import im Vergleich zum bisherigen Weg über
+InventoryManager.add_hotel (Adress-Lookup und zwei Commits pro Hotel). Die Eingabedateien enthalten absichtlich
+einige ungültige Zeilen (fehlende Werte, unbekannte Hotels und Gäste, Doppelbuchungen), die gemeldet werden müssen.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.bulk_import --hotels 10000 --rooms-per-hotel 20 --guests 50000 --bookings 200000
+'''
+import argparse
+import csv
+import io
+import gzip
+import json
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, timedelta
+from pathlib import Path
+from random import Random
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import sessionmaker
+
+from business.InventoryManager import InventoryManager
+from data_access.bulk_import import import_files
+from data_access.data_base import create_db_engine
+from data_access.data_generator import BULK_CITIES, BULK_AMENITIES
+from data_access.occupancy import check_room_nights
+from data_models.models import Base, Address, Hotel, Room, Guest, Booking
+
+
+def write_csv(path, columns, rows):
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def write_jsonl_gz(path, rows):
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        for row in rows:
+            file.write(json.dumps(row) + "\n")
+
+
+def input_files(directory, hotels, rooms_per_hotel, guests, bookings, rng):
+    # Etwa 1% ungültige Zeilen pro Datei, Adressen wiederholen sich (mehrere Hotels und Gäste pro Adresse)
+    streets = [f"Street {i}" for i in range(max(hotels, guests) // 2)]
+
+    def address():
+        city = rng.choice(BULK_CITIES)
+        return rng.choice(streets), f"{BULK_CITIES.index(city) + 1000}", city
+
+    write_csv(directory / "hotels.csv", ["id", "name", "stars", "street", "zip", "city"], (
+        [i, f"Chain Hotel {i}" if i % 100 else "", rng.randint(1, 5), *address()] for i in range(1, hotels + 1)
+    ))
+    write_csv(directory / "rooms.csv", ["hotel_id", "number", "type", "max_guests", "description", "amenities",
+                                        "price"], (
+        [hotel_id if room % 100 else hotels + 1, f"{room:03d}", "Double", 2, "", BULK_AMENITIES, 120.0]
+        for hotel_id in range(1, hotels + 1) for room in range(1, rooms_per_hotel + 1)
+    ))
+    write_jsonl_gz(directory / "guests.jsonl.gz", (
+        dict(zip(["street", "zip", "city"], address()), id=i, firstname="Guest", lastname=str(i),
+             email=f"guest{i}@example.com" if i % 100 else "invalid")
+        for i in range(1, guests + 1)
+    ))
+    first_day = date(date.today().year + 1, 1, 1)
+    write_jsonl_gz(directory / "bookings.jsonl.gz", (
+        {"room_hotel_id": rng.randint(1, hotels), "room_number": f"{rng.randint(1, rooms_per_hotel - 1):03d}",
+         "guest_id": rng.randint(1, guests) if i % 100 else guests + 1, "number_of_guests": 1,
+         "start_date": (day := first_day + timedelta(days=rng.randrange(365))).isoformat(),
+         "end_date": (day + timedelta(days=rng.randrange(3))).isoformat()}
+        for i in range(1, bookings + 1)
+    ))
+
+
+def add_hotels_one_by_one(engine, directory, limit):
+    # Bisheriger Weg: InventoryManager.add_hotel pro Hotel (Admin-Prüfung übersprungen)
+    session_factory = sessionmaker(bind=engine)
+    manager = InventoryManager(session_factory)
+    manager.user_manager.is_admin = lambda: True
+    with open(directory / "hotels.csv", newline="", encoding="utf-8") as file:
+        rows = [row for _, row in zip(range(limit), csv.DictReader(file))]
+    started = time.perf_counter()
+    with redirect_stdout(io.StringIO()):
+        for row in rows:
+            manager.add_hotel(row["name"], int(row["stars"]), row["street"], row["zip"], row["city"])
+    return len(rows) / (time.perf_counter() - started)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=10000)
+    parser.add_argument("--rooms-per-hotel", type=int, default=20)
+    parser.add_argument("--guests", type=int, default=50000)
+    parser.add_argument("--bookings", type=int, default=200000)
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--add-hotel", type=int, default=1000, help="Hotels über InventoryManager.add_hotel")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        input_files(directory, args.hotels, args.rooms_per_hotel, args.guests, args.bookings, Random(1))
+
+        engine = create_db_engine(directory / "one_by_one.db")
+        Base.metadata.create_all(engine)
+        print(f"InventoryManager.add_hotel: {add_hotels_one_by_one(engine, directory, args.add_hotel):.0f} hotels/s")
+        engine.dispose()
+
+        engine = create_db_engine(directory / "bulk.db")
+        Base.metadata.create_all(engine)
+        started = time.perf_counter()
+        reports = import_files(engine, directory / "hotels.csv", directory / "rooms.csv",
+                               directory / "guests.jsonl.gz", directory / "bookings.jsonl.gz", args.chunk_size)
+        elapsed = time.perf_counter() - started
+        for report in reports:
+            print(f"  {report}")
+            for error in report.errors[:2]:
+                print(f"      line {error.line}: {error.message}")
+        print(f"bulk import: {sum(report.rows for report in reports) / elapsed:.0f} rows/s overall")
+
+        with engine.begin() as connection:
+            counts = {model.__tablename__: connection.execute(select(func.count()).select_from(model)).scalar()
+                      for model in (Address, Hotel, Room, Guest, Booking)}
+            report = check_room_nights(connection)
+        engine.dispose()
+        print(f"  stored: {counts}")
+        assert [counts[name] for name in ("hotel", "room", "guest", "booking")] == \
+               [report.imported for report in reports]
+        assert not report["missing"] and not report["extra"], "room_night differs from booking"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+'''
+Hotelsuche (search_available_hotels) über den CatalogSnapshot im Speicher im Vergleich zu RoomSearchQuery in SQL.
+Gemessen werden Ladezeit und Speicher des Snapshots sowie die Latenz pro Suche für verschiedene Filter, jeweils ohne
+und mit Zeitraum (belegte Zimmer kommen in beiden Fällen aus room_night). Die Resultate beider Wege werden verglichen.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.catalog_snapshot --hotels 50000 --rooms-per-hotel 20
+'''
+import argparse
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from business.CatalogSnapshot import CatalogSnapshot, Catalog
+from business.SearchManager import SearchManager
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_models.models import Address, Base
+
+
+def timed(function, repeat):
+    # Liefert (Resultat, Millisekunden des besten Laufs)
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - started)
+    return result, best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=50000)
+    parser.add_argument("--rooms-per-hotel", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    start_date = date(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "bench.db", profile="performance")
+        Base.metadata.create_all(engine)
+        generate_bulk_data(engine, hotels=args.hotels, rooms_per_hotel=args.rooms_per_hotel, guests=10000,
+                           bookings=args.bookings, start_date=start_date)
+
+        with Session(engine) as session:
+            started = time.perf_counter()
+            snapshot = CatalogSnapshot.load(session)
+            print(f"Snapshot: {len(snapshot)} Zimmer, {len(snapshot.hotel_ids)} Hotels, "
+                  f"{snapshot.memory_bytes() / 2 ** 20:.1f} MB, geladen in {time.perf_counter() - started:.2f} s")
+            city = session.execute(select(Address.city).limit(1)).scalar()
+
+            catalog = Catalog()
+            sql, memory = SearchManager(session), SearchManager(session, catalog=catalog)
+            catalog.snapshot(session)
+            week = dict(start_date=start_date + timedelta(days=60), end_date=start_date + timedelta(days=67))
+            cases = [
+                ("alle", {}),
+                ("Stadt", dict(city=city)),
+                ("Sterne + Gäste", dict(stars=4, max_guest=3)),
+                ("Preis 80-120", dict(min_price=80, max_price=120)),
+                ("Stadt + Preis + Ausst.", dict(city=city, max_price=150, amenities="TV")),
+            ]
+            print(f"{'Filter':>24} {'Zeitraum':>9} {'Hotels':>7} {'SQL ms':>9} {'Snapshot ms':>12} {'Maske ms':>9} "
+                  f"{'gleich':>7}")
+            for name, criteria in cases:
+                for dates in ({}, week):
+                    expected, sql_ms = timed(lambda: sql.search_available_hotels(**criteria, **dates), args.repeat)
+                    result, memory_ms = timed(
+                        lambda: memory.search_available_hotels(**criteria, **dates), args.repeat
+                    )
+                    # Nur die Filter im Speicher, ohne room_night und ohne Gruppieren pro Hotel
+                    _, mask_ms = timed(lambda: snapshot.room_mask(**criteria), args.repeat)
+                    print(f"{name:>24} {'ja' if dates else 'nein':>9} {len(result):>7} {sql_ms:>9.1f} "
+                          f"{memory_ms:>12.1f} {mask_ms:>9.2f} {str(result == expected):>7}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+'''
+Stresstest für gleichzeitige Buchungen aus mehreren Prozessen mit je mehreren Threads auf wenige Zimmer, damit sich
+viele Anfragen überschneiden. Danach wird geprüft, dass kein Zimmer an einem Tag doppelt belegt ist.
+Jeder Versuch ist eine eigene Schreibtransaktion, commits/s zählt daher auch abgelehnte Buchungen.
+    - legacy: frühere Prüfung mit is_room_available und danach add/commit, ohne Sperre dazwischen
+    - atomic: create_booking mit BEGIN IMMEDIATE und Retry bei SQLITE_BUSY
+    - queued: wie atomic, zusätzlich serialisiert eine WriteQueue die Threads jedes Prozesses
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.concurrent_bookings --processes 4 --threads 4 --attempts 200
+'''
+import argparse
+import multiprocessing
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from random import Random
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import sessionmaker
+
+from business.ReservationManager import ReservationManager
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_access.write_transaction import WriteQueue
+from data_models.models import Base, Booking, Room, RoomNight
+
+MODES = ("legacy", "atomic", "queued")
+
+
+def legacy_create_booking(manager, room_hotel_id, room_number, start_date, end_date):
+    # Ablauf von create_booking vor BEGIN IMMEDIATE: zwischen Prüfung und Commit kann ein anderer Prozess buchen
+    if not manager.is_room_available(room_number, room_hotel_id, start_date, end_date):
+        return False
+    manager.session.add(Booking(room_hotel_id=room_hotel_id, room_number=room_number, guest_id=1, number_of_guests=1,
+                                start_date=start_date, end_date=end_date))
+    manager.session.commit()
+    return True
+
+
+def run_thread(session_factory, mode, write_queue, rooms, first_day, attempts, seed):
+    rng = Random(seed)
+    created = 0
+    with session_factory() as session:
+        manager = ReservationManager(session, write_queue=write_queue)
+        for _ in range(attempts):
+            hotel_id, number = rng.choice(rooms)
+            start = first_day + timedelta(days=rng.randrange(30))
+            end = start + timedelta(days=rng.randrange(3))
+            if mode == "legacy":
+                created += legacy_create_booking(manager, hotel_id, number, start, end)
+            else:
+                created += manager.create_booking(hotel_id, number, 1, 1, start, end).startswith("Booking successfully")
+    return created
+
+
+def run_process(db_file, mode, threads, rooms, first_day, attempts, seed, start_event):
+    engine = create_db_engine(db_file)
+    session_factory = sessionmaker(bind=engine)
+    write_queue = WriteQueue() if mode == "queued" else None
+    start_event.wait()
+    with ThreadPoolExecutor(threads) as pool:
+        futures = [pool.submit(run_thread, session_factory, mode, write_queue, rooms, first_day, attempts,
+                               seed * 1000 + i) for i in range(threads)]
+        created = sum(future.result() for future in futures)
+    engine.dispose()
+    return created
+
+
+def double_booked_nights(engine):
+    # room_night hat pro Buchung eine Zeile je Zimmer und Tag, mehr als eine Buchung pro Zimmer und Tag ist doppelt
+    nights = select(RoomNight.room_id, RoomNight.night).group_by(RoomNight.room_id, RoomNight.night).having(
+        func.count() > 1
+    ).subquery()
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(nights)).scalar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--attempts", type=int, default=200, help="Buchungsversuche pro Thread")
+    parser.add_argument("--rooms", type=int, default=20, help="Anzahl Zimmer, auf die gebucht wird")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args()
+
+    first_day = date(date.today().year + 1, 1, 1)
+    total = args.processes * args.threads * args.attempts
+    failed = False
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.processes} processes x {args.threads} threads x {args.attempts} attempts on {args.rooms} rooms")
+        print(f"{'mode':>8} {'commits/s':>10} {'bookings/s':>11} {'bookings':>9} {'double booked nights':>21}")
+        for mode in args.modes:
+            db_file = Path(tmp) / f"{mode}.db"
+            engine = create_db_engine(db_file)
+            Base.metadata.create_all(engine)
+            generate_bulk_data(engine, hotels=10, rooms_per_hotel=10, guests=100, bookings=0)
+            with engine.connect() as connection:
+                rooms = [tuple(row) for row in connection.execute(
+                    select(Room.hotel_id, Room.number).order_by(Room.id).limit(args.rooms)
+                )]
+
+            context = multiprocessing.get_context("spawn")
+            start_event = context.Manager().Event()
+            with context.Pool(args.processes) as pool:
+                results = [pool.apply_async(run_process, (str(db_file), mode, args.threads, rooms, first_day,
+                                                          args.attempts, seed, start_event))
+                           for seed in range(args.processes)]
+                # Erst starten, wenn alle Prozesse bereit sind, damit die Importzeit nicht mitgemessen wird
+                time.sleep(1)
+                started = time.perf_counter()
+                start_event.set()
+                created = sum(result.get() for result in results)
+                elapsed = time.perf_counter() - started
+
+            doubles = double_booked_nights(engine)
+            with engine.connect() as connection:
+                bookings = connection.execute(select(func.count()).select_from(Booking)).scalar()
+            engine.dispose()
+            assert bookings == created, f"{mode}: {created} bookings reported, {bookings} in the database"
+            print(f"{mode:>8} {total / elapsed:>10.0f} {created / elapsed:>11.0f} {bookings:>9} {doubles:>21}")
+            failed |= mode != "legacy" and doubles > 0
+    if failed:
+        raise SystemExit("double bookings with BEGIN IMMEDIATE")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+'''
+Latenz der Volltextsuche (SearchManager.full_text_search, FTS5) gegen die bisherige LIKE-Suche mit '%wort%'.
+Für den Vergleich durchsucht die LIKE-Variante dieselben Spalten (Hotelname, Stadt, Zimmertyp, Beschreibung und
+Ausstattung) und liefert ebenfalls höchstens limit Zimmer, allerdings ohne Sortierung nach Relevanz.
+Zusätzlich wird die Namenssuche der Hotelliste (hotel_list_query) gemessen.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.full_text_search --hotels 50000 --rooms-per-hotel 20
+'''
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from sqlalchemy import select, func, or_
+from sqlalchemy.orm import Session
+
+from business.SearchManager import SearchManager, hotel_list_query
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_access.full_text_index import create_full_text_index
+from data_models.models import Base, Address, Hotel, Room
+
+QUERIES = ["Hotel 4711", "4711", "zurich", "queen", "family bed", "caffe"]
+
+
+def like_search_query(text, limit):
+    conditions = []
+    for word in text.lower().split():
+        pattern = f"%{word}%"
+        conditions.append(or_(
+            func.lower(Hotel.name).like(pattern),
+            func.lower(Address.city).like(pattern),
+            func.lower(Room.type).like(pattern),
+            func.lower(Room.description).like(pattern),
+            func.lower(Room.amenities).like(pattern)
+        ))
+    return select(Hotel.id, Hotel.name, Address.city, Room.id, Room.number).select_from(Room).join(
+        Hotel, Room.hotel_id == Hotel.id
+    ).join(
+        Address, Hotel.address_id == Address.id
+    ).where(*conditions).limit(limit)
+
+
+def timed(run, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = run()
+    return (time.perf_counter() - started) / repeat * 1000, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=50000)
+    parser.add_argument("--rooms-per-hotel", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "bench.db")
+        Base.metadata.create_all(engine)
+        with engine.begin() as connection:
+            create_full_text_index(connection)
+        started = time.perf_counter()
+        generate_bulk_data(engine, hotels=args.hotels, rooms_per_hotel=args.rooms_per_hotel, guests=1, bookings=0)
+        print(f"{args.hotels * args.rooms_per_hotel} rooms generated and indexed in {time.perf_counter() - started:.1f} s")
+
+        print(f"{'query':>12} {'like ms':>9} {'rows':>5} {'fts ms':>9} {'rows':>5} {'list like ms':>13}")
+        with Session(engine) as session:
+            search_manager = SearchManager(session)
+            for text in QUERIES:
+                like, like_rows = timed(
+                    lambda: session.execute(like_search_query(text, args.limit)).all(), args.repeat
+                )
+                fts, fts_rows = timed(lambda: search_manager.full_text_search(text, args.limit), args.repeat)
+                hotel_list, _ = timed(
+                    lambda: session.execute(hotel_list_query(text, limit=args.limit)).all(), args.repeat
+                )
+                print(f"{text:>12} {like:>9.2f} {like_rows:>5} {fts:>9.2f} {fts_rows:>5} {hotel_list:>13.2f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
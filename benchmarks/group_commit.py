@@ -0,0 +1,86 @@
+'''
+Schreibdurchsatz von create_booking aus vielen Threads: ein Commit pro Aufruf im Vergleich zum GroupCommitWriter,
+der die Buchungen mehrerer Aufrufer in einer Transaktion committet. Gemessen für die Pragma-Profile "safe"
+(synchronous=FULL, ein fsync pro Commit) und "performance" (synchronous=NORMAL).
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.group_commit --threads 32 --writes 100 --max-delay 0.002 --max-batch 100
+'''
+import argparse
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import select, func
+from sqlalchemy.orm import sessionmaker
+
+from business.ReservationManager import ReservationManager
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_access.group_commit import GroupCommitWriter
+from data_access.occupancy import check_room_nights
+from data_models.models import Base, Booking, Room
+
+
+def run_thread(session_factory, group_writer, room, first_day, writes):
+    # Jeder Thread bucht ein eigenes Zimmer an aufeinanderfolgenden Tagen, es gibt keine Konflikte
+    hotel_id, number = room
+    created = 0
+    with session_factory() as session:
+        manager = ReservationManager(session, group_writer=group_writer)
+        for i in range(writes):
+            day = first_day + timedelta(days=i)
+            created += manager.create_booking(hotel_id, number, 1, 1, day, day).startswith("Booking successfully")
+    return created
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=32)
+    parser.add_argument("--writes", type=int, default=100, help="Buchungen pro Thread")
+    parser.add_argument("--max-delay", type=float, default=0.002)
+    parser.add_argument("--max-batch", type=int, default=100)
+    parser.add_argument("--profiles", nargs="+", default=["safe", "performance"])
+    args = parser.parse_args()
+
+    first_day = date(date.today().year + 1, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{args.threads} threads x {args.writes} bookings")
+        print(f"{'profile':>12} {'mode':>9} {'writes/s':>9} {'ops/transaction':>16}")
+        for profile in args.profiles:
+            for mode in ("per-call", "group"):
+                db_file = Path(tmp) / f"{profile}-{mode}.db"
+                engine = create_db_engine(db_file, profile=profile, pool_size=args.threads + 1)
+                Base.metadata.create_all(engine)
+                generate_bulk_data(engine, hotels=10, rooms_per_hotel=args.threads // 10 + 1, guests=100, bookings=0)
+                session_factory = sessionmaker(bind=engine)
+                with session_factory() as session:
+                    rooms = session.execute(select(Room.hotel_id, Room.number).limit(args.threads)).all()
+
+                writer = None
+                if mode == "group":
+                    writer = GroupCommitWriter(session_factory, args.max_delay, args.max_batch).start()
+                started = time.perf_counter()
+                with ThreadPoolExecutor(args.threads) as pool:
+                    created = sum(pool.map(
+                        lambda room: run_thread(session_factory, writer, room, first_day, args.writes), rooms
+                    ))
+                elapsed = time.perf_counter() - started
+                per_transaction = 1.0
+                if writer is not None:
+                    writer.close()
+                    per_transaction = writer.operations / writer.transactions
+
+                with engine.begin() as connection:
+                    bookings = connection.execute(select(func.count()).select_from(Booking)).scalar()
+                    report = check_room_nights(connection)
+                engine.dispose()
+                assert created == bookings == len(rooms) * args.writes, f"{created} created, {bookings} stored"
+                assert not report["missing"] and not report["extra"], "room_night differs from booking"
+                print(f"{profile:>12} {mode:>9} {created / elapsed:>9.0f} {per_transaction:>16.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+'''
+Hotelliste aus gui/hotel_search.py über einen grossen Katalog: früheres HotelTableModel (alle Hotel-Objekte laden,
+Zimmer und Adresse pro Zeile per Lazy Load) gegen HotelPageCache (Keyset-Seiten als Tupel).
+Gemessen werden die Zeit bis zur ersten angezeigten Seite, das Durchscrollen aller Zeilen, die Anzahl Statements
+und der höchste Speicherbedarf (tracemalloc). Qt wird dafür nicht gebraucht.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.hotel_list --hotels 100000 --scroll-rows 20000
+'''
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_models.models import Base, Hotel
+from gui.hotel_pages import HotelPageCache
+
+VISIBLE_ROWS = 30
+
+
+def legacy_row(hotel):
+    return hotel.id, hotel.name, len(hotel.rooms), f"{hotel.address.street}, {hotel.address.zip} {hotel.address.city}"
+
+
+def run_legacy(session, rows):
+    hotels = session.query(Hotel).all()
+    for row in range(min(VISIBLE_ROWS, len(hotels))):
+        legacy_row(hotels[row])
+    first_page = time.perf_counter()
+    for row in range(VISIBLE_ROWS, min(rows, len(hotels))):
+        legacy_row(hotels[row])
+    return first_page
+
+
+def run_paged(session, rows):
+    pages = HotelPageCache(session)
+    pages.fetch_next()
+    for row in range(min(VISIBLE_ROWS, pages.row_count)):
+        pages.row(row)
+    first_page = time.perf_counter()
+    row = VISIBLE_ROWS
+    while row < rows:
+        # Wie QTableView: fetchMore, sobald das Ende der geladenen Zeilen erreicht ist
+        if row >= pages.row_count:
+            if not pages.can_fetch_more() or pages.fetch_next() == 0:
+                break
+        pages.row(row)
+        row += 1
+    # Zurück an den Anfang scrollen, die verdrängten Seiten werden neu geladen
+    for row in range(VISIBLE_ROWS):
+        pages.row(row)
+    return first_page
+
+
+def measure(label, engine, run, rows):
+    statements = []
+    listener = lambda *args: statements.append(1)
+    event.listen(engine, "before_cursor_execute", listener)
+    tracemalloc.start()
+    with Session(engine) as session:
+        started = time.perf_counter()
+        first_page = run(session, rows)
+        finished = time.perf_counter()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    event.remove(engine, "before_cursor_execute", listener)
+    print(f"{label:<8} {(first_page - started) * 1000:>12.1f} {finished - started:>10.2f} {len(statements):>11} "
+          f"{peak / 1024 / 1024:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=100000)
+    parser.add_argument("--rooms-per-hotel", type=int, default=5)
+    # Das frühere Model braucht für 100000 Zeilen mehrere Minuten, daher standardmässig nur ein Teil
+    parser.add_argument("--scroll-rows", type=int, default=20000)
+    args = parser.parse_args()
+    rows = args.scroll_rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "bench.db")
+        Base.metadata.create_all(engine)
+        generate_bulk_data(engine, hotels=args.hotels, rooms_per_hotel=args.rooms_per_hotel, guests=1, bookings=0)
+
+        print(f"{'variant':<8} {'first page ms':>12} {'scroll s':>10} {'statements':>11} {'peak MB':>9}")
+        measure("legacy", engine, run_legacy, rows)
+        measure("paged", engine, run_paged, rows)
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
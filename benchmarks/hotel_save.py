@@ -0,0 +1,81 @@
+'''
+Startzeit und Latenz pro Speichern eines Hotels wie in gui/hotel_insert.py (HotelUIForm.save_to_db).
+"per click" ist das frühere Vorgehen mit create_engine(echo=True) und engine.connect() bei jedem Klick, "registry" die
+Session-Factory aus data_access.engine_registry. Die Echo-Ausgabe wird verworfen.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.hotel_save --saves 500
+'''
+import argparse
+import io
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from data_access.data_base import init_db
+from data_access.engine_registry import EngineRegistry
+from data_models.models import Hotel, Address
+
+
+def new_hotel(i):
+    return Hotel(name=f"Hotel {i}", stars=3, address=Address(street=f"Strasse {i}", zip="4600", city="Olten"))
+
+
+def save_per_click(db_file, i, leaked):
+    engine = create_engine(f"sqlite:///{db_file}", echo=True)
+    # Die Verbindung aus engine.connect() wurde nie geschlossen
+    leaked.append(engine.connect())
+    with Session(engine) as session:
+        session.add(new_hotel(i))
+        session.commit()
+
+
+def save_registry(registry, db_file, i):
+    with registry.session_factory(db_file)() as session:
+        session.add(new_hotel(i))
+        session.commit()
+
+
+def measure(save, saves):
+    latencies = []
+    for i in range(saves):
+        started = time.perf_counter()
+        save(i)
+        latencies.append(time.perf_counter() - started)
+    # Der erste Klick enthält den Aufbau von Engine und Verbindung (Startzeit)
+    steady = sorted(latencies[1:])
+    return latencies[0] * 1000, sum(steady) / len(steady) * 1000, steady[int(len(steady) * 0.95)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--saves", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'variant':<10} {'first ms':>9} {'mean ms':>9} {'p95 ms':>9}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = Path(tmp) / "per_click.db"
+        init_db(str(db_file))
+        leaked = []
+        with redirect_stdout(io.StringIO()):
+            first, mean, p95 = measure(lambda i: save_per_click(db_file, i, leaked), args.saves)
+        print(f"{'per click':<10} {first:>9.2f} {mean:>9.2f} {p95:>9.2f}   ({len(leaked)} connections left open)")
+        for connection in leaked:
+            connection.close()
+
+        db_file = Path(tmp) / "registry.db"
+        init_db(str(db_file))
+        registry = EngineRegistry()
+        first, mean, p95 = measure(lambda i: save_registry(registry, db_file, i), args.saves)
+        print(f"{'registry':<10} {first:>9.2f} {mean:>9.2f} {p95:>9.2f}")
+        for path, stats in registry.pool_stats().items():
+            print(f"pool {Path(path).name}: {stats}")
+        registry.dispose_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+'''
+Kosten der Instrumentierung (data_access/instrumentation.py) pro Aufruf: dieselben Manager-Methoden mit
+instrumentation.enabled = True und False, abwechselnd in mehreren Runden, jeweils der Median. validate_email setzt
+kein SQL ab und zeigt die Kosten des Wrappers, is_room_available und get_room_details zusätzlich die der Events.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.instrumentation --calls 20000 --rounds 5
+'''
+import argparse
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy.orm import sessionmaker
+
+from business.ReservationManager import ReservationManager
+from business.SearchManager import SearchManager
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_access.instrumentation import instrumentation
+from data_models.models import Base
+
+
+def per_call_us(function, calls):
+    started = time.perf_counter()
+    for i in range(calls):
+        function(i)
+    return (time.perf_counter() - started) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    first_day = date(date.today().year, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "bench.db")
+        Base.metadata.create_all(engine)
+        generate_bulk_data(engine, hotels=100, guests=1000, bookings=20000, start_date=first_day)
+        with sessionmaker(bind=engine)() as session:
+            search_manager = SearchManager(session)
+            reservation_manager = ReservationManager(session)
+            cases = {
+                "validate_email": lambda i: reservation_manager.validate_email(f"guest{i}@example.com"),
+                "is_room_available": lambda i: reservation_manager.is_room_available(
+                    "01", i % 100 + 1, first_day + timedelta(days=i % 300), first_day + timedelta(days=i % 300 + 2)
+                ),
+                "get_room_details": lambda i: search_manager.get_room_details(i % 1000 + 1),
+            }
+
+            print(f"{'method':>18} {'off us':>8} {'on us':>8} {'overhead us':>12} {'overhead':>9}")
+            for name, function in cases.items():
+                timings = {True: [], False: []}
+                for _ in range(args.rounds):
+                    for enabled in (False, True):
+                        instrumentation.enabled = enabled
+                        timings[enabled].append(per_call_us(function, args.calls))
+                off, on = statistics.median(timings[False]), statistics.median(timings[True])
+                print(f"{name:>18} {off:>8.2f} {on:>8.2f} {on - off:>12.2f} {(on - off) / off:>9.1%}")
+            instrumentation.enabled = True
+        engine.dispose()
+        print(instrumentation.log_line())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+'''
+Latenz der Suche ohne Zeitraum über verschiedene Katalog-Grössen.
+Verglichen wird die frühere Abfrage mit der NOT IN Unterabfrage (Room.id == 998877665544) mit RoomSearchQuery, die
+ohne Zeitraum gar nicht auf booking zugreift.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.no_date_search --sizes 100 1000 10000
+'''
+import argparse
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from random import Random
+
+from sqlalchemy import create_engine, insert, select, func
+from sqlalchemy.orm import Session
+
+from business.SearchManager import SearchManager, RoomSearchQuery
+from data_models.models import Base, Address, Hotel, Room, Booking
+
+CITIES = ["Olten", "Zürich", "Basel", "Bern", "Luzern", "Genf", "Lugano", "Chur", "Aarau", "Thun"]
+
+
+def fill_catalog(engine, hotels: int, rooms_per_hotel: int, bookings_per_room: int, rng: Random):
+    with engine.begin() as connection:
+        connection.execute(insert(Address), [
+            {"id": i, "street": f"Strasse {i}", "zip": f"{1000 + i % 9000}", "city": CITIES[i % len(CITIES)]}
+            for i in range(1, hotels + 1)
+        ])
+        connection.execute(insert(Hotel), [
+            {"id": i, "name": f"Hotel {i}", "stars": i % 5 + 1, "address_id": i} for i in range(1, hotels + 1)
+        ])
+        connection.execute(insert(Room), [
+            {"hotel_id": h, "number": f"{n:02d}", "max_guests": n % 4 + 1, "price": 80.0 + n * 10}
+            for h in range(1, hotels + 1) for n in range(rooms_per_hotel)
+        ])
+        bookings = []
+        for h in range(1, hotels + 1):
+            for n in range(rooms_per_hotel):
+                start_date = date(2024, 1, 1)
+                for _ in range(bookings_per_room):
+                    start_date += timedelta(days=rng.randint(1, 20))
+                    end_date = start_date + timedelta(days=rng.randint(1, 5))
+                    bookings.append({"room_hotel_id": h, "room_number": f"{n:02d}", "guest_id": 1,
+                                     "number_of_guests": 1, "start_date": start_date, "end_date": end_date})
+                    start_date = end_date
+        connection.execute(insert(Booking), bookings)
+
+
+def legacy_no_date_query(city):
+    # Frühere Variante: Anti-Join auf booking auch ohne Zeitraum
+    booked = select(Room.id).join(Booking).where(Room.id == 998877665544)
+    return select(Room.id).join(Hotel).join(Address).where(
+        Room.id.not_in(booked), func.lower(Address.city) == city.lower()
+    )
+
+
+def timed(run, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        run()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="Anzahl Hotels")
+    parser.add_argument("--rooms-per-hotel", type=int, default=20)
+    parser.add_argument("--bookings-per-room", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'hotels':>8} {'rooms':>9} {'legacy ms':>10} {'builder ms':>10} {'hotels ms':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+            Base.metadata.create_all(engine)
+            fill_catalog(engine, size, args.rooms_per_hotel, args.bookings_per_room, Random(1))
+
+            with Session(engine) as session:
+                search_manager = SearchManager(session)
+                # Nur Room.id, damit die Abfrage und nicht das Erzeugen der ORM-Objekte gemessen wird
+                builder_query = RoomSearchQuery(city="Olten").rooms().with_only_columns(Room.id)
+                legacy = timed(lambda: session.execute(legacy_no_date_query("Olten")).all(), args.repeat)
+                rooms = timed(lambda: session.execute(builder_query).all(), args.repeat)
+                hotels = timed(lambda: search_manager.search_available_hotels("Olten"), args.repeat)
+            engine.dispose()
+        print(f"{size:>8} {size * args.rooms_per_hotel:>9} {legacy:>10.2f} {rooms:>10.2f} {hotels:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+'''
+Auswertungen über das ganze Portfolio mit der OccupancyMatrix (NumPy) im Vergleich zu SQL-Abfragen pro Nacht.
+Gemessen werden das Laden der Matrix, die freien Zimmer über einen Zeitraum, die freien Zimmer pro Hotel und Nacht
+für 365 Tage und ein refresh() nach neuen Buchungen.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.occupancy_matrix --hotels 2500 --rooms-per-hotel 20 --days 730
+'''
+import argparse
+import resource
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from sqlalchemy import insert, select, func
+from sqlalchemy.orm import Session
+
+from business.OccupancyMatrix import OccupancyMatrix
+from business.SearchManager import RoomSearchQuery
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_models.models import Base, Booking, Room
+
+
+def timed(run):
+    started = time.perf_counter()
+    result = run()
+    return (time.perf_counter() - started) * 1000, result
+
+
+def sql_free_rooms(session, first, last):
+    query = RoomSearchQuery(start_date=first, end_date=last).rooms().with_only_columns(Room.id)
+    return session.execute(query).scalars().all()
+
+
+def sql_free_rooms_per_hotel(session, first, nights):
+    # Eine gruppierte Abfrage pro Nacht, wie es mit den bestehenden Suchen nötig wäre
+    counts = {}
+    for night in range(nights):
+        day = first + timedelta(days=night)
+        query = RoomSearchQuery(start_date=day, end_date=day).rooms().with_only_columns(
+            Room.hotel_id, func.count(Room.id)
+        ).group_by(Room.hotel_id)
+        counts[day] = session.execute(query).all()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=2500)
+    parser.add_argument("--rooms-per-hotel", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--sql-nights", type=int, default=10, help="Nächte der SQL-Variante, auf 365 hochgerechnet")
+    parser.add_argument("--new-bookings", type=int, default=1000)
+    args = parser.parse_args()
+
+    start = date(date.today().year, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "bench.db")
+        Base.metadata.create_all(engine)
+        generate_bulk_data(engine, hotels=args.hotels, rooms_per_hotel=args.rooms_per_hotel, guests=10000,
+                           bookings=args.bookings, start_date=start, days=args.days)
+
+        with Session(engine) as session:
+            load, matrix = timed(lambda: OccupancyMatrix.load(session, start, args.days))
+            print(f"{len(matrix)} rooms x {matrix.days} days, {args.bookings} bookings, "
+                  f"matrix {matrix.occupancy.nbytes / 2 ** 20:.0f} MB, load {load:.0f} ms, "
+                  f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+
+            first, last = start + timedelta(days=100), start + timedelta(days=106)
+            sql, sql_rooms = timed(lambda: sql_free_rooms(session, first, last))
+            numpy, numpy_rooms = timed(lambda: matrix.free_rooms(first, last))
+            assert sorted(sql_rooms) == numpy_rooms.tolist()
+            print(f"free rooms {first}..{last}: SQL {sql:.1f} ms, NumPy {numpy:.1f} ms ({len(numpy_rooms)} rooms)")
+
+            sql, sql_counts = timed(lambda: sql_free_rooms_per_hotel(session, start, args.sql_nights))
+            numpy, counts = timed(lambda: matrix.free_rooms_per_hotel(start, 365))
+            # Stichprobe: erste Nacht stimmt mit SQL überein (Hotels ohne freie Zimmer fehlen im SQL-Resultat)
+            expected = dict(sql_counts[start])
+            assert all(expected.get(int(h), 0) == int(c) for h, c in zip(counts.hotel_ids, counts.free[:, 0]))
+            print(f"free rooms per hotel and night, 365 nights: SQL ~{sql / args.sql_nights * 365:.0f} ms "
+                  f"(measured {args.sql_nights} nights), NumPy {numpy:.1f} ms")
+
+            first_booking_id = session.execute(select(func.max(Booking.id))).scalar() + 1
+            rooms = session.execute(select(Room.hotel_id, Room.number).limit(args.new_bookings)).all()
+            day = start + timedelta(days=args.days - 5)
+            session.execute(insert(Booking), [
+                {"id": first_booking_id + i, "room_hotel_id": hotel_id, "room_number": number, "guest_id": 1,
+                 "number_of_guests": 1, "start_date": day, "end_date": day + timedelta(days=2)}
+                for i, (hotel_id, number) in enumerate(rooms)
+            ])
+            session.commit()
+            refresh, loaded = timed(lambda: matrix.refresh(session))
+            print(f"refresh with {loaded} new bookings: {refresh:.1f} ms")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
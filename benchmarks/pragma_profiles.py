@@ -0,0 +1,96 @@
+'''
+Vergleicht die Pragma-Profile aus data_access.data_base.PRAGMA_PROFILES.
+Gemessen werden einzeln committete Buchungen über ReservationManager.create_booking sowie die Latenz von
+SearchManager.search_available_hotels und ReservationManager.is_room_available. Jedes Profil bekommt eine eigene
+Datenbank, da journal_mode=WAL in der Datei gespeichert bleibt.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.pragma_profiles --writes 2000 --reads 500
+'''
+import argparse
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from random import Random
+
+from sqlalchemy.orm import sessionmaker, scoped_session
+
+from business.ReservationManager import ReservationManager
+from business.SearchManager import SearchManager
+from data_access.data_base import PRAGMA_PROFILES, create_db_engine
+from data_access.data_generator import BULK_CITIES, generate_bulk_data
+from data_models.models import Base
+
+
+def percentile(latencies, p):
+    latencies = sorted(latencies)
+    return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+
+def run_profile(db_file, profile, args):
+    engine = create_db_engine(db_file, profile)
+    Base.metadata.create_all(engine)
+    first_day = date(2024, 1, 1)
+    generate_bulk_data(engine, hotels=args.hotels, rooms_per_hotel=args.rooms_per_hotel, guests=1000,
+                       bookings=args.bookings, start_date=first_day, days=args.days)
+
+    session = scoped_session(sessionmaker(bind=engine))
+    reservation_manager = ReservationManager(session)
+    search_manager = SearchManager(session)
+    rng = Random(1)
+
+    # Neue Buchungen nach dem Ende der erzeugten Daten, reihum über die Zimmer, damit keine abgelehnt wird
+    rooms = args.hotels * args.rooms_per_hotel
+    started = time.perf_counter()
+    for i in range(args.writes):
+        room = i % rooms
+        start_date = first_day + timedelta(days=args.days + 2 * (i // rooms) + 1)
+        result = reservation_manager.create_booking(room // args.rooms_per_hotel + 1,
+                                                    f"{room % args.rooms_per_hotel + 1:02d}", 1, 1, start_date,
+                                                    start_date)
+        assert "successfully" in result, result
+    writes = args.writes / (time.perf_counter() - started)
+
+    search_latencies = []
+    check_latencies = []
+    for _ in range(args.reads):
+        start_date = first_day + timedelta(days=rng.randrange(args.days))
+        end_date = start_date + timedelta(days=rng.randint(1, 7))
+        started = time.perf_counter()
+        search_manager.search_available_hotels(rng.choice(BULK_CITIES), start_date, end_date, 2)
+        search_latencies.append(time.perf_counter() - started)
+
+        room = rng.randrange(rooms)
+        started = time.perf_counter()
+        reservation_manager.is_room_available(f"{room % args.rooms_per_hotel + 1:02d}",
+                                              room // args.rooms_per_hotel + 1, start_date, end_date)
+        check_latencies.append(time.perf_counter() - started)
+
+    session.remove()
+    engine.dispose()
+    return writes, search_latencies, check_latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profiles", nargs="+", default=list(PRAGMA_PROFILES))
+    parser.add_argument("--hotels", type=int, default=500)
+    parser.add_argument("--rooms-per-hotel", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=200000)
+    parser.add_argument("--days", type=int, default=730)
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+
+    print(f"{'profile':<12} {'writes/s':>9} {'search p50':>11} {'search p95':>11} {'check p50':>10} {'check p95':>10}")
+    for profile in args.profiles:
+        with tempfile.TemporaryDirectory() as tmp:
+            writes, search_latencies, check_latencies = run_profile(Path(tmp) / "bench.db", profile, args)
+        print(f"{profile:<12} {writes:>9.0f} {percentile(search_latencies, 0.5):>11.2f} "
+              f"{percentile(search_latencies, 0.95):>11.2f} {percentile(check_latencies, 0.5):>10.3f} "
+              f"{percentile(check_latencies, 0.95):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
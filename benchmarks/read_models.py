@@ -0,0 +1,87 @@
+'''
+Auflisten und Ausgeben (repr) aller Buchungen: als ORM-Objekte mit select(Booking) im Vergleich zu BookingRow aus
+data_models/read_models.py. Gemessen werden Abfragen, Zeit und mit tracemalloc die Speicherspitze sowie der Speicher,
+den die fertige Liste belegt. Die frühere repr-Kette (Booking -> Zimmer -> Hotel -> Adresse, Gast -> Adresse) wird
+für die ersten --legacy Buchungen nachgestellt.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.read_models --bookings 100000 --legacy 2000
+'''
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_models.models import Base, Booking
+from data_models.read_models import BookingRow, booking_rows_query, read_rows
+
+
+def legacy_repr(booking):
+    # Frühere Booking.__repr__: zeigte Zimmer (mit Hotel und Adresse) und Gast (mit Adresse)
+    room, guest = booking.room, booking.guest
+    return (f"Booking(room=Room(hotel=Hotel(id={room.hotel.id!r}, address={room.hotel.address!r}), "
+            f"room_number={room.number!r}), guest=Guest(id={guest.id!r}, address={guest.address!r}), "
+            f"start_date={booking.start_date!r}, end_date={booking.end_date!r})")
+
+
+def orm_listing(engine, limit=None, render=repr):
+    with Session(engine) as session:
+        return [render(booking) for booking in session.scalars(select(Booking).order_by(Booking.id).limit(limit))]
+
+
+def row_listing(engine, limit=None, render=repr):
+    with engine.connect() as connection:
+        return [render(row) for row in read_rows(connection, BookingRow, booking_rows_query(limit=limit))]
+
+
+def measure(engine, listing, *args):
+    # Liefert (Zeilen, Abfragen, Sekunden, Speicherspitze MB, Speicher der Liste MB)
+    queries = []
+    count = lambda *_: queries.append(1)
+    event.listen(engine, "before_cursor_execute", count)
+    started = time.perf_counter()
+    rows = len(listing(engine, *args))
+    seconds = time.perf_counter() - started
+    event.remove(engine, "before_cursor_execute", count)
+
+    tracemalloc.start()
+    kept = listing(engine, *args)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return rows, len(queries), seconds, peak / 2 ** 20, retained / 2 ** 20
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=1000)
+    parser.add_argument("--bookings", type=int, default=100000)
+    parser.add_argument("--legacy", type=int, default=2000, help="Buchungen mit der früheren repr-Kette")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "bench.db")
+        Base.metadata.create_all(engine)
+        generate_bulk_data(engine, hotels=args.hotels, guests=10000, bookings=args.bookings)
+
+        print(f"{'listing':>22} {'rows':>7} {'queries':>8} {'s':>6} {'peak MB':>8} {'list MB':>8}")
+        for name, listing, listing_args in (
+            ("legacy repr (ORM)", orm_listing, (args.legacy, legacy_repr)),
+            ("ORM objects", orm_listing, (None, lambda booking: booking)),
+            ("BookingRow", row_listing, (None, lambda row: row)),
+            ("ORM + repr", orm_listing, ()),
+            ("BookingRow + repr", row_listing, ()),
+        ):
+            rows, queries, seconds, peak, retained = measure(engine, listing, *listing_args)
+            print(f"{name:>22} {rows:>7} {queries:>8} {seconds:>6.2f} {peak:>8.1f} {retained:>8.1f}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+'''
+Stadtweite Hotelsuche über 90-Tage-Zeiträume: frühere Überschneidungsprüfung auf booking gegen den Belegungskalender
+room_night. Gemessen werden die Suche pro Stadt (RoomSearchQuery.hotels), die Verfügbarkeitsprüfung eines Zimmers
+und das Nachführen von room_night beim Einfügen einzelner Buchungen über die Trigger.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m benchmarks.room_nights --hotels 1000 --bookings 1000000
+'''
+import argparse
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+from random import Random
+
+from sqlalchemy import select, insert, func, and_, or_
+from sqlalchemy.orm import Session
+
+from business.ReservationManager import booking_conflict_query
+from business.SearchManager import RoomSearchQuery
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data, BULK_CITIES
+from data_access.occupancy import check_room_nights
+from data_models.models import Base, Booking, RoomNight, Room
+
+
+class LegacyRoomSearchQuery(RoomSearchQuery):
+    def booked(self):
+        # Frühere Variante: Überschneidung der Buchungsintervalle
+        return select(Booking.id).where(
+            Booking.room_hotel_id == Room.hotel_id,
+            Booking.room_number == Room.number,
+            Booking.start_date <= self.end_date,
+            Booking.end_date >= self.start_date
+        )
+
+
+def legacy_conflict_query(room_number, room_hotel_id, start_date, end_date):
+    return select(Booking.id).where(
+        and_(
+            Booking.room_number == room_number,
+            Booking.room_hotel_id == room_hotel_id,
+            or_(
+                and_(Booking.start_date <= start_date, Booking.end_date >= start_date),
+                and_(Booking.start_date <= end_date, Booking.end_date >= end_date),
+                and_(Booking.start_date >= start_date, Booking.end_date <= end_date)
+            )
+        )
+    ).limit(1)
+
+
+def timed(run, calls):
+    started = time.perf_counter()
+    results = [run(*call) for call in calls]
+    return (time.perf_counter() - started) / len(calls) * 1000, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hotels", type=int, default=1000)
+    parser.add_argument("--rooms-per-hotel", type=int, default=20)
+    parser.add_argument("--bookings", type=int, default=1000000)
+    parser.add_argument("--window", type=int, default=90, help="Länge des gesuchten Zeitraums in Tagen")
+    parser.add_argument("--searches", type=int, default=50)
+    parser.add_argument("--checks", type=int, default=2000)
+    parser.add_argument("--writes", type=int, default=1000)
+    args = parser.parse_args()
+
+    rng = Random(1)
+    start = date(date.today().year, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(Path(tmp) / "bench.db")
+        Base.metadata.create_all(engine)
+        started = time.perf_counter()
+        generate_bulk_data(engine, hotels=args.hotels, rooms_per_hotel=args.rooms_per_hotel, guests=10000,
+                           bookings=args.bookings, start_date=start)
+        print(f"bulk data incl. room_night in {time.perf_counter() - started:.1f} s")
+
+        with Session(engine) as session:
+            nights = session.execute(select(func.count()).select_from(RoomNight)).scalar()
+            print(f"{args.bookings} bookings, {nights} room_night rows")
+
+            searches = []
+            for _ in range(args.searches):
+                first = start + timedelta(days=rng.randrange(730 - args.window))
+                searches.append((rng.choice(BULK_CITIES), first, first + timedelta(days=args.window - 1)))
+            rooms = session.execute(select(Room.number, Room.hotel_id)).all()
+            checks = []
+            for _ in range(args.checks):
+                first = start + timedelta(days=rng.randrange(730 - args.window))
+                checks.append((*rng.choice(rooms), first, first + timedelta(days=args.window - 1)))
+
+            def search(query_class):
+                return lambda city, first, last: session.execute(query_class(city, first, last, 1).hotels()).all()
+
+            def check(query):
+                return lambda *call: session.execute(query(*call)).first() is None
+
+            legacy_search, legacy_hotels = timed(search(LegacyRoomSearchQuery), searches)
+            night_search, night_hotels = timed(search(RoomSearchQuery), searches)
+            legacy_check, legacy_free = timed(check(legacy_conflict_query), checks)
+            night_check, night_free = timed(check(booking_conflict_query), checks)
+            assert legacy_hotels == night_hotels and legacy_free == night_free, "room_night differs from booking"
+
+        print(f"{'':>28} {'booking ms':>11} {'room_night ms':>14}")
+        print(f"{f'city search, {args.window} days':>28} {legacy_search:>11.2f} {night_search:>14.2f}")
+        print(f"{f'room check, {args.window} days':>28} {legacy_check:>11.3f} {night_check:>14.3f}")
+
+        # Einzelne Buchungen nach dem letzten generierten Tag, room_night wird per Trigger nachgeführt
+        first = start + timedelta(days=800)
+        bookings = [
+            {"room_hotel_id": hotel_id, "room_number": number, "guest_id": 1, "number_of_guests": 1,
+             "start_date": first + timedelta(days=5 * i), "end_date": first + timedelta(days=5 * i + 3)}
+            for i, (number, hotel_id) in enumerate(rng.choices(rooms, k=args.writes))
+        ]
+        with engine.begin() as connection:
+            started = time.perf_counter()
+            for booking in bookings:
+                connection.execute(insert(Booking), booking)
+            write = (time.perf_counter() - started) / args.writes * 1000
+            report = check_room_nights(connection)
+        print(f"booking insert incl. trigger {write:.3f} ms, check: missing={report['missing']} extra={report['extra']}")
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
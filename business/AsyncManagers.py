@@ -0,0 +1,516 @@
+import asyncio
+
+from sqlalchemy import delete
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import joinedload
+
+from business.InventoryManager import (
+    address_query, hotel_query, room_query, booking_query, booking_dates_query,
+    registered_guest_query, guest_bookings_query, guest_booking_query, booking_list_query, booking_list_row
+)
+from business.ReservationManager import (
+    ReservationManager, booking_conflict_query, booking_by_id_query, as_booking_request, book_room, book_rooms,
+    batch_results
+)
+from business.SearchCache import hotel_city
+from business.SearchManager import (
+    HotelAvailability, RoomSearchQuery, available_hotel_objects_query, room_details_query, room_details,
+    rooms_by_hotel_query, room_row_dict, hotels_by_name_query, all_hotels_query, print_hotels,
+    FullTextMatch, full_text_match_expression, full_text_search_query
+)
+from business.UserManager import login_query, role_query, guest_of_query
+from data_access.data_base import DEFAULT_PROFILE, listen_pragmas
+from data_access.instrumentation import instrumentation, instrument_methods
+from data_access.write_transaction import (
+    BEGIN_IMMEDIATE, WRITE_RETRIES, WRITE_BACKOFF, WRITE_MAX_BACKOFF, listen_begin, is_busy_error, backoff_delays
+)
+from data_models.models import Login, RegisteredGuest, Address, Hotel, Booking
+from data_models.read_models import BookingRow
+
+
+def create_async_session_factory(db_file, echo=False, profile=DEFAULT_PROFILE, **engine_options):
+    # Standard für aiosqlite-Dateien ist NullPool. Mit poolclass=AsyncAdaptedQueuePool werden Verbindungen (und ihre
+    # Threads) wiederverwendet, dann muss die Engine aber mit await factory.kw["bind"].dispose() geschlossen werden,
+    # sonst beendet sich der Prozess nicht.
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_file}", echo=echo, **engine_options)
+    # Dieselben Pragma-Profile wie create_db_engine, der Event hängt an der synchronen Engine
+    listen_pragmas(engine.sync_engine, profile)
+    listen_begin(engine.sync_engine)
+    instrumentation.instrument_engine(engine.sync_engine)
+    # Objekte bleiben nach dem Commit lesbar, ein Nachladen abgelaufener Attribute ist mit AsyncSession nicht möglich
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@instrument_methods
+class AsyncSearchManager:
+    '''
+    Async-Variante des SearchManager mit denselben Statements.
+    Jeder Aufruf öffnet eine eigene AsyncSession aus der session_factory, dadurch können beliebig viele Suchen
+    gleichzeitig laufen. Beziehungen, die der Aufrufer braucht, werden eager geladen, Lazy Loads gehen mit AsyncSession
+    nicht.
+    '''
+
+    def __init__(self, session_factory):
+        self._session_factory = session_factory
+
+    async def _scalars(self, query):
+        async with self._session_factory() as session:
+            return (await session.execute(query)).scalars().all()
+
+    async def _rows(self, query):
+        async with self._session_factory() as session:
+            return (await session.execute(query)).all()
+
+    async def search_available_hotels(self, city=None, start_date=None, end_date=None, max_guest=None, stars=None,
+                                      amenities=None, min_price=None, max_price=None):
+        query = RoomSearchQuery(
+            city, start_date, end_date, max_guest, stars, amenities=amenities, min_price=min_price,
+            max_price=max_price
+        ).hotels()
+        rows = await self._rows(query)
+        return [HotelAvailability(*row) for row in rows]
+
+    async def search_hotels_by_city_date_guests_stars(self, city=None, start_date=None, end_date=None, max_guest=None,
+                                                      stars=None, compat=True, amenities=None):
+        if not compat:
+            return await self.search_available_hotels(city, start_date, end_date, max_guest, stars, amenities)
+
+        hotels_with_available_rooms = await self._scalars(
+            available_hotel_objects_query(city, start_date, end_date, max_guest, stars, amenities)
+        )
+        print_hotels(hotels_with_available_rooms)
+        if hotels_with_available_rooms:
+            return hotels_with_available_rooms
+
+    async def search_rooms_by_availability(self, start_date, end_date, hotel: Hotel = None, max_guest=None,
+                                           amenities=None):
+        hotel_id = hotel.id if hotel is not None else None
+        query = RoomSearchQuery(
+            start_date=start_date, end_date=end_date, max_guest=max_guest, hotel_id=hotel_id, amenities=amenities
+        ).rooms()
+        return await self._scalars(query)
+
+    async def get_room_details(self, room_id):
+        rooms = await self._scalars(room_details_query(room_id))
+        if rooms:
+            return room_details(rooms[0])
+        return None
+
+    async def get_rooms_by_hotel(self, hotel_id, max_guest):
+        rooms = await self._rows(rooms_by_hotel_query(hotel_id, max_guest))
+        return [room_row_dict(room) for room in rooms]
+
+    async def get_hotels_by_name(self, name):
+        return await self._scalars(hotels_by_name_query(name).options(joinedload(Hotel.address)))
+
+    async def get_all_hotels(self):
+        return await self._scalars(all_hotels_query().options(joinedload(Hotel.address)))
+
+    async def full_text_search(self, query, limit=20):
+        if not full_text_match_expression(query):
+            return []
+        rows = await self._rows(full_text_search_query(query, limit))
+        return [FullTextMatch(*row) for row in rows]
+
+
+@instrument_methods
+class AsyncReservationManager:
+    '''
+    Async-Variante des ReservationManager, optional mit AvailabilityIndex und SearchCache wie die synchrone Version.
+    '''
+
+    # Ohne Datenbankzugriff, daher direkt vom ReservationManager übernommen
+    save_booking_details = ReservationManager.save_booking_details
+    validate_email = ReservationManager.validate_email
+    validate_date = ReservationManager.validate_date
+
+    def __init__(self, session_factory, availability_index=None, search_cache=None):
+        self._session_factory = session_factory
+        self._availability_index = availability_index
+        self._search_cache = search_cache
+
+    async def _is_room_available(self, session, room_number, room_hotel_id, start_date, end_date):
+        if self._availability_index is not None:
+            return self._availability_index.is_available(room_hotel_id, room_number, start_date, end_date)
+
+        query = booking_conflict_query(room_number, room_hotel_id, start_date, end_date)
+        return (await session.execute(query)).first() is None
+
+    async def is_room_available(self, room_number, room_hotel_id, start_date, end_date):
+        async with self._session_factory() as session:
+            return await self._is_room_available(session, room_number, room_hotel_id, start_date, end_date)
+
+    async def _write_transaction(self, session, work, *args):
+        # Wie run_write_transaction: work läuft mit der synchronen Session in einer BEGIN IMMEDIATE Transaktion,
+        # bei SQLITE_BUSY wird nach einer Wartezeit wiederholt, ohne den Event Loop zu blockieren
+        delays = backoff_delays(WRITE_RETRIES, WRITE_BACKOFF, WRITE_MAX_BACKOFF)
+        while True:
+            try:
+                await session.connection(execution_options=BEGIN_IMMEDIATE)
+                result = await session.run_sync(work, *args)
+                await session.commit()
+                return result
+            except OperationalError as error:
+                await session.rollback()
+                delay = next(delays, None)
+                if delay is None or not is_busy_error(error):
+                    raise
+                await asyncio.sleep(delay)
+
+    async def create_booking(self, room_hotel_id, room_number, guest_id, number_of_guests, start_date, end_date,
+                             comment=''):
+        if self._availability_index is not None and \
+                not self._availability_index.is_available(room_hotel_id, room_number, start_date, end_date):
+            return "Room is not available for the selected dates."
+
+        async with self._session_factory() as session:
+            new_booking = await self._write_transaction(
+                session, book_room, room_hotel_id, room_number, guest_id, number_of_guests, start_date, end_date,
+                comment
+            )
+            if new_booking is None:
+                return "Room is not available for the selected dates."
+            if self._availability_index is not None:
+                self._availability_index.add_booking(new_booking)
+            if self._search_cache is not None:
+                city = await session.run_sync(hotel_city, room_hotel_id)
+                self._search_cache.invalidate_booking(room_hotel_id, city, start_date, end_date)
+            return f"Booking successfully created with ID: {new_booking.id}"
+
+    async def create_bookings(self, requests):
+        requests = [as_booking_request(request) for request in requests]
+        if not requests:
+            return []
+        async with self._session_factory() as session:
+            accepted, booking_ids, errors = await self._write_transaction(session, book_rooms, requests)
+
+            cities = {}
+            for i, booking_id in zip(accepted, booking_ids):
+                request = requests[i]
+                if self._availability_index is not None:
+                    self._availability_index.add(booking_id, request.room_hotel_id, request.room_number,
+                                                 request.start_date, request.end_date)
+                if self._search_cache is not None:
+                    if request.room_hotel_id not in cities:
+                        cities[request.room_hotel_id] = await session.run_sync(hotel_city, request.room_hotel_id)
+                    self._search_cache.invalidate_booking(
+                        request.room_hotel_id, cities[request.room_hotel_id], request.start_date, request.end_date
+                    )
+            return batch_results(requests, accepted, booking_ids, errors)
+
+    async def get_booking_by_id(self, booking_id):
+        async with self._session_factory() as session:
+            return (await session.execute(booking_by_id_query(booking_id))).scalars().first()
+
+
+@instrument_methods
+class AsyncUserManager:
+    '''
+    Async-Variante des UserManager. Das angemeldete Login wird mit seiner Rolle geladen und bleibt nach dem Schliessen
+    der Session lesbar.
+    '''
+
+    def __init__(self, session_factory):
+        self._max_attempts = 3
+        self._current_login = None
+        self._attempts_left = self._max_attempts
+        self._session_factory = session_factory
+
+    async def login(self, username, password):
+        self._attempts_left -= 1
+        if self._attempts_left >= 0 and self._current_login is None:
+            async with self._session_factory() as session:
+                result = await session.execute(login_query(username, password))
+                self._current_login = result.scalars().one_or_none()
+                return self._current_login
+        return None
+
+    def logout(self):
+        self._attempts_left = self._max_attempts
+        self._current_login = None
+
+    async def register_user(self, username, password, firstname, lastname, email, street, zip_code, city):
+        async with self._session_factory() as session:
+            new_address = Address(street=street, zip=zip_code, city=city)
+            new_user = RegisteredGuest(firstname=firstname, lastname=lastname, email=email, address=new_address)
+            new_login = Login(username=username, password=password, role_id=2)
+            new_user.login = new_login
+            session.add_all([new_address, new_user, new_login])
+            await session.commit()
+            return new_user
+
+    async def get_guest_of(self, login):
+        async with self._session_factory() as session:
+            return (await session.execute(guest_of_query(login))).scalars().one_or_none()
+
+    async def create_admin(self, username, password):
+        if not self.is_admin():
+            raise PermissionError("Current user is not authorized to create an admin account")
+
+        async with self._session_factory() as session:
+            role = (await session.execute(role_query("administrator"))).scalars().one()
+            try:
+                session.add(Login(username=username, password=password, role=role))
+                await session.commit()
+            except Exception as e:
+                await session.rollback()
+                raise e
+
+    def get_current_login(self):
+        return self._current_login
+
+    def has_attempts_left(self):
+        return self._attempts_left > 0
+
+    def is_admin(self):
+        if self._current_login and self._current_login.role.name == "administrator":
+            return True
+        return False
+
+
+@instrument_methods
+class AsyncInventoryManager:
+    '''
+    Async-Variante des InventoryManager mit denselben Berechtigungsprüfungen, Meldungen und Nachführungen von
+    AvailabilityIndex und SearchCache.
+    '''
+
+    def __init__(self, session_factory, availability_index=None, search_cache=None):
+        self._session_factory = session_factory
+        self.user_manager = AsyncUserManager(session_factory)
+        self._availability_index = availability_index
+        self._search_cache = search_cache
+
+    async def _invalidate_booking(self, session, booking):
+        # booking ist ein Booking-Objekt oder ein Tupel (room_hotel_id, start_date, end_date)
+        if self._search_cache is None or booking is None:
+            return
+        if isinstance(booking, Booking):
+            booking = (booking.room_hotel_id, booking.start_date, booking.end_date)
+        room_hotel_id, start_date, end_date = booking
+        city = await session.run_sync(hotel_city, room_hotel_id)
+        self._search_cache.invalidate_booking(room_hotel_id, city, start_date, end_date)
+
+    async def _invalidate_hotel(self, session, hotel_id, *old_cities):
+        if self._search_cache is not None:
+            city = await session.run_sync(hotel_city, hotel_id)
+            self._search_cache.invalidate_hotel(hotel_id, city, *old_cities)
+
+    async def _old_city(self, session, hotel_id):
+        if self._search_cache is None:
+            return None
+        return await session.run_sync(hotel_city, hotel_id)
+
+    async def _address_id(self, session, street, zip_code, city):
+        address = (await session.execute(address_query(street, zip_code, city))).scalars().first()
+        if address:
+            return address.id
+        new_address = Address(street=street, zip=zip_code, city=city)
+        session.add(new_address)
+        await session.commit()
+        return new_address.id
+
+    async def add_hotel(self, name, stars, street, zip_code, city):
+        if not self.user_manager.is_admin():
+            print("Nur Administratoren können neue Hotels hinzufügen.")
+            return
+
+        async with self._session_factory() as session:
+            try:
+                address_id = await self._address_id(session, street, zip_code, city)
+                new_hotel = Hotel(name=name, stars=stars, address_id=address_id)
+                session.add(new_hotel)
+                await session.commit()
+                await self._invalidate_hotel(session, new_hotel.id)
+                print(f"Hotel '{name}' erfolgreich hinzugefügt.")
+            except Exception as e:
+                await session.rollback()
+                print(f"Fehler beim Hinzufügen des Hotels: {e}")
+
+    async def remove_hotel(self, hotel_id):
+        if not self.user_manager.is_admin():
+            print("Nur Administratoren können Hotels entfernen.")
+            return
+
+        async with self._session_factory() as session:
+            try:
+                old_city = await self._old_city(session, hotel_id)
+                await session.execute(delete(Hotel).where(Hotel.id == hotel_id))
+                await session.commit()
+                await self._invalidate_hotel(session, hotel_id, old_city)
+                print(f"Hotel mit ID '{hotel_id}' erfolgreich entfernt.")
+            except Exception as e:
+                await session.rollback()
+                print(f"Fehler beim Entfernen des Hotels: {e}")
+
+    async def update_hotel_info(self, hotel_id, name=None, stars=None, street=None, zip_code=None, city=None):
+        if not self.user_manager.is_admin():
+            print("Nur Administratoren können Hotelinformationen aktualisieren.")
+            return
+
+        async with self._session_factory() as session:
+            try:
+                hotel = (await session.execute(hotel_query(hotel_id))).scalars().one_or_none()
+                if hotel:
+                    old_city = await self._old_city(session, hotel_id)
+                    if name:
+                        hotel.name = name
+                    if stars:
+                        hotel.stars = stars
+                    if street and zip_code and city:
+                        hotel.address_id = await self._address_id(session, street, zip_code, city)
+                    await session.commit()
+                    await self._invalidate_hotel(session, hotel_id, old_city)
+                    print(f"Hotel mit ID '{hotel_id}' erfolgreich aktualisiert.")
+                else:
+                    print(f"Hotel mit ID '{hotel_id}' nicht gefunden.")
+            except Exception as e:
+                await session.rollback()
+                print(f"Fehler beim Aktualisieren des Hotels: {e}")
+
+    async def list_bookings(self, hotel_id=None, guest_id=None, start_date=None, end_date=None, after_id=None,
+                            limit=None, loader="joined"):
+        if not self.user_manager.is_admin():
+            print("Nur Administratoren können Buchungen anzeigen.")
+            return
+
+        async with self._session_factory() as session:
+            try:
+                query = booking_list_query(hotel_id, guest_id, start_date, end_date, after_id, limit, loader)
+                return [booking_list_row(booking) for booking in (await session.execute(query)).scalars()]
+            except Exception as e:
+                print(f"Fehler beim Abrufen der Buchungen: {e}")
+
+    async def update_booking_info(self, booking_id, **kwargs):
+        if not self.user_manager.is_admin():
+            print("Nur Administratoren können Buchungsinformationen aktualisieren.")
+            return
+
+        async with self._session_factory() as session:
+            try:
+                booking = (await session.execute(booking_query(booking_id))).scalars().one_or_none()
+                if booking:
+                    old_booking = (booking.room_hotel_id, booking.start_date, booking.end_date)
+                    if 'start_date' in kwargs:
+                        booking.start_date = kwargs['start_date']
+                    if 'end_date' in kwargs:
+                        booking.end_date = kwargs['end_date']
+                    if 'guest_id' in kwargs:
+                        booking.guest_id = kwargs['guest_id']
+                    if 'room_id' in kwargs:
+                        booking.room_hotel_id = kwargs['room_id']
+                    await session.commit()
+                    if self._availability_index is not None:
+                        self._availability_index.update_booking(booking)
+                    await self._invalidate_booking(session, old_booking)
+                    await self._invalidate_booking(session, booking)
+                    print(f"Buchung mit ID '{booking_id}' erfolgreich aktualisiert.")
+                else:
+                    print(f"Buchung mit ID '{booking_id}' nicht gefunden.")
+            except Exception as e:
+                await session.rollback()
+                print(f"Fehler beim Aktualisieren der Buchung: {e}")
+
+    async def delete_booking(self, booking_id):
+        if not self.user_manager.is_admin():
+            print("Nur Administratoren können Buchungen löschen.")
+            return
+
+        async with self._session_factory() as session:
+            try:
+                old_booking = None
+                if self._search_cache is not None:
+                    old_booking = (await session.execute(booking_dates_query(booking_id))).one_or_none()
+                await session.execute(delete(Booking).where(Booking.id == booking_id))
+                await session.commit()
+                await self._invalidate_booking(session, old_booking)
+                if self._availability_index is not None:
+                    self._availability_index.remove(booking_id)
+                print(f"Buchung mit ID '{booking_id}' erfolgreich gelöscht.")
+            except Exception as e:
+                await session.rollback()
+                print(f"Fehler beim Löschen der Buchung: {e}")
+
+    async def get_user_bookings(self, email):
+        async with self._session_factory() as session:
+            try:
+                user = (await session.execute(registered_guest_query(email))).scalars().one_or_none()
+                if user:
+                    return list(map(BookingRow._make, await session.execute(guest_bookings_query(user.id))))
+                print(f"Keine Buchungen für die E-Mail {email} gefunden.")
+                return []
+            except Exception as e:
+                print(f"Fehler beim Abrufen der Buchungen: {e}")
+                return []
+
+    async def _user_booking(self, session, email, booking_id):
+        # Liefert (user, booking), booking nur, wenn es dem Benutzer gehört
+        user = (await session.execute(registered_guest_query(email))).scalars().one_or_none()
+        if user is None:
+            return None, None
+        return user, (await session.execute(guest_booking_query(user.id, booking_id))).scalars().one_or_none()
+
+    async def update_user_booking(self, email, booking_id, **kwargs):
+        async with self._session_factory() as session:
+            try:
+                user, booking = await self._user_booking(session, email, booking_id)
+                if user is None:
+                    print(f"Kein Benutzer mit E-Mail {email} gefunden.")
+                elif booking is None:
+                    print(f"Buchung mit ID '{booking_id}' nicht gefunden oder nicht berechtigt.")
+                else:
+                    old_booking = (booking.room_hotel_id, booking.start_date, booking.end_date)
+                    if 'start_date' in kwargs:
+                        booking.start_date = kwargs['start_date']
+                    if 'end_date' in kwargs:
+                        booking.end_date = kwargs['end_date']
+                    await session.commit()
+                    if self._availability_index is not None:
+                        self._availability_index.update_booking(booking)
+                    await self._invalidate_booking(session, old_booking)
+                    await self._invalidate_booking(session, booking)
+                    print(f"Buchung mit ID '{booking_id}' erfolgreich aktualisiert.")
+            except Exception as e:
+                await session.rollback()
+                print(f"Fehler beim Aktualisieren der Buchung: {e}")
+
+    async def delete_user_booking(self, email, booking_id):
+        async with self._session_factory() as session:
+            try:
+                user, booking = await self._user_booking(session, email, booking_id)
+                if user is None:
+                    print(f"Kein Benutzer mit E-Mail {email} gefunden.")
+                elif booking is None:
+                    print(f"Buchung mit ID '{booking_id}' nicht gefunden oder nicht berechtigt.")
+                else:
+                    deleted_booking_id = booking.id
+                    old_booking = (booking.room_hotel_id, booking.start_date, booking.end_date)
+                    await session.delete(booking)
+                    await session.commit()
+                    await self._invalidate_booking(session, old_booking)
+                    if self._availability_index is not None:
+                        self._availability_index.remove(deleted_booking_id)
+                    print(f"Buchung mit ID '{booking_id}' erfolgreich gelöscht.")
+            except Exception as e:
+                await session.rollback()
+                print(f"Fehler beim Löschen der Buchung: {e}")
+
+    async def update_room_price(self, room_id, price):
+        if not self.user_manager.is_admin():
+            print("Nur Administratoren können Zimmerpreise aktualisieren.")
+            return
+
+        async with self._session_factory() as session:
+            try:
+                room = (await session.execute(room_query(room_id))).scalars().one_or_none()
+                if room:
+                    room.price = price
+                    await session.commit()
+                    await self._invalidate_hotel(session, room.hotel_id)
+                    print(f"Preis des Zimmers mit ID '{room_id}' erfolgreich aktualisiert.")
+                else:
+                    print(f"Zimmer mit ID '{room_id}' nicht gefunden.")
+            except Exception as e:
+                await session.rollback()
+                print(f"Fehler beim Aktualisieren des Zimmerpreises: {e}")
@@ -0,0 +1,163 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from threading import RLock
+
+from sqlalchemy import select
+
+from data_models.models import Booking
+
+
+def _as_date(value):
+    # Die Konsolen-UIs übergeben datetime-Objekte, in der Datenbank stehen date-Werte
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _room_key(room_hotel_id, room_number):
+    return int(room_hotel_id), str(room_number)
+
+
+class _RoomIntervals:
+    '''
+    Nach Startdatum sortierte Buchungsintervalle eines Zimmers.
+    max_ends[i] ist das grösste Enddatum von ends[0..i], dadurch braucht eine Überschneidungsprüfung nur eine
+    Binärsuche.
+    '''
+    __slots__ = ("starts", "ends", "ids", "max_ends")
+
+    def __init__(self):
+        self.starts = []
+        self.ends = []
+        self.ids = []
+        self.max_ends = []
+
+    def overlaps(self, start_date, end_date):
+        # Gleiche Logik wie die SQL-Abfrage: Überschneidung, wenn start <= end_date und end >= start_date
+        i = bisect_right(self.starts, end_date)
+        return i > 0 and self.max_ends[i - 1] >= start_date
+
+    def append(self, booking_id, start_date, end_date):
+        # Nur für bereits sortiert geladene Daten, max_ends wird in finish() berechnet
+        self.starts.append(start_date)
+        self.ends.append(end_date)
+        self.ids.append(booking_id)
+
+    def finish(self):
+        self._update_max_ends(0)
+
+    def insert(self, booking_id, start_date, end_date):
+        i = bisect_right(self.starts, start_date)
+        self.starts.insert(i, start_date)
+        self.ends.insert(i, end_date)
+        self.ids.insert(i, booking_id)
+        self.max_ends.insert(i, end_date)
+        self._update_max_ends(i)
+
+    def remove(self, booking_id, start_date):
+        i = bisect_left(self.starts, start_date)
+        while self.ids[i] != booking_id:
+            i += 1
+        del self.starts[i], self.ends[i], self.ids[i], self.max_ends[i]
+        self._update_max_ends(i)
+
+    def _update_max_ends(self, i):
+        del self.max_ends[i:]
+        current = self.max_ends[i - 1] if i > 0 else None
+        for end_date in self.ends[i:]:
+            if current is None or end_date > current:
+                current = end_date
+            self.max_ends.append(current)
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class AvailabilityIndex:
+    '''
+    In-Memory Verfügbarkeitsindex pro Zimmer (room_hotel_id, room_number).
+    Wird einmal aus der Tabelle booking geladen und danach vom ReservationManager und InventoryManager bei jeder
+    Buchungsänderung nachgeführt. Eine Verfügbarkeitsprüfung kostet O(log n) und greift nicht auf SQLite zu.
+    Der Index kennt nur die Buchungen dieses Prozesses, Änderungen aus anderen Prozessen sieht er erst nach reload().
+    '''
+
+    def __init__(self):
+        self._lock = RLock()
+        self._rooms = {}
+        self._bookings = {}
+
+    @classmethod
+    def load(cls, session, yield_per: int = 10000):
+        index = cls()
+        index.reload(session, yield_per)
+        return index
+
+    def reload(self, session, yield_per: int = 10000):
+        query = select(
+            Booking.id,
+            Booking.room_hotel_id,
+            Booking.room_number,
+            Booking.start_date,
+            Booking.end_date
+        ).order_by(
+            Booking.room_hotel_id,
+            Booking.room_number,
+            Booking.start_date
+        ).execution_options(yield_per=yield_per)
+
+        rooms = {}
+        bookings = {}
+        for booking_id, room_hotel_id, room_number, start_date, end_date in session.execute(query):
+            key = _room_key(room_hotel_id, room_number)
+            intervals = rooms.get(key)
+            if intervals is None:
+                intervals = rooms[key] = _RoomIntervals()
+            intervals.append(booking_id, start_date, end_date)
+            bookings[booking_id] = (key, start_date, end_date)
+        for intervals in rooms.values():
+            intervals.finish()
+
+        with self._lock:
+            self._rooms = rooms
+            self._bookings = bookings
+
+    def is_available(self, room_hotel_id, room_number, start_date, end_date):
+        key = _room_key(room_hotel_id, room_number)
+        start_date, end_date = _as_date(start_date), _as_date(end_date)
+        # Auch das Nachschlagen unter dem Lock: load() und add() ersetzen bzw. ändern self._rooms
+        with self._lock:
+            intervals = self._rooms.get(key)
+            return intervals is None or not intervals.overlaps(start_date, end_date)
+
+    def add(self, booking_id, room_hotel_id, room_number, start_date, end_date):
+        key = _room_key(room_hotel_id, room_number)
+        start_date, end_date = _as_date(start_date), _as_date(end_date)
+        with self._lock:
+            if booking_id in self._bookings:
+                self._remove(booking_id)
+            intervals = self._rooms.get(key)
+            if intervals is None:
+                intervals = self._rooms[key] = _RoomIntervals()
+            intervals.insert(booking_id, start_date, end_date)
+            self._bookings[booking_id] = (key, start_date, end_date)
+
+    def add_booking(self, booking: Booking):
+        self.add(booking.id, booking.room_hotel_id, booking.room_number, booking.start_date, booking.end_date)
+
+    # Eine geänderte Buchung wird einfach neu eingefügt, add() entfernt den alten Eintrag
+    update_booking = add_booking
+
+    def remove(self, booking_id):
+        with self._lock:
+            if booking_id in self._bookings:
+                self._remove(booking_id)
+
+    def _remove(self, booking_id):
+        key, start_date, _ = self._bookings.pop(booking_id)
+        intervals = self._rooms[key]
+        intervals.remove(booking_id, start_date)
+        if not intervals:
+            del self._rooms[key]
+
+    def __len__(self):
+        return len(self._bookings)
@@ -0,0 +1,243 @@
+import json
+import sys
+import time
+from datetime import datetime
+from threading import Lock
+
+import numpy as np
+from sqlalchemy import select, func, literal, Date
+
+from data_access.catalog_version import catalog_version
+from data_models.models import Address, Amenity, Hotel, Room, RoomNight, parse_amenities
+
+# Spalten der Zimmer in der Reihenfolge des Selects in CatalogSnapshot._load_rooms
+_ROOM_DTYPE = np.dtype([
+    ("id", np.int64), ("hotel_id", np.int64), ("max_guests", np.int16), ("amenity_mask", np.int64),
+    ("price", np.float64)
+])
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _intern(value):
+    return sys.intern(value) if value is not None else None
+
+
+def _compact_ids(values):
+    # int32 reicht für die ids fast immer und halbiert den Speicher gegenüber int64
+    if len(values) and values.max() >= 2 ** 31:
+        return values.astype(np.int64)
+    return values.astype(np.int32)
+
+
+class CatalogSnapshot:
+    '''
+    Unveränderlicher Stand des Katalogs (Hotels mit Adresse, Zimmer mit Preis, max_guests und Ausstattung) als
+    NumPy-Spalten für Suchen im Speicher. Hotels und Zimmer sind nach id sortiert, room_hotels[i] ist der Index des
+    Hotels von Zimmer i in den Hotel-Spalten. Texte sind mit sys.intern dedupliziert, Städte zusätzlich als Code-Spalte
+    hotel_cities (Index in cities, -1 ohne Adresse).
+    version ist catalog_version beim Laden, Catalog lädt bei einer neuen Version einen neuen Snapshot.
+    Buchungen gehören nicht zum Katalog, belegte Zimmer kommen über occupied() weiterhin aus room_night.
+    '''
+    YIELD_PER = 100000
+    # Bis zu diesem Anteil der Zimmer werden belegte Zimmer nur für die Kandidaten gesucht, darüber für alle
+    CANDIDATE_FRACTION = 0.25
+
+    def __init__(self, version: int = 0):
+        self.version = version
+        self.hotel_ids = np.empty(0, dtype=np.int32)
+        self.hotel_stars = np.empty(0, dtype=np.int8)
+        self.hotel_cities = np.empty(0, dtype=np.int32)
+        self.hotel_names = []
+        self.hotel_streets = []
+        self.hotel_zips = []
+        self.cities = []
+        self.room_ids = np.empty(0, dtype=np.int32)
+        self.room_hotels = np.empty(0, dtype=np.int32)
+        self.room_max_guests = np.empty(0, dtype=np.int16)
+        self.room_prices = np.empty(0, dtype=np.float64)
+        self.room_amenity_masks = np.empty(0, dtype=np.int64)
+        # Zimmer nach Hotel sortiert und Beginn jedes Hotels darin, für Anzahl und Mindestpreis pro Hotel
+        self._by_hotel = np.empty(0, dtype=np.int32)
+        self._hotel_starts = np.empty(0, dtype=np.int32)
+        self._city_codes = {}
+        self._amenity_masks = {}
+
+    @classmethod
+    def load(cls, session):
+        # Die Version zuerst lesen: ändert sich der Katalog währenddessen, lädt der nächste refresh noch einmal
+        snapshot = cls(catalog_version(session))
+        snapshot._load_hotels(session)
+        snapshot._load_rooms(session)
+        snapshot._amenity_masks = {
+            name.lower(): 1 << bit for name, bit in session.execute(select(Amenity.name, Amenity.bit))
+        }
+        return snapshot
+
+    def _load_hotels(self, session):
+        query = select(
+            Hotel.id, Hotel.stars, Hotel.name, Address.street, Address.zip, Address.city
+        ).outerjoin(Address, Hotel.address_id == Address.id).order_by(Hotel.id)
+        ids, stars, cities = [], [], []
+        codes = {}
+        for hotel_id, hotel_stars, name, street, zip_code, city in session.execute(query):
+            ids.append(hotel_id)
+            stars.append(hotel_stars or 0)
+            self.hotel_names.append(name)
+            self.hotel_streets.append(_intern(street))
+            self.hotel_zips.append(_intern(zip_code))
+            if city is None:
+                cities.append(-1)
+                continue
+            code = codes.get(city)
+            if code is None:
+                code = codes[city] = len(self.cities)
+                self.cities.append(_intern(city))
+                self._city_codes.setdefault(city.lower(), []).append(code)
+            cities.append(code)
+        self.hotel_ids = _compact_ids(np.array(ids, dtype=np.int64))
+        self.hotel_stars = np.array(stars, dtype=np.int8)
+        self.hotel_cities = np.array(cities, dtype=np.int32)
+
+    def _load_rooms(self, session):
+        query = select(Room.id, Room.hotel_id, Room.max_guests, Room.amenity_mask, Room.price).order_by(Room.id)
+        result = session.execute(query.execution_options(yield_per=self.YIELD_PER))
+        rooms = np.concatenate([np.empty(0, dtype=_ROOM_DTYPE)] + [
+            np.fromiter(map(tuple, partition), dtype=_ROOM_DTYPE, count=len(partition))
+            for partition in result.partitions()
+        ])
+        hotels = np.searchsorted(self.hotel_ids, rooms["hotel_id"])
+        # Zimmer ohne bestehendes Hotel werden weggelassen, wie beim Join in RoomSearchQuery.hotels()
+        known = hotels < len(self.hotel_ids)
+        known[known] = self.hotel_ids[hotels[known]] == rooms["hotel_id"][known]
+        rooms, hotels = rooms[known], hotels[known]
+        self.room_ids = _compact_ids(rooms["id"])
+        self.room_hotels = hotels.astype(np.int32)
+        self.room_max_guests = rooms["max_guests"].copy()
+        self.room_prices = rooms["price"].copy()
+        self.room_amenity_masks = rooms["amenity_mask"].copy()
+        self._by_hotel = np.argsort(self.room_hotels, kind="stable").astype(np.int32)
+        # Nicht begrenzt: Hotels ohne Zimmer am Ende beginnen bei len(room_ids), dem inf-Element in available_hotels
+        self._hotel_starts = np.searchsorted(
+            self.room_hotels[self._by_hotel], np.arange(len(self.hotel_ids))
+        ).astype(np.int32)
+
+    def __len__(self):
+        return len(self.room_ids)
+
+    def memory_bytes(self) -> int:
+        # Spalten und Listen inklusive der (deduplizierten) Texte
+        arrays = [self.hotel_ids, self.hotel_stars, self.hotel_cities, self.room_ids, self.room_hotels,
+                  self.room_max_guests, self.room_prices, self.room_amenity_masks, self._by_hotel, self._hotel_starts]
+        lists = [self.hotel_names, self.hotel_streets, self.hotel_zips, self.cities]
+        texts = {id(text): text for values in lists for text in values if text is not None}
+        return (sum(array.nbytes for array in arrays) + sum(sys.getsizeof(values) for values in lists)
+                + sum(sys.getsizeof(text) for text in texts.values()))
+
+    def amenity_mask(self, amenities):
+        # Bitmaske aller Ausstattungen oder None, wenn eine davon unbekannt ist (wie amenity_conditions: keine Treffer)
+        mask = 0
+        for name in parse_amenities(amenities):
+            bit = self._amenity_masks.get(name.lower())
+            if bit is None:
+                return None
+            mask |= bit
+        return mask
+
+    def room_mask(self, city=None, stars=None, max_guest=None, min_price=None, max_price=None, amenities=None,
+                  hotel_id=None) -> np.ndarray:
+        # Bool-Maske über alle Zimmer, Hotelbedingungen werden pro Hotel ausgewertet und auf die Zimmer übertragen
+        hotel_mask = None
+        if city is not None:
+            hotel_mask = np.isin(self.hotel_cities, self._city_codes.get(city.lower(), []))
+        if stars is not None:
+            hotel_mask = (self.hotel_stars == stars) if hotel_mask is None else hotel_mask & (self.hotel_stars == stars)
+        if hotel_id is not None:
+            by_id = self.hotel_ids == hotel_id
+            hotel_mask = by_id if hotel_mask is None else hotel_mask & by_id
+        mask = np.ones(len(self.room_ids), dtype=bool) if hotel_mask is None else hotel_mask[self.room_hotels]
+        if max_guest is not None:
+            mask &= self.room_max_guests >= max_guest
+        if min_price is not None:
+            mask &= self.room_prices >= min_price
+        if max_price is not None:
+            mask &= self.room_prices <= max_price
+        if amenities:
+            required = self.amenity_mask(amenities)
+            if required is None:
+                mask[:] = False
+            else:
+                mask &= (self.room_amenity_masks & required) == required
+        return mask
+
+    def occupied(self, session, start_date, end_date, candidates: np.ndarray = None) -> np.ndarray:
+        # Bool-Maske der Zimmer mit mindestens einer belegten Nacht im Zeitraum, aus room_night per SQL.
+        # Bei wenigen Kandidaten werden nur deren Nächte gelesen (Range-Scan im Primärschlüssel pro Zimmer).
+        nights = RoomNight.night.between(literal(_as_date(start_date), Date), literal(_as_date(end_date), Date))
+        occupied = np.zeros(len(self.room_ids), dtype=bool)
+        query = select(RoomNight.room_id).where(nights).distinct()
+        if candidates is not None:
+            candidate_ids = self.room_ids[candidates]
+            if not len(candidate_ids):
+                return occupied
+            if len(candidate_ids) <= self.CANDIDATE_FRACTION * len(self.room_ids):
+                ids = func.json_each(literal(json.dumps(candidate_ids.tolist()))).table_valued("value").alias("ids")
+                query = select(RoomNight.room_id).select_from(ids).join(
+                    RoomNight, RoomNight.room_id == ids.c.value
+                ).where(nights).distinct()
+        room_ids = np.fromiter(session.execute(query).scalars(), dtype=np.int64)
+        rows = np.searchsorted(self.room_ids, room_ids)
+        known = rows < len(self.room_ids)
+        known[known] = self.room_ids[rows[known]] == room_ids[known]
+        occupied[rows[known]] = True
+        return occupied
+
+    def available_hotels(self, mask: np.ndarray):
+        # Tupel wie HotelAvailability (id, name, stars, street, zip, city, available_rooms, min_price) nach Hotel-id
+        counts = np.bincount(self.room_hotels[mask], minlength=len(self.hotel_ids))
+        # Hotels ohne Adresse fehlen auch in RoomSearchQuery.hotels() (inner join auf address)
+        counts[self.hotel_cities < 0] = 0
+        prices = np.append(np.where(mask, self.room_prices, np.inf)[self._by_hotel], np.inf)
+        min_prices = np.minimum.reduceat(prices, self._hotel_starts)
+        hotels = np.flatnonzero(counts)
+        return list(zip(
+            self.hotel_ids[hotels].tolist(), [self.hotel_names[i] for i in hotels],
+            self.hotel_stars[hotels].tolist(),
+            [self.hotel_streets[i] for i in hotels], [self.hotel_zips[i] for i in hotels],
+            [self.cities[code] for code in self.hotel_cities[hotels]], counts[hotels].tolist(),
+            min_prices[hotels].tolist()
+        ))
+
+
+class Catalog:
+    '''
+    Hält den aktuellen CatalogSnapshot für alle SearchManager eines Prozesses (thread-sicher) und lädt ihn neu, wenn
+    sich catalog_version geändert hat. Die Version wird bei jeder Suche geprüft, mit check_interval > 0 höchstens
+    alle check_interval Sekunden (Änderungen am Katalog erscheinen dann entsprechend verzögert).
+    '''
+
+    def __init__(self, check_interval: float = 0.0):
+        self.check_interval = check_interval
+        self.loads = 0
+        self._lock = Lock()
+        self._snapshot = None
+        self._checked = 0.0
+
+    def snapshot(self, session) -> CatalogSnapshot:
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked < self.check_interval:
+            return snapshot
+        version = catalog_version(session)
+        if snapshot is None or snapshot.version != version:
+            with self._lock:
+                if self._snapshot is None or self._snapshot.version != version:
+                    self._snapshot = CatalogSnapshot.load(session)
+                    self.loads += 1
+                snapshot = self._snapshot
+        self._checked = now
+        return snapshot
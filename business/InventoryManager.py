@@ -1,17 +1,171 @@
 import tkinter as tk
 from tkinter import messagebox, ttk
 from pathlib import Path
-from sqlalchemy import create_engine, select, update, delete
-from sqlalchemy.orm import sessionmaker, scoped_session, joinedload
+from typing import NamedTuple, Optional
+from sqlalchemy import select, update, delete
+from sqlalchemy.orm import joinedload, selectinload
 from data_access.data_base import init_db
+from data_access.engine_registry import engine_registry
+from data_access.instrumentation import instrument_methods
 from data_models.models import Login, Role, RegisteredGuest, Address, Guest, Hotel, Booking, Room
+from data_models.read_models import BookingRow, booking_rows_query, read_rows
+from business.SearchCache import hotel_city
+from business.UserManager import login_query, role_query, guest_of_query
 import datetime
 
 
+# Statements der Verwaltung, werden vom InventoryManager und vom AsyncInventoryManager gemeinsam verwendet
+def address_query(street, zip_code, city):
+    return select(Address).where(Address.street == street, Address.zip == zip_code, Address.city == city).limit(1)
+
+
+def hotel_query(hotel_id):
+    return select(Hotel).where(Hotel.id == hotel_id)
+
+
+def room_query(room_id):
+    return select(Room).where(Room.id == room_id)
+
+
+def all_bookings_query():
+    return select(Booking)
+
+
+def booking_query(booking_id):
+    return select(Booking).where(Booking.id == booking_id)
+
+
+def booking_dates_query(booking_id):
+    return select(Booking.room_hotel_id, Booking.start_date, Booking.end_date).where(Booking.id == booking_id)
+
+
+def registered_guest_query(email):
+    return select(RegisteredGuest).where(RegisteredGuest.email == email)
+
+
+def guest_bookings_query(guest_id):
+    # Core-Select für BookingRow, die Buchungen werden ohne ORM-Objekte gelesen
+    return booking_rows_query(guest_id=guest_id)
+
+
+def guest_booking_query(guest_id, booking_id):
+    return select(Booking).where(Booking.id == booking_id, Booking.guest_id == guest_id)
+
+
+class BookingListRow(NamedTuple):
+    '''
+    Zeile der Buchungsliste für Administratoren mit Hotel, Zimmer und Gast. Enthält nur Werte, kann also nach dem
+    Schliessen der Session ohne Lazy Loads und DetachedInstanceError verwendet werden.
+    '''
+    id: int
+    room_hotel_id: int
+    hotel_name: str
+    room_number: str
+    room_type: Optional[str]
+    guest_id: int
+    guest_name: str
+    guest_email: Optional[str]
+    guest_address: Optional[str]
+    number_of_guests: int
+    start_date: datetime.date
+    end_date: datetime.date
+    comment: Optional[str]
+
+
+BOOKING_LOADERS = {"joined": joinedload, "selectin": selectinload}
+
+
+def booking_list_loader_options(loader="joined"):
+    # Zimmer -> Hotel und Gast -> Adresse werden mit der Seite geladen. "joined" liest alles mit einer Abfrage
+    # (LEFT OUTER JOINs), "selectin" mit einer Abfrage pro Beziehung (IN über die Schlüssel der Seite).
+    if loader not in BOOKING_LOADERS:
+        raise ValueError(f"unknown loader {loader}, use one of {', '.join(BOOKING_LOADERS)}")
+    load = BOOKING_LOADERS[loader]
+    return load(Booking.room).options(load(Room.hotel)), load(Booking.guest).options(load(Guest.address))
+
+
+def booking_list_query(hotel_id=None, guest_id=None, start_date=None, end_date=None, after_id=None, limit=None,
+                       loader="joined"):
+    # Keyset-Pagination über Booking.id wie hotel_list_query, der Zeitraum filtert Buchungen, die ihn berühren
+    query = select(Booking).options(*booking_list_loader_options(loader))
+    if hotel_id is not None:
+        query = query.where(Booking.room_hotel_id == hotel_id)
+    if guest_id is not None:
+        query = query.where(Booking.guest_id == guest_id)
+    if start_date is not None:
+        query = query.where(Booking.end_date >= start_date)
+    if end_date is not None:
+        query = query.where(Booking.start_date <= end_date)
+    if after_id is not None:
+        query = query.where(Booking.id > after_id)
+    query = query.order_by(Booking.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def booking_list_row(booking):
+    # Greift nur auf Beziehungen zu, die booking_list_loader_options mitlädt
+    room, guest = booking.room, booking.guest
+    address = guest.address
+    return BookingListRow(
+        booking.id, booking.room_hotel_id, room.hotel.name, booking.room_number, room.type, booking.guest_id,
+        f"{guest.firstname} {guest.lastname}", guest.email,
+        f"{address.street}, {address.zip} {address.city}" if address is not None else None,
+        booking.number_of_guests, booking.start_date, booking.end_date, booking.comment
+    )
+
+
+# Schreibaufträge work(session, ...), laufen direkt in der Session des Managers oder im GroupCommitWriter
+def remove_booking(session, booking_id):
+    # Liefert (room_hotel_id, start_date, end_date) der gelöschten Buchung oder None
+    old_booking = session.execute(booking_dates_query(booking_id)).one_or_none()
+    session.execute(delete(Booking).where(Booking.id == booking_id))
+    return old_booking
+
+
+def set_room_price(session, room_id, price):
+    # Liefert die hotel_id des Zimmers oder None, wenn es das Zimmer nicht gibt
+    room = session.execute(room_query(room_id)).scalars().one_or_none()
+    if room is None:
+        return None
+    room.price = price
+    session.flush()
+    return room.hotel_id
+
+
+@instrument_methods
 class InventoryManager:
-    def __init__(self, session):
+    def __init__(self, session, availability_index=None, search_cache=None, group_writer=None):
         self._session = session
         self.user_manager = UserManager(self._session)
+        # Optionaler AvailabilityIndex, wird bei Buchungsänderungen nachgeführt
+        self._availability_index = availability_index
+        # Optionaler SearchCache, betroffene Suchresultate werden nach Änderungen verdrängt
+        self._search_cache = search_cache
+        # Optionaler GroupCommitWriter für Buchungen löschen und Zimmerpreise ändern
+        self._group_writer = group_writer
+
+    def _write(self, session, work, *args):
+        if self._group_writer is not None:
+            return self._group_writer.submit(work, *args).result()
+        result = work(session, *args)
+        session.commit()
+        return result
+
+    def _invalidate_booking(self, session, booking):
+        # booking ist ein Booking-Objekt oder ein Tupel (room_hotel_id, start_date, end_date)
+        if self._search_cache is None or booking is None:
+            return
+        if isinstance(booking, Booking):
+            booking = (booking.room_hotel_id, booking.start_date, booking.end_date)
+        room_hotel_id, start_date, end_date = booking
+        self._search_cache.invalidate_booking(room_hotel_id, hotel_city(session, room_hotel_id), start_date, end_date)
+
+    def _invalidate_hotel(self, session, hotel_id, *old_cities):
+        # Verdrängt Einträge zum Hotel sowie offene Suchen in der aktuellen und den bisherigen Städten
+        if self._search_cache is not None:
+            self._search_cache.invalidate_hotel(hotel_id, hotel_city(session, hotel_id), *old_cities)
 
     def add_hotel(self, name, stars, street, zip_code, city):
         if not self.user_manager.is_admin():
@@ -21,7 +175,7 @@ class InventoryManager:
         session = self._session()
         try:
             # Check if the address already exists
-            address = session.query(Address).filter_by(street=street, zip=zip_code, city=city).first()
+            address = session.execute(address_query(street, zip_code, city)).scalars().first()
 
             # If the address doesn't exist, create a new one
             if not address:
@@ -36,6 +190,7 @@ class InventoryManager:
             new_hotel = Hotel(name=name, stars=stars, address_id=address_id)
             session.add(new_hotel)
             session.commit()
+            self._invalidate_hotel(session, new_hotel.id)
             print(f"Hotel '{name}' erfolgreich hinzugefügt.")
         except Exception as e:
             session.rollback()
@@ -50,8 +205,10 @@ class InventoryManager:
 
         session = self._session()
         try:
+            old_city = hotel_city(session, hotel_id) if self._search_cache is not None else None
             session.execute(delete(Hotel).where(Hotel.id == hotel_id))
             session.commit()
+            self._invalidate_hotel(session, hotel_id, old_city)
             print(f"Hotel mit ID '{hotel_id}' erfolgreich entfernt.")
         except Exception as e:
             session.rollback()
@@ -66,15 +223,16 @@ class InventoryManager:
 
         session = self._session()
         try:
-            hotel = session.execute(select(Hotel).where(Hotel.id == hotel_id)).scalars().one_or_none()
+            hotel = session.execute(hotel_query(hotel_id)).scalars().one_or_none()
             if hotel:
+                old_city = hotel_city(session, hotel_id) if self._search_cache is not None else None
                 if name:
                     hotel.name = name
                 if stars:
                     hotel.stars = stars
                 if street and zip_code and city:
                     # Check if the new address already exists
-                    address = session.query(Address).filter_by(street=street, zip=zip_code, city=city).first()
+                    address = session.execute(address_query(street, zip_code, city)).scalars().first()
 
                     # If the address doesn't exist, create a new one
                     if not address:
@@ -89,6 +247,7 @@ class InventoryManager:
                     hotel.address_id = address_id
 
                 session.commit()
+                self._invalidate_hotel(session, hotel_id, old_city)
                 print(f"Hotel mit ID '{hotel_id}' erfolgreich aktualisiert.")
             else:
                 print(f"Hotel mit ID '{hotel_id}' nicht gefunden.")
@@ -98,15 +257,18 @@ class InventoryManager:
         finally:
             session.close()
 
-    def list_bookings(self):
+    def list_bookings(self, hotel_id=None, guest_id=None, start_date=None, end_date=None, after_id=None, limit=None,
+                      loader="joined"):
+        # Liefert BookingListRow-Zeilen nach id sortiert. Mit limit eine Seite, die nächste beginnt mit
+        # after_id=rows[-1].id. Die Anzahl Abfragen hängt nur vom loader ab, nicht von der Anzahl Buchungen.
         if not self.user_manager.is_admin():
             print("Nur Administratoren können Buchungen anzeigen.")
             return
 
         session = self._session()
         try:
-            bookings = session.execute(select(Booking)).scalars().all()
-            return bookings
+            query = booking_list_query(hotel_id, guest_id, start_date, end_date, after_id, limit, loader)
+            return [booking_list_row(booking) for booking in session.execute(query).scalars()]
         except Exception as e:
             print(f"Fehler beim Abrufen der Buchungen: {e}")
         finally:
@@ -119,8 +281,9 @@ class InventoryManager:
 
         session = self._session()
         try:
-            booking = session.execute(select(Booking).where(Booking.id == booking_id)).scalars().one_or_none()
+            booking = session.execute(booking_query(booking_id)).scalars().one_or_none()
             if booking:
+                old_booking = (booking.room_hotel_id, booking.start_date, booking.end_date)
                 if 'start_date' in kwargs:
                     booking.start_date = kwargs['start_date']
                 if 'end_date' in kwargs:
@@ -130,6 +293,10 @@ class InventoryManager:
                 if 'room_id' in kwargs:
                     booking.room_hotel_id = kwargs['room_id']
                 session.commit()
+                if self._availability_index is not None:
+                    self._availability_index.update_booking(booking)
+                self._invalidate_booking(session, old_booking)
+                self._invalidate_booking(session, booking)
                 print(f"Buchung mit ID '{booking_id}' erfolgreich aktualisiert.")
             else:
                 print(f"Buchung mit ID '{booking_id}' nicht gefunden.")
@@ -146,8 +313,10 @@ class InventoryManager:
 
         session = self._session()
         try:
-            session.execute(delete(Booking).where(Booking.id == booking_id))
-            session.commit()
+            old_booking = self._write(session, remove_booking, booking_id)
+            self._invalidate_booking(session, old_booking)
+            if self._availability_index is not None:
+                self._availability_index.remove(booking_id)
             print(f"Buchung mit ID '{booking_id}' erfolgreich gelöscht.")
         except Exception as e:
             session.rollback()
@@ -158,10 +327,9 @@ class InventoryManager:
     def get_user_bookings(self, email):
         session = self._session()
         try:
-            user = session.query(RegisteredGuest).filter_by(email=email).one_or_none()
+            user = session.execute(registered_guest_query(email)).scalars().one_or_none()
             if user:
-                bookings = session.query(Booking).filter_by(guest_id=user.id).all()
-                return bookings
+                return read_rows(session, BookingRow, guest_bookings_query(user.id))
             else:
                 print(f"Keine Buchungen für die E-Mail {email} gefunden.")
                 return []
@@ -174,15 +342,20 @@ class InventoryManager:
     def update_user_booking(self, email, booking_id, **kwargs):
         session = self._session()
         try:
-            user = session.query(RegisteredGuest).filter_by(email=email).one_or_none()
+            user = session.execute(registered_guest_query(email)).scalars().one_or_none()
             if user:
-                booking = session.query(Booking).filter_by(id=booking_id, guest_id=user.id).one_or_none()
+                booking = session.execute(guest_booking_query(user.id, booking_id)).scalars().one_or_none()
                 if booking:
+                    old_booking = (booking.room_hotel_id, booking.start_date, booking.end_date)
                     if 'start_date' in kwargs:
                         booking.start_date = kwargs['start_date']  # Use date object directly
                     if 'end_date' in kwargs:
                         booking.end_date = kwargs['end_date']  # Use date object directly
                     session.commit()
+                    if self._availability_index is not None:
+                        self._availability_index.update_booking(booking)
+                    self._invalidate_booking(session, old_booking)
+                    self._invalidate_booking(session, booking)
                     print(f"Buchung mit ID '{booking_id}' erfolgreich aktualisiert.")
                 else:
                     print(f"Buchung mit ID '{booking_id}' nicht gefunden oder nicht berechtigt.")
@@ -197,12 +370,17 @@ class InventoryManager:
     def delete_user_booking(self, email, booking_id):
         session = self._session()
         try:
-            user = session.query(RegisteredGuest).filter_by(email=email).one_or_none()
+            user = session.execute(registered_guest_query(email)).scalars().one_or_none()
             if user:
-                booking = session.query(Booking).filter_by(id=booking_id, guest_id=user.id).one_or_none()
+                booking = session.execute(guest_booking_query(user.id, booking_id)).scalars().one_or_none()
                 if booking:
+                    deleted_booking_id = booking.id
+                    old_booking = (booking.room_hotel_id, booking.start_date, booking.end_date)
                     session.delete(booking)
                     session.commit()
+                    self._invalidate_booking(session, old_booking)
+                    if self._availability_index is not None:
+                        self._availability_index.remove(deleted_booking_id)
                     print(f"Buchung mit ID '{booking_id}' erfolgreich gelöscht.")
                 else:
                     print(f"Buchung mit ID '{booking_id}' nicht gefunden oder nicht berechtigt.")
@@ -221,10 +399,9 @@ class InventoryManager:
 
         session = self._session()
         try:
-            room = session.execute(select(Room).where(Room.id == room_id)).scalars().one_or_none()
-            if room:
-                room.price = price
-                session.commit()
+            hotel_id = self._write(session, set_room_price, room_id, price)
+            if hotel_id is not None:
+                self._invalidate_hotel(session, hotel_id)
                 print(f"Preis des Zimmers mit ID '{room_id}' erfolgreich aktualisiert.")
             else:
                 print(f"Zimmer mit ID '{room_id}' nicht gefunden.")
@@ -235,6 +412,7 @@ class InventoryManager:
             session.close()
 
 
+@instrument_methods
 class UserManager:
     def __init__(self, session):
         self._max_attempts = 3
@@ -246,7 +424,7 @@ class UserManager:
         self._attempts_left -= 1
         if self._attempts_left >= 0:
             if self._current_login is None:
-                query = select(Login).options(joinedload(Login.role)).where(Login.username == username).where(Login.password == password)
+                query = login_query(username, password)
                 result = self._session.execute(query).scalars().one_or_none()
                 self._current_login = result
                 return self._current_login
@@ -260,7 +438,7 @@ class UserManager:
         self._current_login = None
 
     def register_guest(self, username, password, firstname, lastname, email, street, zip, city):
-        query = select(Role).where(Role.name == "registered_user")
+        query = role_query("registered_user")
         role = self._session.execute(query).scalars().one()
         try:
             registered_guest = RegisteredGuest(
@@ -277,7 +455,7 @@ class UserManager:
             raise e
 
     def get_guest_of(self, login: Login):
-        query = select(RegisteredGuest).where(RegisteredGuest.login == login)
+        query = guest_of_query(login)
         registered_guest = self._session.execute(query).scalars().one_or_none()
         return registered_guest
 
@@ -507,15 +685,16 @@ class App:
             booking_window = tk.Toplevel(self.root)
             booking_window.title("Bookings")
 
-            booking_list = ttk.Treeview(booking_window, columns=("ID", "Guest ID", "Room ID", "Start Date", "End Date"), show='headings')
+            booking_list = ttk.Treeview(booking_window, columns=("ID", "Guest", "Hotel", "Room", "Start Date", "End Date"), show='headings')
             booking_list.heading("ID", text="Booking ID")
-            booking_list.heading("Guest ID", text="Guest ID")
-            booking_list.heading("Room ID", text="Room ID")
+            booking_list.heading("Guest", text="Guest")
+            booking_list.heading("Hotel", text="Hotel")
+            booking_list.heading("Room", text="Room")
             booking_list.heading("Start Date", text="Start Date")
             booking_list.heading("End Date", text="End Date")
 
-            for booking in bookings:
-                booking_list.insert('', 'end', values=(booking.id, booking.guest_id, booking.room_hotel_id, booking.start_date, booking.end_date))
+            for booking in bookings or []:
+                booking_list.insert('', 'end', values=(booking.id, booking.guest_name, booking.hotel_name, booking.room_number, booking.start_date, booking.end_date))
 
             booking_list.pack(padx=10, pady=10, fill=tk.BOTH, expand=True)
 
@@ -716,9 +895,7 @@ if __name__ == "__main__":
     database_path = Path('../data/database.db')
     if not database_path.is_file():
         init_db(str(database_path), generate_example_data=True)
-    engine = create_engine(f"sqlite:///{database_path}", echo=False)
-
-    session = scoped_session(sessionmaker(bind=engine))
+    session = engine_registry.scoped_session(database_path)
     inventory_manager = InventoryManager(session)
 
     root = tk.Tk()
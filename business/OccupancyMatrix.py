@@ -0,0 +1,152 @@
+from datetime import date, datetime, timedelta
+from itertools import chain
+from threading import RLock
+from typing import NamedTuple
+
+import numpy as np
+from sqlalchemy import select, func, cast, Integer, literal
+
+from data_models.models import Booking, Room
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+class HotelNightCounts(NamedTuple):
+    '''
+    Freie Zimmer pro Hotel und Nacht: free[i, j] gilt für hotel_ids[i] in der Nacht nights[j].
+    '''
+    hotel_ids: np.ndarray
+    nights: np.ndarray
+    free: np.ndarray
+
+
+class OccupancyMatrix:
+    '''
+    Belegung aller Zimmer als NumPy-Matrix rooms × days (uint8, Anzahl Buchungen pro Zimmer und Tag) für
+    Auswertungen über das ganze Portfolio. Die Zeilen sind nach Room.id sortiert, Spalte 0 ist start_date.
+    Wie bei der Überschneidungsprüfung zählen Start- und Enddatum einer Buchung als belegt.
+    refresh() lädt nur Buchungen und Zimmer mit einer grösseren id als beim letzten Laden. Geänderte oder gelöschte
+    Buchungen sieht die Matrix erst nach reload().
+    '''
+    YIELD_PER = 50000
+
+    def __init__(self, start_date: date, days: int = 365):
+        self._lock = RLock()
+        self.start_date = _as_date(start_date)
+        self.days = days
+        self.room_ids = np.empty(0, dtype=np.int64)
+        self.hotel_ids = np.empty(0, dtype=np.int64)
+        self.occupancy = np.zeros((0, days), dtype=np.uint8)
+        self._last_booking_id = 0
+        self._hotel_order = None
+
+    @classmethod
+    def load(cls, session, start_date: date = None, days: int = 365):
+        matrix = cls(start_date or date.today(), days)
+        matrix.reload(session)
+        return matrix
+
+    def reload(self, session):
+        with self._lock:
+            self.room_ids = np.empty(0, dtype=np.int64)
+            self.hotel_ids = np.empty(0, dtype=np.int64)
+            self.occupancy = np.zeros((0, self.days), dtype=np.uint8)
+            self._last_booking_id = 0
+            self.refresh(session)
+
+    def refresh(self, session):
+        # Neue Zimmer werden als Zeilen angehängt, neue Buchungen in die Matrix eingetragen
+        with self._lock:
+            last_room_id = int(self.room_ids[-1]) if len(self.room_ids) else 0
+            query = select(Room.id, Room.hotel_id).where(Room.id > last_room_id).order_by(Room.id)
+            rooms = self._int_rows(session, query)
+            if len(rooms):
+                self.room_ids = np.concatenate([self.room_ids, rooms[:, 0]])
+                self.hotel_ids = np.concatenate([self.hotel_ids, rooms[:, 1]])
+                self.occupancy = np.concatenate(
+                    [self.occupancy, np.zeros((len(rooms), self.days), dtype=np.uint8)]
+                )
+                self._hotel_order = None
+
+            bookings = self._int_rows(session, self._bookings_query())
+            if len(bookings):
+                self._fill(bookings[:, 1], bookings[:, 2], bookings[:, 3])
+                self._last_booking_id = int(bookings[:, 0].max())
+            return len(bookings)
+
+    def _int_rows(self, session, query):
+        # np.fromiter über die Werte statt np.array(rows), mit Row-Objekten ist np.array langsamer als die Abfrage
+        result = session.connection().execute(query.execution_options(yield_per=self.YIELD_PER))
+        values = chain.from_iterable(chain.from_iterable(result.partitions()))
+        return np.fromiter(values, dtype=np.int64).reshape(-1, len(query.selected_columns))
+
+    def _bookings_query(self):
+        # Tage relativ zu start_date direkt in SQL, nur Buchungen, die den Zeitraum der Matrix berühren
+        first_day = func.julianday(literal(self.start_date.isoformat()))
+        last_day = self.start_date + timedelta(days=self.days - 1)
+        return select(
+            Booking.id,
+            Room.id,
+            cast(func.julianday(Booking.start_date) - first_day, Integer),
+            cast(func.julianday(Booking.end_date) - first_day, Integer)
+        ).join(
+            Room, (Room.hotel_id == Booking.room_hotel_id) & (Room.number == Booking.room_number)
+        ).where(
+            Booking.id > self._last_booking_id,
+            Booking.start_date <= last_day,
+            Booking.end_date >= self.start_date
+        )
+
+    def _fill(self, room_ids, first_days, last_days):
+        # Differenzen-Array: +1 am ersten, -1 nach dem letzten Tag, die kumulierte Summe ergibt die Belegung.
+        # Nur für die betroffenen Zimmer, dadurch bleibt ein refresh() mit wenigen neuen Buchungen billig.
+        rows, inverse = np.unique(np.searchsorted(self.room_ids, room_ids), return_inverse=True)
+        first_days = np.clip(first_days, 0, self.days)
+        last_days = np.clip(last_days + 1, 0, self.days)
+        delta = np.zeros((len(rows), self.days + 1), dtype=np.int16)
+        np.add.at(delta, (inverse, first_days), 1)
+        np.add.at(delta, (inverse, last_days), -1)
+        self.occupancy[rows] += np.cumsum(delta, axis=1, dtype=np.int16)[:, :self.days].astype(np.uint8)
+
+    def _day(self, value):
+        day = (_as_date(value) - self.start_date).days
+        if not 0 <= day < self.days:
+            raise ValueError(f"{value} is outside of the matrix ({self.start_date}, {self.days} days)")
+        return day
+
+    def is_free(self, room_id, start_date, end_date):
+        row = np.searchsorted(self.room_ids, room_id)
+        if row == len(self.room_ids) or self.room_ids[row] != room_id:
+            raise KeyError(room_id)
+        with self._lock:
+            return not self.occupancy[row, self._day(start_date):self._day(end_date) + 1].any()
+
+    def free_rooms(self, start_date, end_date) -> np.ndarray:
+        # Zimmer aller Hotels, die an jedem Tag von start_date bis end_date frei sind
+        with self._lock:
+            booked = self.occupancy[:, self._day(start_date):self._day(end_date) + 1].any(axis=1)
+            return self.room_ids[~booked]
+
+    def free_rooms_per_hotel(self, start_date=None, days: int = None) -> HotelNightCounts:
+        # Anzahl freier Zimmer pro Hotel und Nacht, standardmässig über den ganzen Zeitraum der Matrix
+        first = self._day(start_date) if start_date is not None else 0
+        last = first + (days if days is not None else self.days - first)
+        if last > self.days:
+            raise ValueError(f"{days} days from {start_date} exceed the matrix ({self.start_date}, {self.days} days)")
+        with self._lock:
+            if self._hotel_order is None:
+                self._hotel_order = np.argsort(self.hotel_ids, kind="stable")
+            hotel_ids = self.hotel_ids[self._hotel_order]
+            # Zeilen nach Hotel sortiert, reduceat summiert jeden Block eines Hotels
+            boundaries = np.flatnonzero(np.diff(hotel_ids, prepend=hotel_ids[:1] - 1))
+            free = (self.occupancy[self._hotel_order, first:last] == 0).astype(np.int32)
+            counts = np.add.reduceat(free, boundaries, axis=0) if len(boundaries) else free[:0]
+        nights = np.datetime64(self.start_date) + np.arange(first, last)
+        return HotelNightCounts(hotel_ids[boundaries], nights, counts)
+
+    def __len__(self):
+        return len(self.room_ids)
@@ -1,83 +1,276 @@
 from pathlib import Path
+from typing import NamedTuple, Optional
 
-from sqlalchemy import create_engine, select, and_, or_
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import select, insert, exists, func, literal, Date
 
-from datetime import datetime
+from datetime import date, datetime
 import csv
+import json
 import re
 
+from business.SearchCache import hotel_city
 from business.SearchManager import SearchManager
 from business.UserManager import UserManager
-from data_models.models import Booking, Room, Hotel, Guest, RegisteredGuest, Address, Login, Role
+from data_models.models import (
+    Booking, Room, RoomNight, Hotel, Guest, RegisteredGuest, Address, Login, Role, CALENDAR_START, CALENDAR_END
+)
+from data_access.booking_export import COLUMN_NAMES, export_bookings
 from data_access.data_base import init_db
-
-base_directory = Path('Bookings')
-base_directory.mkdir(parents=True, exist_ok=True)
-
-
+from data_access.engine_registry import engine_registry
+from data_access.instrumentation import instrument_methods
+from data_access.write_transaction import run_write_transaction
+
+# Alle gespeicherten Buchungsdetails in einer Datei, eine Zeile pro Buchung (Spalten wie data_access/booking_export.py)
+BOOKING_DETAILS_FILE = Path('Bookings') / 'booking_details.csv'
+
+
+# Statements der Buchungen, werden vom ReservationManager und vom AsyncReservationManager gemeinsam verwendet
+def booking_conflict_query(room_number, room_hotel_id, start_date, end_date):
+    # Ein belegter Tag im Zeitraum genügt, Start- und Enddatum zählen wie bei der Buchung selbst mit.
+    # Als Date gebunden, sonst wird ein datetime als '2024-01-05 00:00:00' verglichen.
+    return select(RoomNight.booking_id).join(Room, Room.id == RoomNight.room_id).where(
+        Room.hotel_id == room_hotel_id,
+        Room.number == room_number,
+        RoomNight.night.between(literal(start_date, Date), literal(end_date, Date))
+    ).limit(1)
+
+
+def booking_by_id_query(booking_id):
+    return select(Booking).where(Booking.id == int(booking_id))
+
+
+class BookingRequest(NamedTuple):
+    '''
+    Eine Buchung für create_bookings, gleiche Felder wie die Parameter von create_booking.
+    '''
+    room_hotel_id: int
+    room_number: str
+    guest_id: int
+    number_of_guests: int
+    start_date: date
+    end_date: date
+    comment: str = ''
+
+
+class BookingResult(NamedTuple):
+    '''
+    Resultat pro Anfrage von create_bookings: booking_id bei Erfolg, sonst die Fehlermeldung in error.
+    '''
+    request: BookingRequest
+    booking_id: Optional[int] = None
+    error: Optional[str] = None
+
+
+def as_booking_request(request):
+    # Akzeptiert BookingRequest, dict mit den Feldnamen oder Tupel in der Reihenfolge von create_booking
+    if isinstance(request, BookingRequest):
+        return request
+    if isinstance(request, dict):
+        return BookingRequest(**request)
+    return BookingRequest(*request)
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def batch_conflict_query(requests):
+    # Alle Anfragen als ein JSON-Parameter, json_each macht daraus eine Tabelle. Pro Anfrage (key = Position in
+    # requests) kommt die room.id (NULL, wenn es das Zimmer nicht gibt) und ob es im Zeitraum schon belegt ist.
+    batch = func.json_each(literal(json.dumps([
+        [request.room_hotel_id, str(request.room_number), _as_date(request.start_date).isoformat(),
+         _as_date(request.end_date).isoformat()]
+        for request in requests
+    ]))).table_valued("key", "value").alias("batch")
+    hotel_id, number, start_date, end_date = (func.json_extract(batch.c.value, f"$[{i}]") for i in range(4))
+    booked = exists(select(RoomNight.room_id).where(
+        RoomNight.room_id == Room.id,
+        RoomNight.night.between(start_date, end_date)
+    ))
+    return select(batch.c.key, Room.id, booked).select_from(batch).outerjoin(
+        Room, (Room.hotel_id == hotel_id) & (Room.number == number)
+    )
+
+
+def check_batch(requests, rows):
+    # Liefert die Positionen der angenommenen Anfragen und die Fehlermeldungen der übrigen.
+    # Überschneiden sich Anfragen im selben Zimmer, gewinnt die frühere.
+    rooms = {key: (room_id, booked) for key, room_id, booked in rows}
+    accepted = []
+    errors = {}
+    accepted_by_room = {}
+    for i, request in enumerate(requests):
+        start_date, end_date = _as_date(request.start_date), _as_date(request.end_date)
+        room_id, booked = rooms.get(i, (None, False))
+        if start_date > end_date or start_date < CALENDAR_START or end_date > CALENDAR_END:
+            errors[i] = "Invalid date range."
+        elif room_id is None:
+            errors[i] = "Room does not exist."
+        elif booked:
+            errors[i] = "Room is not available for the selected dates."
+        else:
+            other = next((j for j, other_start, other_end in accepted_by_room.get(room_id, ())
+                          if other_start <= end_date and other_end >= start_date), None)
+            if other is not None:
+                errors[i] = f"Room is already booked by request {other} of this batch."
+            else:
+                accepted.append(i)
+                accepted_by_room.setdefault(room_id, []).append((i, start_date, end_date))
+    return accepted, errors
+
+
+def booking_values(request):
+    return {
+        "room_hotel_id": request.room_hotel_id,
+        "room_number": request.room_number,
+        "guest_id": request.guest_id,
+        "number_of_guests": request.number_of_guests,
+        "start_date": _as_date(request.start_date),
+        "end_date": _as_date(request.end_date),
+        "comment": request.comment
+    }
+
+
+def book_room(session, room_hotel_id, room_number, guest_id, number_of_guests, start_date, end_date, comment=''):
+    # Prüfen und Einfügen, läuft in einer BEGIN IMMEDIATE Transaktion (run_write_transaction), damit kein anderer
+    # Schreiber dazwischen dasselbe Zimmer buchen kann. Liefert die neue Buchung oder None, wenn das Zimmer belegt ist.
+    if session.execute(booking_conflict_query(room_number, room_hotel_id, start_date, end_date)).first():
+        return None
+    booking = Booking(
+        room_hotel_id=room_hotel_id,
+        room_number=room_number,
+        guest_id=guest_id,
+        number_of_guests=number_of_guests,
+        start_date=start_date,
+        end_date=end_date,
+        comment=comment
+    )
+    session.add(booking)
+    session.flush()
+    return booking
+
+
+def book_rooms(session, requests):
+    # Wie book_room für einen ganzen Batch, liefert die angenommenen Positionen, ihre booking_ids und die Fehler.
+    # Die ids werden wie in data_access/bulk_import.py selbst vergeben: mit RETURNING und sort_by_parameter_order fügt
+    # SQLAlchemy unter SQLite jede Zeile einzeln ein, so bleibt es ein einziges executemany. Das ist sicher, weil
+    # book_rooms unter der Schreibsperre von BEGIN IMMEDIATE läuft.
+    rows = session.execute(batch_conflict_query(requests)).all()
+    accepted, errors = check_batch(requests, rows)
+    booking_ids = []
+    if accepted:
+        next_id = session.execute(select(func.coalesce(func.max(Booking.id), 0) + 1)).scalar()
+        booking_ids = list(range(next_id, next_id + len(accepted)))
+        session.execute(insert(Booking), [
+            dict(booking_values(requests[i]), id=booking_id) for i, booking_id in zip(accepted, booking_ids)
+        ])
+    return accepted, booking_ids, errors
+
+
+def batch_results(requests, accepted, booking_ids, errors):
+    booking_ids = dict(zip(accepted, booking_ids))
+    return [BookingResult(request, booking_ids.get(i), errors.get(i)) for i, request in enumerate(requests)]
+
+
+@instrument_methods
 class ReservationManager:
-    def __init__(self, session):
+    def __init__(self, session, availability_index=None, search_cache=None, write_queue=None, group_writer=None):
         self.session = session
+        # Optionaler AvailabilityIndex, damit Verfügbarkeitsprüfungen ohne Datenbankzugriff auskommen
+        self._availability_index = availability_index
+        # Optionaler SearchCache, betroffene Suchresultate werden nach einer neuen Buchung verdrängt
+        self._search_cache = search_cache
+        # Optionale WriteQueue, serialisiert die Buchungen aller Threads eines Prozesses (engine_registry.write_queue)
+        self._write_queue = write_queue
+        # Optionaler GroupCommitWriter, Buchungen werden dann im Writer-Thread mit anderen zusammen committet
+        self._group_writer = group_writer
 
     def is_room_available(self, room_number, room_hotel_id, start_date, end_date):
         # Überprüft, ob das Zimmer im angegebenen Zeitraum im angegebenen Hotel verfügbar ist
-        bookings = self.session.query(Booking).filter(
-            and_(
-                Booking.room_number == room_number,
-                Booking.room_hotel_id == room_hotel_id,
-                or_(
-                    and_(Booking.start_date <= start_date, Booking.end_date >= start_date),
-                    and_(Booking.start_date <= end_date, Booking.end_date >= end_date),
-                    and_(Booking.start_date >= start_date, Booking.end_date <= end_date)
-                )
-            )
-        ).all()
-        return len(bookings) == 0
+        if self._availability_index is not None:
+            return self._availability_index.is_available(room_hotel_id, room_number, start_date, end_date)
+
+        booking = self.session.execute(booking_conflict_query(room_number, room_hotel_id, start_date, end_date)).first()
+        return booking is None
+
+    def _write(self, work, *args):
+        # Mit GroupCommitWriter im Writer-Thread, sonst direkt in einer eigenen Schreibtransaktion dieser Session
+        if self._group_writer is not None:
+            return self._group_writer.submit(work, *args).result()
+        return run_write_transaction(self.session, lambda session: work(session, *args), self._write_queue)
 
     def create_booking(self, room_hotel_id, room_number, guest_id, number_of_guests, start_date, end_date, comment=''):
         # User Story 1.3: Erstellt eine Buchung, wenn das Zimmer verfügbar ist
         #start_date = datetime.strptime(start_date, '%Y-%m-%d')
         #end_date = datetime.strptime(end_date, '%Y-%m-%d')
-        if self.is_room_available(room_number, room_hotel_id, start_date, end_date):
-            new_booking = Booking(
-                room_hotel_id=room_hotel_id,
-                room_number=room_number,
-                guest_id=guest_id,
-                number_of_guests=number_of_guests,
-                start_date=start_date,
-                end_date=end_date,
-                comment=comment
-            )
-            self.session.add(new_booking)
-            self.session.commit()
-            return f"Booking successfully created with ID: {new_booking.id}"
-        else:
+        # Der AvailabilityIndex weist belegte Zimmer ohne Schreibsperre ab, verbindlich ist die Prüfung beim Schreiben
+        if self._availability_index is not None and \
+                not self._availability_index.is_available(room_hotel_id, room_number, start_date, end_date):
+            return "Room is not available for the selected dates."
+
+        new_booking = self._write(book_room, room_hotel_id, room_number, guest_id, number_of_guests, start_date,
+                                  end_date, comment)
+        if new_booking is None:
             return "Room is not available for the selected dates."
+        if self._availability_index is not None:
+            self._availability_index.add_booking(new_booking)
+        if self._search_cache is not None:
+            self._search_cache.invalidate_booking(
+                room_hotel_id, hotel_city(self.session, room_hotel_id), start_date, end_date
+            )
+        return f"Booking successfully created with ID: {new_booking.id}"
+
+    def create_bookings(self, requests):
+        # Viele Buchungen auf einmal (Gruppenreservationen, Importe): eine Abfrage für alle Konflikte, ein
+        # executemany für alle angenommenen Buchungen und ein Commit. Liefert ein BookingResult pro Anfrage.
+        requests = [as_booking_request(request) for request in requests]
+        if not requests:
+            return []
+
+        accepted, booking_ids, errors = self._write(book_rooms, requests)
+
+        cities = {}
+        for i, booking_id in zip(accepted, booking_ids):
+            request = requests[i]
+            if self._availability_index is not None:
+                self._availability_index.add(booking_id, request.room_hotel_id, request.room_number,
+                                             request.start_date, request.end_date)
+            if self._search_cache is not None:
+                if request.room_hotel_id not in cities:
+                    cities[request.room_hotel_id] = hotel_city(self.session, request.room_hotel_id)
+                self._search_cache.invalidate_booking(
+                    request.room_hotel_id, cities[request.room_hotel_id], request.start_date, request.end_date
+                )
+        return batch_results(requests, accepted, booking_ids, errors)
 
     def save_booking_details(self, booking):
-        # User Story 1.5: Speichert die Buchungsdetails in einer CSV-Datei
+        # User Story 1.5: Speichert die Buchungsdetails in einer CSV-Datei. Die Buchung wird an BOOKING_DETAILS_FILE
+        # angehängt statt in eine eigene Datei pro Buchung geschrieben, für viele Buchungen siehe export_bookings.
         if booking:
-            booking_details = [
-                ["booking_id", booking.id],
-                ["room_hotel_id", booking.room_hotel_id],
-                ["room_number", booking.room_number],
-                ["guest_id", booking.guest_id],
-                ["number_of_guests", booking.number_of_guests],
-                ["start_date", booking.start_date.strftime('%Y-%m-%d')],
-                ["end_date", booking.end_date.strftime('%Y-%m-%d')],
-                ["comment", booking.comment]
-            ]
-            file_path = base_directory / f'booking_{booking.id}_details.csv'
-            with open(file_path, 'w', newline='') as file:
+            file_path = BOOKING_DETAILS_FILE
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            new_file = not file_path.is_file()
+            with open(file_path, 'a', newline='', encoding='utf-8') as file:
                 writer = csv.writer(file)
-                writer.writerows(booking_details)
+                if new_file:
+                    writer.writerow(COLUMN_NAMES)
+                writer.writerow([
+                    booking.id, booking.room_hotel_id, booking.room_number, booking.guest_id, booking.number_of_guests,
+                    booking.start_date.strftime('%Y-%m-%d'), booking.end_date.strftime('%Y-%m-%d'), booking.comment
+                ])
             return f"Booking details saved to CSV file at {file_path}."
         return "No booking found with the given ID."
 
+    def export_bookings(self, path, file_format=None, compression=None, start_date=None, end_date=None,
+                        hotel_ids=None):
+        # Alle Buchungen (optional gefiltert) in eine Datei, gestreamt in Blöcken, liefert die Anzahl Buchungen
+        return export_bookings(self.session, path, file_format, compression, start_date, end_date, hotel_ids)
+
     def get_booking_by_id(self, booking_id):
         # Methode, um eine Buchung anhand ihrer ID zu holen
-        return self.session.query(Booking).filter_by(id=int(booking_id)).first()
+        return self.session.execute(booking_by_id_query(booking_id)).scalars().first()
 
     def create_guest(self, firstname, lastname, email):
         new_address = Address(street=street, zip=zip, city=city)
@@ -113,10 +306,10 @@ if __name__ == "__main__":
     database_path = Path(db_file)
     if not database_path.is_file():
         init_db(db_file, generate_example_data=True)
-    session = scoped_session(sessionmaker(bind=create_engine(f"sqlite:///{database_path}", echo=False)))
+    session = engine_registry.scoped_session(database_path)
 
     Session = session()
-    reservation_manager = ReservationManager(session)
+    reservation_manager = ReservationManager(session, write_queue=engine_registry.write_queue(database_path))
     search_manager = SearchManager(session)
     user_manager = UserManager(reservation_manager.session)
 
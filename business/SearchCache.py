@@ -0,0 +1,271 @@
+import pickle
+import time
+from collections import OrderedDict
+from datetime import datetime
+from threading import Lock
+from typing import NamedTuple, Optional, FrozenSet
+
+from sqlalchemy import select, delete, update, insert, func, or_, and_
+from sqlalchemy import MetaData, Table, Column, String, Integer, Float, Date, LargeBinary, Index
+
+from data_access.data_base import create_db_engine
+from data_models.models import Hotel, Address
+
+
+class CacheTags(NamedTuple):
+    '''
+    Wovon ein Cache-Eintrag abhängt. city und hotel_id schränken die Suche ein (None = alle), start_date/end_date
+    ist der gesuchte Zeitraum (beide None = Resultat hängt nicht von Buchungen ab), hotel_ids sind die Hotels im
+    Resultat.
+    '''
+    city: Optional[str] = None
+    hotel_id: Optional[int] = None
+    start_date: Optional[object] = None
+    end_date: Optional[object] = None
+    hotel_ids: FrozenSet[int] = frozenset()
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+
+def _normalize_city(city):
+    # Gleiche Normalisierung wie die Suche selbst (func.lower(Address.city) == city.lower())
+    return city.lower() if city is not None else None
+
+
+def make_key(method, **params):
+    # Parameter normalisieren, damit z.B. "Olten" und "olten" oder date und datetime denselben Eintrag treffen
+    normalized = []
+    for name, value in sorted(params.items()):
+        if value is None:
+            continue
+        if name == "city":
+            value = _normalize_city(value)
+        normalized.append((name, _as_date(value)))
+    return f"{method}{tuple(normalized)!r}"
+
+
+def hotel_city(session, hotel_id):
+    query = select(Address.city).join(Hotel, Hotel.address_id == Address.id).where(Hotel.id == hotel_id)
+    return _normalize_city(session.execute(query).scalar_one_or_none())
+
+
+def _affected_by_booking(tags: CacheTags, hotel_id, city, start_date, end_date):
+    if tags.start_date is None and tags.end_date is None:
+        return False
+    # Ein Eintrag mit nur einem Datum (z.B. aus einer älteren Cache-Datei) ist von jeder Buchung betroffen
+    overlaps = (tags.start_date is None or tags.end_date is None
+                or (tags.start_date <= end_date and tags.end_date >= start_date))
+    return (
+        overlaps
+        and (tags.city is None or tags.city == city)
+        and (tags.hotel_id is None or tags.hotel_id == hotel_id)
+    )
+
+
+def _affected_by_hotel(tags: CacheTags, hotel_id, cities):
+    return (
+        tags.hotel_id == hotel_id
+        or hotel_id in tags.hotel_ids
+        or (tags.hotel_id is None and (tags.city is None or tags.city in cities))
+    )
+
+
+class MemoryCacheBackend:
+    '''
+    Cache im Prozess mit LRU- und TTL-Verdrängung.
+    '''
+
+    def __init__(self, max_entries: int = 1024):
+        self._max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, tags, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, value, tags: CacheTags, ttl: float):
+        with self._lock:
+            self._entries[key] = (value, tags, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def _evict(self, affected):
+        with self._lock:
+            keys = [key for key, (_, tags, _) in self._entries.items() if affected(tags)]
+            for key in keys:
+                del self._entries[key]
+            return len(keys)
+
+    def invalidate_booking(self, hotel_id, city, start_date, end_date):
+        return self._evict(lambda tags: _affected_by_booking(tags, hotel_id, city, start_date, end_date))
+
+    def invalidate_hotel(self, hotel_id, cities):
+        return self._evict(lambda tags: _affected_by_hotel(tags, hotel_id, cities))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SqliteCacheBackend:
+    '''
+    Cache in einer eigenen SQLite-Datei, den mehrere Worker-Prozesse gemeinsam nutzen können.
+    Die Werte werden mit pickle gespeichert, die Tags als Spalten, damit die Invalidierung in SQL erfolgt.
+    '''
+    _metadata = MetaData()
+    _table = Table(
+        "search_cache", _metadata,
+        Column("key", String, primary_key=True),
+        Column("value", LargeBinary),
+        Column("city", String, nullable=True),
+        Column("hotel_id", Integer, nullable=True),
+        Column("start_date", Date, nullable=True),
+        Column("end_date", Date, nullable=True),
+        Column("hotel_ids", String),
+        Column("expires_at", Float),
+        Column("accessed_at", Float),
+        Index("ix_search_cache_accessed_at", "accessed_at"),
+    )
+
+    def __init__(self, file_path: str, max_entries: int = 10000):
+        self._max_entries = max_entries
+        # WAL erlaubt parallele Leser neben einem Schreiber aus einem anderen Prozess
+        self._engine = create_db_engine(file_path, {"journal_mode": "WAL", "synchronous": "NORMAL"},
+                                        connect_args={"timeout": 30})
+        self._metadata.create_all(self._engine)
+
+    def get(self, key):
+        table = self._table
+        now = time.time()
+        with self._engine.begin() as connection:
+            row = connection.execute(
+                select(table.c.value, table.c.expires_at).where(table.c.key == key)
+            ).one_or_none()
+            if row is None:
+                return None
+            if row.expires_at < now:
+                connection.execute(delete(table).where(table.c.key == key))
+                return None
+            connection.execute(update(table).where(table.c.key == key).values(accessed_at=now))
+        return pickle.loads(row.value), None, row.expires_at
+
+    def set(self, key, value, tags: CacheTags, ttl: float):
+        table = self._table
+        now = time.time()
+        row = {
+            "key": key,
+            "value": pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL),
+            "city": tags.city,
+            "hotel_id": tags.hotel_id,
+            "start_date": tags.start_date,
+            "end_date": tags.end_date,
+            "hotel_ids": "," + ",".join(str(hotel_id) for hotel_id in sorted(tags.hotel_ids)) + ",",
+            "expires_at": now + ttl,
+            "accessed_at": now,
+        }
+        with self._engine.begin() as connection:
+            connection.execute(insert(table).prefix_with("OR REPLACE"), row)
+            connection.execute(delete(table).where(table.c.expires_at < now))
+            overflow = connection.execute(select(func.count()).select_from(table)).scalar_one() - self._max_entries
+            if overflow > 0:
+                oldest = select(table.c.key).order_by(table.c.accessed_at).limit(overflow)
+                connection.execute(delete(table).where(table.c.key.in_(oldest)))
+
+    def _evict(self, condition):
+        with self._engine.begin() as connection:
+            return connection.execute(delete(self._table).where(condition)).rowcount
+
+    def invalidate_booking(self, hotel_id, city, start_date, end_date):
+        c = self._table.c
+        return self._evict(and_(
+            or_(c.start_date.is_not(None), c.end_date.is_not(None)),
+            or_(c.start_date.is_(None), c.end_date.is_(None), and_(c.start_date <= end_date, c.end_date >= start_date)),
+            or_(c.city.is_(None), c.city == city),
+            or_(c.hotel_id.is_(None), c.hotel_id == hotel_id)
+        ))
+
+    def invalidate_hotel(self, hotel_id, cities):
+        c = self._table.c
+        return self._evict(or_(
+            c.hotel_id == hotel_id,
+            c.hotel_ids.like(f"%,{hotel_id},%"),
+            and_(c.hotel_id.is_(None), or_(c.city.is_(None), c.city.in_(list(cities))))
+        ))
+
+    def clear(self):
+        with self._engine.begin() as connection:
+            connection.execute(delete(self._table))
+
+    def __len__(self):
+        with self._engine.connect() as connection:
+            return connection.execute(select(func.count()).select_from(self._table)).scalar_one()
+
+
+class SearchCache:
+    '''
+    Cache für Suchresultate des SearchManager mit Zählern für Treffer und Fehlzugriffe.
+    Neue oder geänderte Buchungen verdrängen nur Einträge mit überlappendem Zeitraum in derselben Stadt,
+    Änderungen an Hotels und Zimmern nur Einträge, die das Hotel enthalten oder neu enthalten könnten.
+    '''
+
+    def __init__(self, backend=None, ttl: float = 300):
+        self._backend = backend if backend is not None else MemoryCacheBackend()
+        self._ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_load(self, key, loader, tags: CacheTags, result_hotel_ids=None):
+        entry = self._backend.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        value = loader()
+        if result_hotel_ids is not None and value:
+            tags = tags._replace(hotel_ids=frozenset(result_hotel_ids(value)))
+        start_date, end_date = _as_date(tags.start_date), _as_date(tags.end_date)
+        if start_date is None or end_date is None:
+            # Ohne vollständigen Zeitraum filtert die Suche keine belegten Zimmer (RoomSearchQuery.has_date_range)
+            start_date = end_date = None
+        tags = tags._replace(
+            city=_normalize_city(tags.city),
+            hotel_id=int(tags.hotel_id) if tags.hotel_id is not None else None,
+            start_date=start_date,
+            end_date=end_date
+        )
+        self._backend.set(key, value, tags, self._ttl)
+        return value
+
+    def invalidate_booking(self, hotel_id, city, start_date, end_date):
+        self.evictions += self._backend.invalidate_booking(
+            int(hotel_id), _normalize_city(city), _as_date(start_date), _as_date(end_date)
+        )
+
+    def invalidate_hotel(self, hotel_id, *cities):
+        self.evictions += self._backend.invalidate_hotel(
+            int(hotel_id), {_normalize_city(city) for city in cities if city is not None}
+        )
+
+    def clear(self):
+        self._backend.clear()
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._backend)}
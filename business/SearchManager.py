@@ -1,159 +1,430 @@
+import re
 from pathlib import Path
-from sqlalchemy import create_engine, select, func, and_, or_, not_
-from sqlalchemy.orm import sessionmaker, scoped_session, aliased
+from typing import NamedTuple, Optional
+from sqlalchemy import select, func, and_, exists, table, column, literal, literal_column, Date, inspect
+from sqlalchemy.orm import Session, joinedload
 import tkinter as tk
 from tkinter import ttk, messagebox
-from datetime import datetime, timedelta
+from datetime import datetime
 from data_models.models import *
 from data_access.data_base import init_db
+from data_access.engine_registry import engine_registry
+from data_access.full_text_index import FULL_TEXT_TABLE
+from data_access.instrumentation import instrument_methods
+from business.SearchCache import SearchCache, CacheTags, make_key
+from business.CatalogSnapshot import Catalog
+
+
+class HotelAvailability(NamedTuple):
+    '''
+    Suchresultat pro Hotel mit Anzahl verfügbarer Zimmer und dem günstigsten Zimmerpreis.
+    '''
+    id: int
+    name: str
+    stars: int
+    street: str
+    zip: str
+    city: str
+    available_rooms: int
+    min_price: Optional[float]
+
+
+class HotelListRow(NamedTuple):
+    '''
+    Zeile der Hotelliste (gui.hotel_search) mit Anzahl Zimmer und fertig zusammengesetzter Adresse.
+    '''
+    id: int
+    name: str
+    number_of_rooms: int
+    address: Optional[str]
+
+
+class FullTextMatch(NamedTuple):
+    '''
+    Treffer der Volltextsuche pro Zimmer, rank ist der bm25-Wert von FTS5 (kleiner = besser).
+    '''
+    hotel_id: int
+    hotel_name: str
+    city: str
+    room_id: int
+    room_number: str
+    room_type: Optional[str]
+    description: Optional[str]
+    amenities: Optional[str]
+    price: float
+    rank: float
+
+
+class RoomSearchQuery:
+    '''
+    Baut die Abfragen für Zimmer- und Hotelsuchen aus den gesetzten Suchkriterien zusammen.
+    Jede Bedingung wird nur angehängt, wenn das Kriterium angegeben ist. Belegte Zimmer kommen aus room_night, ohne
+    Zeitraum wird diese Tabelle gar nicht abgefragt. Hotel und Adresse werden nur gejoint, wenn nach Sternen oder Stadt
+    gefiltert wird.
+    amenities ist eine Liste von Ausstattungen, die ein Zimmer alle haben muss (bitweises AND auf Room.amenity_mask).
+    min_price und max_price begrenzen den Zimmerpreis (jeweils inklusive).
+    '''
+
+    def __init__(self, city=None, start_date=None, end_date=None, max_guest=None, stars=None, hotel_id=None,
+                 amenities=None, min_price=None, max_price=None):
+        self.city = city
+        self.start_date = start_date
+        self.end_date = end_date
+        self.max_guest = max_guest
+        self.stars = stars
+        self.hotel_id = hotel_id
+        self.amenities = parse_amenities(amenities)
+        self.min_price = min_price
+        self.max_price = max_price
+
+    def has_date_range(self):
+        return self.start_date is not None and self.end_date is not None
+
+    def conditions(self):
+        conditions = []
+        if self.city is not None:
+            conditions.append(func.lower(Address.city) == self.city.lower())
+        if self.stars is not None:
+            conditions.append(Hotel.stars == self.stars)
+        if self.hotel_id is not None:
+            conditions.append(Room.hotel_id == self.hotel_id)
+        if self.max_guest is not None:
+            conditions.append(Room.max_guests >= self.max_guest)
+        if self.min_price is not None:
+            conditions.append(Room.price >= self.min_price)
+        if self.max_price is not None:
+            conditions.append(Room.price <= self.max_price)
+        if self.amenities:
+            conditions.extend(self.amenity_conditions())
+        if self.has_date_range():
+            conditions.append(~exists(self.booked()))
+        return conditions
+
+    def amenity_conditions(self):
+        # Die Maske wird in SQL aus der Tabelle amenity bestimmt, ein unbekannter Name ergibt keine Treffer
+        names = amenity_keys(self.amenities)
+        wanted = func.lower(Amenity.name).in_(names)
+        required = select(func.sum(Amenity.mask)).where(wanted).scalar_subquery()
+        known = select(func.count(Amenity.id)).where(wanted).scalar_subquery()
+        return [known == len(names), Room.amenity_mask.op("&")(required) == required]
+
+    def booked(self):
+        # Korrelierte Unterabfrage: ein belegter Tag des Zimmers im Zeitraum (Range-Scan im Primärschlüssel).
+        # Als Date gebunden, sonst wird ein datetime der Konsolen-UIs als '2024-01-05 00:00:00' verglichen.
+        return select(RoomNight.room_id).where(
+            RoomNight.room_id == Room.id,
+            RoomNight.night.between(literal(self.start_date, Date), literal(self.end_date, Date))
+        )
 
+    def rooms(self):
+        query = select(Room)
+        if self.city is not None or self.stars is not None:
+            query = query.join(Hotel, Room.hotel_id == Hotel.id)
+        if self.city is not None:
+            query = query.join(Address, Hotel.address_id == Address.id)
+        return query.where(*self.conditions())
+
+    def hotels(self):
+        # Ein einziges Statement: Zimmer filtern und pro Hotel gruppieren
+        return select(
+            Hotel.id,
+            Hotel.name,
+            Hotel.stars,
+            Address.street,
+            Address.zip,
+            Address.city,
+            func.count(Room.id).label("available_rooms"),
+            func.min(Room.price).label("min_price")
+        ).select_from(Room).join(
+            Hotel, Room.hotel_id == Hotel.id
+        ).join(
+            Address, Hotel.address_id == Address.id
+        ).where(*self.conditions()).group_by(
+            Hotel.id, Hotel.name, Hotel.stars, Address.street, Address.zip, Address.city
+        ).order_by(Hotel.id)
+
+
+def amenity_keys(amenities):
+    # Normalisierte Namen für Abfragen und Cache-Keys
+    return tuple(sorted(name.lower() for name in parse_amenities(amenities)))
+
+
+# Statements der Suchen, werden vom SearchManager und vom AsyncSearchManager gemeinsam verwendet
+def available_hotel_objects_query(city=None, start_date=None, end_date=None, max_guest=None, stars=None,
+                                  amenities=None):
+    hotel_ids = RoomSearchQuery(
+        city, start_date, end_date, max_guest, stars, amenities=amenities
+    ).hotels().with_only_columns(Hotel.id)
+    return select(Hotel).options(joinedload(Hotel.address)).where(Hotel.id.in_(hotel_ids)).order_by(Hotel.id)
+
+
+def hotel_list_query(name=None, after_id=None, limit=None):
+    # Keyset-Pagination über Hotel.id: die nächste Seite beginnt nach der letzten id der vorherigen
+    number_of_rooms = select(func.count(Room.id)).where(Room.hotel_id == Hotel.id).scalar_subquery()
+    query = select(
+        Hotel.id,
+        Hotel.name,
+        number_of_rooms.label("number_of_rooms"),
+        (Address.street + ", " + Address.zip + " " + Address.city).label("address")
+    ).outerjoin(Address, Hotel.address_id == Address.id)
+    if name:
+        query = query.where(func.lower(Hotel.name).like(f"%{name.lower()}%"))
+    if after_id is not None:
+        query = query.where(Hotel.id > after_id)
+    query = query.order_by(Hotel.id)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+search_fts = table(FULL_TEXT_TABLE, column("rowid"), column("rank"))
+
+
+def full_text_match_expression(text):
+    # Jedes Wort als Präfix in Anführungszeichen, dadurch werden Operatoren wie OR, NEAR oder "-" nicht ausgewertet
+    return " ".join(f'"{word}"*' for word in re.findall(r"\w+", text))
+
+
+def full_text_search_query(text, limit=20):
+    # Zuerst die besten Treffer im FTS-Index, erst danach werden Zimmer, Hotel und Adresse dazu gejoint
+    matches = select(search_fts.c.rowid, search_fts.c.rank).where(
+        literal_column(FULL_TEXT_TABLE).op("MATCH")(full_text_match_expression(text))
+    ).order_by(search_fts.c.rank).limit(limit).subquery()
+    return select(
+        Hotel.id,
+        Hotel.name,
+        Address.city,
+        Room.id,
+        Room.number,
+        Room.type,
+        Room.description,
+        Room.amenities,
+        Room.price,
+        matches.c.rank
+    ).select_from(matches).join(
+        Room, Room.id == matches.c.rowid
+    ).join(
+        Hotel, Room.hotel_id == Hotel.id
+    ).join(
+        Address, Hotel.address_id == Address.id
+    ).order_by(matches.c.rank, Room.id)
+
+
+def room_details_query(room_id):
+    return select(Room).where(Room.id == room_id).limit(1)
+
+
+def room_details(room):
+    return {
+        "number": room.number,
+        "type": room.type,
+        "max_guests": room.max_guests,
+        "description": room.description,
+        "amenities": room.amenities,
+        "price": room.price
+    }
+
+
+def rooms_by_hotel_query(hotel_id, max_guest):
+    return select(
+        Room.number,
+        Room.type,
+        Room.max_guests,
+        Room.description,
+        Room.amenities,
+        Room.price
+    ).where(
+        and_(
+            Room.hotel_id == hotel_id,
+            Room.max_guests >= max_guest
+        )
+    )
 
-class SearchManager:
-    def __init__(self, session):
-        self._session = session
 
-    def search_hotels_by_city_date_guests_stars(self, city=None, start_date=None, end_date=None, max_guest=None, stars=None):
-        # Aliase für die Tabellen
-        HotelAlias = aliased(Hotel, name='hotel_alias')
-        AddressAlias = aliased(Address, name='address_alias')
-        RoomAlias = aliased(Room, name='room_alias')
-        BookingAlias = aliased(Booking, name='booking_alias')
-
-        # Hauptabfrage für Hotels
-        query = select(HotelAlias).distinct()
-
-        if stars is not None:
-            query = query.where(HotelAlias.stars == stars)
-        if city is not None:
-            query = query.join(AddressAlias).where(func.lower(AddressAlias.city) == city.lower())
-
-        #Test der ersten Query
-        # test_query = self._session.execute(query).scalars().all()
-        # print(f"Resultat der ersten Test-Query: {test_query}")
-
-        if start_date is not None:
-            # Subquery für gebuchte Räume
-            subquery_booked_rooms = select(RoomAlias.id).join(BookingAlias).where(
-                or_(
-                    BookingAlias.start_date.between(start_date - timedelta(hours=1), end_date + timedelta(hours=1)),
-                    BookingAlias.end_date.between(start_date - timedelta(hours=1), end_date + timedelta(hours=1)),
-                    and_(BookingAlias.start_date < start_date, BookingAlias.end_date > end_date)
-                )
-            )
-        else:
-            subquery_booked_rooms = select(RoomAlias.id).join(BookingAlias).where(RoomAlias.id == 998877665544)
+def room_row_dict(room):
+    return {
+        "Room Number": room[0],
+        "Type": room[1],
+        "Max Guests": room[2],
+        "Description": room[3],
+        "Amenities": room[4],
+        "Price": room[5]
+    }
 
-        # Hauptabfrage für verfügbare Räume
-        available_rooms_query = select(RoomAlias).join(HotelAlias).where(not_(RoomAlias.id.in_(subquery_booked_rooms)))
 
-        if max_guest is not None:
-            available_rooms_query = available_rooms_query.where(RoomAlias.max_guests >= max_guest)
+def hotels_by_name_query(name):
+    return select(Hotel).where(Hotel.name == name)
 
-        if city is not None:
-            available_rooms_query = available_rooms_query.join(AddressAlias).where(
-                func.lower(AddressAlias.city) == city.lower())
 
-        if stars is not None:
-            available_rooms_query = available_rooms_query.where(HotelAlias.stars >= stars)
+def all_hotels_query():
+    return select(Hotel)
 
-        # Execute the query and get available rooms
-        available_rooms = self._session.execute(available_rooms_query).scalars().all()
-        # print(f"Available rooms: {available_rooms}")
 
-        # Get unique hotels with available rooms
-        hotel_ids_with_available_rooms = {room.hotel_id for room in available_rooms}
-        #Test 3
-        # print(f"Test 3: {hotel_ids_with_available_rooms}")
+def print_hotels(hotels):
+    if hotels:
+        for h in hotels:
+            print(f"ID: {h.id} - {h.name} - {h.stars} Sterne - {h.address.street}, {h.address.zip} {h.address.city}")
+    else:
+        print("There are no available hotels matching given criteria.")
 
-        # Filter the hotels query to only include hotels with available rooms
-        if hotel_ids_with_available_rooms:
-            query = query.where(HotelAlias.id.in_(hotel_ids_with_available_rooms))
-            # Execute the query and return the results
-            hotels_with_available_rooms = self._session.execute(query).scalars().all()
 
-            for h in hotels_with_available_rooms:
-                print(
-                    f"ID: {h.id} - {h.name} - {h.stars} Sterne - {h.address.street}, {h.address.zip} {h.address.city}")
+def _hotel_ids_of_hotels(hotels):
+    return (hotel.id for hotel in hotels)
 
-            return hotels_with_available_rooms
-        else:
-            print("There are no available hotels matching given criteria.")
 
+def _hotel_ids_of_rooms(rooms):
+    return (room.hotel_id for room in rooms)
 
 
-    def search_rooms_by_availability(self, start_date: datetime, end_date: datetime, hotel: Hotel = None, max_guest = None):
-        query = select(Room)
+@instrument_methods
+class SearchManager:
+    def __init__(self, session, cache: SearchCache = None, catalog: Catalog = None):
+        self._session = session
+        # Optionaler SearchCache, ohne Cache wird jede Suche direkt auf der Datenbank ausgeführt
+        self._cache = cache
+        # Optionaler Catalog: search_available_hotels filtert dann im Speicher, nur belegte Zimmer kommen aus SQL
+        self._catalog = catalog
+
+    def _cached(self, method, loader, tags=CacheTags(), result_hotel_ids=None, orm=False, **params):
+        # Loader für ORM-Objekte (orm=True) bekommen die Session, in der sie laden sollen
+        if self._cache is None:
+            return loader(self._session) if orm else loader()
+        if not orm:
+            return self._cache.get_or_load(make_key(method, **params), loader, tags, result_hotel_ids)
+        result = self._cache.get_or_load(
+            make_key(method, **params), lambda: self._load_detached(loader), tags, result_hotel_ids
+        )
+        return [self._attach(obj) for obj in result]
+
+    def _attach(self, obj):
+        # Kopie an die aktuelle Session binden: merge(load=False) übernimmt die geladenen Attribute ohne SQL,
+        # Lazy Loads funktionieren weiterhin und das Objekt im Cache bleibt unverändert.
+        # Ungespeicherte Änderungen in der Session werden nicht mit dem Stand aus dem Cache überschrieben.
+        existing = self._session.identity_map.get(inspect(obj).identity_key)
+        if existing is not None and inspect(existing).modified:
+            return existing
+        return self._session.merge(obj, load=False)
+
+    def _load_detached(self, loader):
+        # In einer eigenen Session laden und davon lösen, damit ein Commit der aktuellen Session die Objekte
+        # im Cache nicht abgelaufen markiert (sonst lädt jeder Treffer jedes Objekt einzeln neu)
+        with Session(self._session.get_bind()) as session:
+            objects = loader(session)
+            session.expunge_all()
+        return objects
+
+    def search_available_hotels(self, city=None, start_date=None, end_date=None, max_guest=None, stars=None,
+                                amenities=None, min_price=None, max_price=None):
+        # Hotels mit verfügbaren Zimmern inkl. Anzahl Zimmer und Mindestpreis, ohne Room-Objekte zu erzeugen
+        def load():
+            if self._catalog is not None:
+                return self._search_catalog(city, start_date, end_date, max_guest, stars, amenities, min_price,
+                                            max_price)
+            query = RoomSearchQuery(
+                city, start_date, end_date, max_guest, stars, amenities=amenities, min_price=min_price,
+                max_price=max_price
+            ).hotels()
+            return [HotelAvailability(*row) for row in self._session.execute(query)]
+
+        return self._cached(
+            "search_available_hotels", load, CacheTags(city=city, start_date=start_date, end_date=end_date),
+            _hotel_ids_of_hotels,
+            city=city, start_date=start_date, end_date=end_date, max_guest=max_guest, stars=stars,
+            amenities=amenity_keys(amenities) or None, min_price=min_price, max_price=max_price
+        )
 
-        if max_guest is not None:
-            query = query.where(Room.max_guests >= max_guest)
+    def _search_catalog(self, city, start_date, end_date, max_guest, stars, amenities, min_price, max_price):
+        snapshot = self._catalog.snapshot(self._session)
+        mask = snapshot.room_mask(city, stars, max_guest, min_price, max_price, amenities)
+        if start_date is not None and end_date is not None:
+            mask &= ~snapshot.occupied(self._session, start_date, end_date, mask)
+        return list(map(HotelAvailability._make, snapshot.available_hotels(mask)))
+
+    def search_hotels_by_city_date_guests_stars(self, city=None, start_date=None, end_date=None, max_guest=None,
+                                                stars=None, compat=True, amenities=None):
+        # Mit compat=False werden HotelAvailability-Zeilen zurückgegeben, sonst wie bisher Hotel-Objekte
+        if not compat:
+            return self.search_available_hotels(city, start_date, end_date, max_guest, stars, amenities)
+
+        def load(session):
+            query = available_hotel_objects_query(city, start_date, end_date, max_guest, stars, amenities)
+            return session.execute(query).scalars().all()
+
+        hotels_with_available_rooms = self._cached(
+            "search_hotels_by_city_date_guests_stars", load,
+            CacheTags(city=city, start_date=start_date, end_date=end_date), _hotel_ids_of_hotels, orm=True,
+            city=city, start_date=start_date, end_date=end_date, max_guest=max_guest, stars=stars,
+            amenities=amenity_keys(amenities) or None
+        )
 
-        if hotel is not None:
-            query = query.where(Room.hotel_id == hotel.id)
+        print_hotels(hotels_with_available_rooms)
+        if hotels_with_available_rooms:
+            return hotels_with_available_rooms
 
-        if start_date is not None:
-            query_booked_rooms = select(Room.id).join(Booking).where(
-                or_(
-                    Booking.start_date.between(start_date - timedelta(hours=1), end_date + timedelta(hours=1)),
-                    Booking.end_date.between(start_date - timedelta(hours=1), end_date + timedelta(hours=1)),
-                    and_(Booking.start_date < start_date, Booking.end_date > end_date)
-                )
-            )
-        else:
-            query_booked_rooms = select(Room.id).join(Booking).where(Room.id == 998877665544)
-        if hotel is not None:
-            query_booked_rooms = query_booked_rooms.where(Room.hotel_id == hotel.id)
+    def search_rooms_by_availability(self, start_date: datetime, end_date: datetime, hotel: Hotel = None, max_guest = None,
+                                     amenities=None):
+        hotel_id = hotel.id if hotel is not None else None
+
+        def load(session):
+            query = RoomSearchQuery(
+                start_date=start_date,
+                end_date=end_date,
+                max_guest=max_guest,
+                hotel_id=hotel_id,
+                amenities=amenities
+            ).rooms()
+            return session.execute(query).scalars().all()
+
+        return self._cached(
+            "search_rooms_by_availability", load,
+            CacheTags(hotel_id=hotel_id, start_date=start_date, end_date=end_date), _hotel_ids_of_rooms, orm=True,
+            start_date=start_date, end_date=end_date, hotel_id=hotel_id, max_guest=max_guest,
+            amenities=amenity_keys(amenities) or None
+        )
 
-        query = query.where(Room.id.not_in(query_booked_rooms))
-        results = self._session.execute(query).scalars().all()
-        return results
     def get_room_details(self, room_id):
-        room = self._session.query(Room).filter_by(id=room_id).first()
+        room = self._session.execute(room_details_query(room_id)).scalars().first()
         if room:
-            return {
-                "number": room.number,
-                "type": room.type,
-                "max_guests": room.max_guests,
-                "description": room.description,
-                "amenities": room.amenities,
-                "price": room.price
-            }
+            return room_details(room)
         return None
 
     def get_rooms_by_hotel(self, hotel_id, max_guest):
-        query = select(
-            Room.number,
-            Room.type,
-            Room.max_guests,
-            Room.description,
-            Room.amenities,
-            Room.price
-        ).where(
-            and_(
-                Room.hotel_id == hotel_id,
-                Room.max_guests >= max_guest
-            )
+        def load():
+            rooms = self._session.execute(rooms_by_hotel_query(hotel_id, max_guest)).all()
+            return [room_row_dict(room) for room in rooms]
+
+        return self._cached(
+            "get_rooms_by_hotel", load, CacheTags(hotel_id=hotel_id), hotel_id=hotel_id, max_guest=max_guest
         )
-        rooms = self._session.execute(query).all()
-        return [{
-            "Room Number": room[0],
-            "Type": room[1],
-            "Max Guests": room[2],
-            "Description": room[3],
-            "Amenities": room[4],
-            "Price": room[5]
-        } for room in rooms]
 
+    def get_hotels_by_name(self, name):
+        def load(session):
+            return session.execute(hotels_by_name_query(name)).scalars().all()
 
+        return self._cached("get_hotels_by_name", load, CacheTags(), _hotel_ids_of_hotels, orm=True, name=name)
 
-    def get_hotels_by_name(self, name):
-        query = select(Hotel).where(Hotel.name == name)
-        hotels = self._session.execute(query).scalars().all()
-        return hotels
+    def full_text_search(self, query, limit=20):
+        # Präfixsuche über Hotelname, Stadt, Zimmertyp, Beschreibung und Ausstattung, nach Relevanz sortiert
+        if not full_text_match_expression(query):
+            return []
+
+        def load():
+            return [FullTextMatch(*row) for row in self._session.execute(full_text_search_query(query, limit))]
+
+        return self._cached(
+            "full_text_search", load, CacheTags(), _hotel_ids_of_rooms, query=query.lower(), limit=limit
+        )
+
+    def get_hotel_list_page(self, name=None, after_id=None, limit=200):
+        # Eine Seite der Hotelliste als Tupel, ohne Hotel-Objekte und ohne Lazy Loads für Zimmer und Adresse
+        query = hotel_list_query(name, after_id, limit)
+        return [HotelListRow(*row) for row in self._session.execute(query)]
 
     def get_all_hotels(self):
-        query = select(Hotel)
-        hotels = self._session.execute(query).scalars().all()
-        return hotels
+        def load(session):
+            return session.execute(all_hotels_query()).scalars().all()
+
+        return self._cached("get_all_hotels", load, CacheTags(), _hotel_ids_of_hotels, orm=True)
 
 # Zum Nutzen ohne GUI: Teil unten auskommentieren und Terminal UI nicht mehr auskommentieren.
 class HotelReservationApp(tk.Tk):
@@ -201,7 +472,7 @@ class HotelReservationApp(tk.Tk):
         end_date = self.get_valid_date(self.end_date_entry.get())
 
         hotels = self.search_manager.search_hotels_by_city_date_guests_stars(city, start_date, end_date, max_guest,
-                                                                             stars)
+                                                                             stars, compat=False)
         if not hotels:
             messagebox.showinfo("No results", "No hotels found for your criteria.")
             return
@@ -224,7 +495,9 @@ class HotelReservationApp(tk.Tk):
         tk.Label(self.hotels_window, text="Please select a hotel by ID:").grid(row=0, column=0, columnspan=2, pady=10)
 
         for i, hotel in enumerate(hotels):
-            tk.Label(self.hotels_window, text=f"ID: {hotel.id} - {hotel.name}").grid(row=i + 1, column=0, sticky=tk.W)
+            tk.Label(self.hotels_window,
+                     text=f"ID: {hotel.id} - {hotel.name} - {hotel.available_rooms} rooms from {hotel.min_price}").grid(
+                row=i + 1, column=0, sticky=tk.W)
 
         self.hotel_id_entry = tk.Entry(self.hotels_window)
         self.hotel_id_entry.grid(row=i + 2, column=0)
@@ -301,8 +574,7 @@ if __name__ == "__main__":
     database_path = Path(db_file)
     if not database_path.is_file():
         init_db(str(database_path), generate_example_data=True)
-    engine = create_engine(f"sqlite:///{database_path}", echo=False)
-    session = scoped_session(sessionmaker(bind=engine))
+    session = engine_registry.scoped_session(database_path)
     search_manager = SearchManager(session)
 
     app = HotelReservationApp(search_manager)
@@ -317,9 +589,7 @@ if __name__ == "__main__":
 #     database_path = Path('../data/database.db')
 #     if not database_path.is_file():
 #         init_db(str(database_path), generate_example_data=True)
-#     engine = create_engine(f"sqlite:///{database_path}", echo=False)
-#
-#     session = scoped_session(sessionmaker(bind=engine))
+#     session = engine_registry.scoped_session(database_path)
 #     search_manager = SearchManager(session)
 #
 #     # app = HotelReservationApp(search_manager)
@@ -2,14 +2,32 @@ import sys
 
 from pathlib import Path
 
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
 
 from data_access.data_base import init_db
+from data_access.engine_registry import engine_registry
+from data_access.instrumentation import instrument_methods
 from data_models.models import Login, Role, RegisteredGuest, Address
 
 
+# Statements der Benutzerverwaltung, werden auch vom InventoryManager und vom AsyncUserManager verwendet
+def login_query(username, password):
+    # Die Rolle wird gleich mitgeladen, is_admin() und create_admin() brauchen sie
+    return select(Login).options(joinedload(Login.role)).where(Login.username == username).where(
+        Login.password == password
+    )
 
+
+def role_query(name):
+    return select(Role).where(Role.name == name)
+
+
+def guest_of_query(login):
+    return select(RegisteredGuest).where(RegisteredGuest.login == login)
+
+
+@instrument_methods
 class UserManager():
     def __init__(self, session):
         self._max_attempts = 3
@@ -21,7 +39,7 @@ class UserManager():
         self._attempts_left -= 1
         if self._attempts_left >= 0:
             if self._current_login is None:
-                query = select(Login).where(Login.username == username).where(Login.password == password)
+                query = login_query(username, password)
                 result = self._session.execute(query).scalars().one_or_none()
                 self._current_login = result
                 return self._current_login
@@ -66,13 +84,13 @@ class UserManager():
 
     #Registrierte Gäste
     def get_guest_of(self, login):
-        query = select(RegisteredGuest).where(RegisteredGuest.login == login)
+        query = guest_of_query(login)
         registered_guest = self._session.execute(query).scalars().one_or_none()
         return registered_guest
 
     def create_admin(self, username, password):
         if self._current_login and self._current_login.role.name == "administrator":
-            query = select(Role).where(Role.name == "administrator")
+            query = role_query("administrator")
             role = self._session.execute(query).scalars().one()
             try:
                 admin = Login(username=username, password=password, role=role)
@@ -99,7 +117,7 @@ if __name__ == '__main__':
     database_path = Path(db_file)
     if not database_path.is_file():
         init_db(db_file, generate_example_data=True)
-    session = scoped_session(sessionmaker(bind=create_engine(f"sqlite:///{database_path}", echo=False)))
+    session = engine_registry.scoped_session(database_path)
     user_manager = UserManager(session)
 
     print("Login")
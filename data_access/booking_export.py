@@ -0,0 +1,171 @@
+'''
+Export der Buchungen in eine Datei pro Lauf statt einer CSV-Datei pro Buchung. Die Buchungen werden mit yield_per in
+Blöcken aus der Datenbank gelesen und direkt geschrieben, der Speicherbedarf hängt nur von batch_size ab.
+Formate: CSV, JSON Lines und Parquet (benötigt pyarrow), CSV und JSON Lines optional mit gzip oder zstd
+(benötigt zstandard) komprimiert. Format und Kompression werden aus der Dateiendung erkannt, z.B. bookings.csv.gz.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m data_access.booking_export ./data/database.db bookings.jsonl.gz [--from 2025-01-01] [--to 2025-12-31]
+        [--hotel 1 2 3]
+'''
+import argparse
+import csv
+import gzip
+import io
+import json
+from contextlib import contextmanager
+from datetime import date
+from pathlib import Path
+
+from sqlalchemy import select
+
+from data_access.data_base import create_db_engine
+from data_models.models import Booking
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+FORMATS = ("csv", "jsonl", "parquet")
+COMPRESSIONS = ("gzip", "zstd")
+_SUFFIXES = {".csv": "csv", ".jsonl": "jsonl", ".parquet": "parquet", ".gz": "gzip", ".zst": "zstd"}
+
+EXPORT_COLUMNS = (
+    Booking.id, Booking.room_hotel_id, Booking.room_number, Booking.guest_id, Booking.number_of_guests,
+    Booking.start_date, Booking.end_date, Booking.comment
+)
+COLUMN_NAMES = ("booking_id", "room_hotel_id", "room_number", "guest_id", "number_of_guests", "start_date",
+                "end_date", "comment")
+
+
+def booking_export_query(start_date: date = None, end_date: date = None, hotel_ids=None):
+    # Buchungen, die den Zeitraum berühren, nach id sortiert. Ohne Filter alle Buchungen.
+    query = select(*EXPORT_COLUMNS).order_by(Booking.id)
+    if start_date is not None:
+        query = query.where(Booking.end_date >= start_date)
+    if end_date is not None:
+        query = query.where(Booking.start_date <= end_date)
+    if hotel_ids:
+        query = query.where(Booking.room_hotel_id.in_(hotel_ids))
+    return query
+
+
+def detect_format(path, file_format=None, compression=None):
+    # Liefert (format, compression), explizite Angaben haben Vorrang vor der Dateiendung
+    suffixes = [_SUFFIXES.get(suffix) for suffix in Path(path).suffixes[-2:]]
+    if suffixes and suffixes[-1] in COMPRESSIONS:
+        compression = compression or suffixes[-1]
+        suffixes.pop()
+    if file_format is None:
+        file_format = suffixes[-1] if suffixes and suffixes[-1] in FORMATS else None
+    if file_format not in FORMATS:
+        raise ValueError(f"unknown export format for {path}, use one of {', '.join(FORMATS)}")
+    if compression is not None and compression not in COMPRESSIONS:
+        raise ValueError(f"unknown compression {compression}, use one of {', '.join(COMPRESSIONS)}")
+    return file_format, compression
+
+
+@contextmanager
+def _open_text(path, compression):
+    if compression == "gzip":
+        with gzip.open(path, "wt", encoding="utf-8", newline="") as file:
+            yield file
+    elif compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression needs the zstandard package (pip install zstandard)")
+        with open(path, "wb") as raw, zstandard.ZstdCompressor().stream_writer(raw) as compressed, \
+                io.TextIOWrapper(compressed, encoding="utf-8", newline="") as file:
+            yield file
+    else:
+        with open(path, "w", encoding="utf-8", newline="") as file:
+            yield file
+
+
+def _write_csv(file, partitions):
+    writer = csv.writer(file)
+    writer.writerow(COLUMN_NAMES)
+    count = 0
+    for rows in partitions:
+        writer.writerows(rows)
+        count += len(rows)
+    return count
+
+
+def _write_jsonl(file, partitions):
+    count = 0
+    for rows in partitions:
+        file.writelines(
+            json.dumps(dict(zip(COLUMN_NAMES, row)), default=date.isoformat, ensure_ascii=False) + "\n" for row in rows
+        )
+        count += len(rows)
+    return count
+
+
+def _write_parquet(path, partitions, compression):
+    if pyarrow is None:
+        raise RuntimeError("Parquet export needs the pyarrow package (pip install pyarrow)")
+    schema = pyarrow.schema([
+        ("booking_id", pyarrow.int64()), ("room_hotel_id", pyarrow.int64()), ("room_number", pyarrow.string()),
+        ("guest_id", pyarrow.int64()), ("number_of_guests", pyarrow.int64()), ("start_date", pyarrow.date32()),
+        ("end_date", pyarrow.date32()), ("comment", pyarrow.string())
+    ])
+    count = 0
+    # Parquet komprimiert intern pro Spalte, ohne Angabe mit snappy
+    with pyarrow.parquet.ParquetWriter(path, schema, compression=compression or "snappy") as writer:
+        for rows in partitions:
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(
+                [pyarrow.array(column, type=field.type) for column, field in zip(zip(*rows), schema)], schema=schema
+            ))
+            count += len(rows)
+    return count
+
+
+def export_bookings(connection, path, file_format=None, compression=None, start_date: date = None,
+                    end_date: date = None, hotel_ids=None, batch_size: int = 10000) -> int:
+    '''
+    Schreibt die Buchungen (optional gefiltert nach Zeitraum und Hotels) in die Datei path und liefert die Anzahl
+    geschriebener Buchungen. connection ist eine Connection oder Session.
+    '''
+    file_format, compression = detect_format(path, file_format, compression)
+    query = booking_export_query(start_date, end_date, hotel_ids)
+    result = connection.execute(query.execution_options(yield_per=batch_size))
+    partitions = (partition for partition in result.partitions() if partition)
+    try:
+        if file_format == "parquet":
+            return _write_parquet(path, partitions, compression)
+        write = _write_csv if file_format == "csv" else _write_jsonl
+        with _open_text(path, compression) as file:
+            return write(file, partitions)
+    finally:
+        result.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_file")
+    parser.add_argument("output")
+    parser.add_argument("--format", choices=FORMATS, help="Standard: aus der Dateiendung")
+    parser.add_argument("--compression", choices=COMPRESSIONS, help="Standard: aus der Dateiendung")
+    parser.add_argument("--from", dest="start_date", type=date.fromisoformat)
+    parser.add_argument("--to", dest="end_date", type=date.fromisoformat)
+    parser.add_argument("--hotel", dest="hotel_ids", type=int, nargs="+")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.db_file)
+    with engine.connect() as connection:
+        count = export_bookings(connection, args.output, args.format, args.compression, args.start_date,
+                                args.end_date, args.hotel_ids, args.batch_size)
+    engine.dispose()
+    print(f"{count} bookings exported to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,405 @@
+'''
+Import von Hotels, Zimmern, Gästen und Buchungen aus CSV- oder JSON-Lines-Dateien (optional .gz/.zst komprimiert,
+Erkennung über die Dateiendung wie beim Export). Die Dateien werden zeilenweise gelesen und in Blöcken von
+chunk_size Zeilen mit executemany eingefügt, alles in einer Transaktion pro Aufruf. Adressen werden im Speicher über
+eine Hash-Map dedupliziert, Fremdschlüssel pro Block mit einer Abfrage geprüft. Ungültige Zeilen werden mit
+Zeilennummer und Grund gemeldet und übersprungen, die übrigen werden importiert.
+
+Spalten (id ist optional, leere Werte in optionalen Spalten werden zu NULL):
+    hotels:   id, name, stars, street, zip, city
+    rooms:    hotel_id, number, type, max_guests, description, amenities, price
+    guests:   id, firstname, lastname, email, street, zip, city
+    bookings: room_hotel_id, room_number, guest_id, number_of_guests, start_date, end_date, comment
+
+Aufruf aus dem Projektverzeichnis:
+    python -m data_access.bulk_import ./data/database.db --hotels hotels.csv --rooms rooms.csv.gz
+        [--guests guests.jsonl] [--bookings bookings.jsonl] [--chunk-size 5000]
+'''
+import argparse
+import csv
+import gzip
+import io
+import json
+import time
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import NamedTuple, List
+
+from sqlalchemy import select, insert, func
+
+from data_access.booking_export import detect_format, zstandard
+from data_access.data_base import create_db_engine
+from data_access.write_transaction import BEGIN_IMMEDIATE
+from data_models.models import (
+    Address, Hotel, Room, Guest, Booking, RoomNight, amenity_mask, CALENDAR_START, CALENDAR_END
+)
+
+
+class RowError(NamedTuple):
+    '''
+    Eine ungültige Zeile: line ist die Zeilennummer in der Datei (bei CSV zählt die Kopfzeile als Zeile 1).
+    '''
+    line: int
+    message: str
+
+
+class ImportReport(NamedTuple):
+    entity: str
+    rows: int
+    imported: int
+    errors: List[RowError]
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+    def __str__(self):
+        return (f"{self.entity}: {self.imported} of {self.rows} rows imported, {len(self.errors)} errors, "
+                f"{self.rows_per_second:.0f} rows/s")
+
+
+@contextmanager
+def _open_text(path, compression):
+    if compression == "gzip":
+        with gzip.open(path, "rt", encoding="utf-8", newline="") as file:
+            yield file
+    elif compression == "zstd":
+        if zstandard is None:
+            raise RuntimeError("zstd compression needs the zstandard package (pip install zstandard)")
+        with open(path, "rb") as raw, zstandard.ZstdDecompressor().stream_reader(raw) as decompressed, \
+                io.TextIOWrapper(decompressed, encoding="utf-8", newline="") as file:
+            yield file
+    else:
+        with open(path, "r", encoding="utf-8", newline="") as file:
+            yield file
+
+
+def read_rows(path):
+    # Liefert (Zeilennummer, dict) pro Zeile, ohne die ganze Datei zu laden. Kaputte JSON-Zeilen liefern den Fehler.
+    file_format, compression = detect_format(path)
+    if file_format == "parquet":
+        raise ValueError("Parquet files cannot be imported, use CSV or JSON Lines")
+    with _open_text(path, compression) as file:
+        if file_format == "csv":
+            reader = csv.DictReader(file)
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line, text in enumerate(file, start=1):
+                if not text.strip():
+                    continue
+                try:
+                    yield line, json.loads(text)
+                except ValueError as error:
+                    yield line, error
+
+
+def _text(row, name, required=True):
+    value = row.get(name)
+    if value is None or str(value).strip() == "":
+        if required:
+            raise ValueError(f"missing value for {name}")
+        return None
+    return str(value).strip()
+
+
+def _int(row, name, required=True):
+    value = _text(row, name, required)
+    return None if value is None else int(value)
+
+
+def _float(row, name):
+    return float(_text(row, name))
+
+
+def _date(row, name):
+    return date.fromisoformat(_text(row, name)[:10])
+
+
+def _address_key(row):
+    return _text(row, "street"), _text(row, "zip"), _text(row, "city")
+
+
+class BulkImporter:
+    '''
+    Hält die Caches eines Imports (Adressen, bekannte Hotels, Zimmer und Gäste, Ausstattungsmasken), damit mehrere
+    Dateien nacheinander importiert werden können, ohne dieselben Schlüssel erneut abzufragen.
+    connection muss in einer Schreibtransaktion sein (siehe import_files), der Commit ist Sache des Aufrufers.
+    '''
+
+    def __init__(self, connection, chunk_size: int = 5000):
+        self._connection = connection
+        self.chunk_size = chunk_size
+        self._addresses = None
+        self._hotel_ids = set()
+        self._room_ids = {}
+        self._loaded_room_hotels = set()
+        self._guest_ids = set()
+        self._amenity_masks = {}
+        self._next_ids = {}
+
+    def import_hotels(self, path) -> ImportReport:
+        return self._import("hotels", path, self._parse_hotel, self._insert_hotels)
+
+    def import_rooms(self, path) -> ImportReport:
+        return self._import("rooms", path, self._parse_room, self._insert_rooms)
+
+    def import_guests(self, path) -> ImportReport:
+        return self._import("guests", path, self._parse_guest, self._insert_guests)
+
+    def import_bookings(self, path) -> ImportReport:
+        return self._import("bookings", path, self._parse_booking, self._insert_bookings)
+
+    def _import(self, entity, path, parse, insert_chunk):
+        started = time.perf_counter()
+        errors = []
+        rows = imported = 0
+        chunk = []
+        for line, row in read_rows(path):
+            rows += 1
+            try:
+                if isinstance(row, Exception):
+                    raise row
+                chunk.append((line, parse(row)))
+            except (ValueError, TypeError, AttributeError) as error:
+                errors.append(RowError(line, str(error)))
+            if len(chunk) >= self.chunk_size:
+                imported += insert_chunk(chunk, errors)
+                chunk = []
+        if chunk:
+            imported += insert_chunk(chunk, errors)
+        errors.sort()
+        return ImportReport(entity, rows, imported, errors, time.perf_counter() - started)
+
+    # Zeilen prüfen und umwandeln, ohne Datenbankzugriff
+
+    @staticmethod
+    def _parse_hotel(row):
+        stars = _int(row, "stars", required=False) or 0
+        if not 0 <= stars <= 5:
+            raise ValueError(f"stars must be between 0 and 5, not {stars}")
+        return {"id": _int(row, "id", required=False), "name": _text(row, "name"), "stars": stars,
+                "address": _address_key(row)}
+
+    @staticmethod
+    def _parse_room(row):
+        max_guests = _int(row, "max_guests")
+        price = _float(row, "price")
+        if max_guests < 1 or price < 0:
+            raise ValueError("max_guests must be at least 1 and price must not be negative")
+        return {"hotel_id": _int(row, "hotel_id"), "number": _text(row, "number"),
+                "type": _text(row, "type", required=False), "max_guests": max_guests,
+                "description": _text(row, "description", required=False),
+                "amenities": _text(row, "amenities", required=False), "price": price}
+
+    @staticmethod
+    def _parse_guest(row):
+        email = _text(row, "email")
+        if "@" not in email:
+            raise ValueError(f"invalid email {email!r}")
+        return {"id": _int(row, "id", required=False), "firstname": _text(row, "firstname"),
+                "lastname": _text(row, "lastname"), "email": email, "address": _address_key(row)}
+
+    @staticmethod
+    def _parse_booking(row):
+        start_date, end_date = _date(row, "start_date"), _date(row, "end_date")
+        if start_date > end_date or start_date < CALENDAR_START or end_date > CALENDAR_END:
+            raise ValueError(f"invalid date range {start_date}..{end_date}")
+        return {"room_hotel_id": _int(row, "room_hotel_id"), "room_number": _text(row, "room_number"),
+                "guest_id": _int(row, "guest_id"), "number_of_guests": _int(row, "number_of_guests"),
+                "start_date": start_date, "end_date": end_date, "comment": _text(row, "comment", required=False)}
+
+    # Fremdschlüssel pro Block prüfen und einfügen
+
+    def _assign_ids(self, table, rows):
+        # ids selbst vergeben statt RETURNING zu verwenden: mit sort_by_parameter_order fügt SQLAlchemy unter SQLite
+        # sonst jede Zeile einzeln ein. Neue ids liegen über allen bisherigen und den expliziten ids des Blocks.
+        next_id = self._next_ids.get(table.name)
+        if next_id is None:
+            next_id = self._connection.execute(select(func.coalesce(func.max(table.c.id), 0) + 1)).scalar()
+        next_id = max([next_id] + [row["id"] + 1 for row in rows if row.get("id") is not None])
+        for row in rows:
+            if row.get("id") is None:
+                row["id"] = next_id
+                next_id += 1
+        self._next_ids[table.name] = next_id
+        return rows
+
+    def _address_ids(self, keys):
+        # Adressen aus der Datenbank einmal laden, neue Adressen mit einem executemany anlegen
+        if self._addresses is None:
+            table = Address.__table__
+            self._addresses = {
+                (street, zip_code, city): address_id for address_id, street, zip_code, city in
+                self._connection.execute(select(table.c.id, table.c.street, table.c.zip, table.c.city))
+            }
+        new = list(dict.fromkeys(key for key in keys if key not in self._addresses))
+        if new:
+            rows = self._assign_ids(Address.__table__, [
+                {"street": street, "zip": zip_code, "city": city} for street, zip_code, city in new
+            ])
+            self._connection.execute(insert(Address.__table__), rows)
+            self._addresses.update(zip(new, (row["id"] for row in rows)))
+        return [self._addresses[key] for key in keys]
+
+    def _duplicate_ids(self, table, chunk, errors):
+        # Explizite ids dürfen weder in der Datenbank noch mehrfach in der Datei vorkommen
+        ids = [values["id"] for _, values in chunk if values["id"] is not None]
+        if not ids:
+            return chunk
+        taken = set(self._connection.execute(select(table.c.id).where(table.c.id.in_(set(ids)))).scalars())
+        valid = []
+        for line, values in chunk:
+            if values["id"] is not None:
+                if values["id"] in taken:
+                    errors.append(RowError(line, f"id {values['id']} already exists"))
+                    continue
+                taken.add(values["id"])
+            valid.append((line, values))
+        return valid
+
+    def _insert_with_addresses(self, model, chunk, errors, known_ids):
+        chunk = self._duplicate_ids(model.__table__, chunk, errors)
+        if not chunk:
+            return 0
+        address_ids = self._address_ids([values["address"] for _, values in chunk])
+        rows = []
+        for (_, values), address_id in zip(chunk, address_ids):
+            row = dict(values, address_id=address_id)
+            del row["address"]
+            rows.append(row)
+        if model is Guest:
+            for row in rows:
+                row["type"] = "guest"
+        self._connection.execute(insert(model.__table__), self._assign_ids(model.__table__, rows))
+        known_ids.update(row["id"] for row in rows)
+        return len(rows)
+
+    def _insert_hotels(self, chunk, errors):
+        return self._insert_with_addresses(Hotel, chunk, errors, self._hotel_ids)
+
+    def _insert_guests(self, chunk, errors):
+        return self._insert_with_addresses(Guest, chunk, errors, self._guest_ids)
+
+    def _existing(self, known, column, values):
+        # Ergänzt known um die values, die es in der Datenbank gibt, eine Abfrage pro Block
+        missing = set(values) - set(known)
+        if missing:
+            known.update(self._connection.execute(select(column).where(column.in_(missing))).scalars())
+        return known
+
+    def _amenity_mask(self, amenities):
+        key = (amenities or "").lower()
+        if key not in self._amenity_masks:
+            self._amenity_masks[key] = amenity_mask(self._connection, amenities)
+        return self._amenity_masks[key]
+
+    def _load_rooms(self, hotel_ids):
+        # Zimmer der Hotels im Block, als (hotel_id, number) -> room.id
+        missing = set(hotel_ids) - self._loaded_room_hotels
+        if missing:
+            self._room_ids.update(
+                ((hotel_id, number), room_id) for room_id, hotel_id, number in self._connection.execute(
+                    select(Room.id, Room.hotel_id, Room.number).where(Room.hotel_id.in_(missing))
+                )
+            )
+            self._loaded_room_hotels |= missing
+
+    def _insert_rooms(self, chunk, errors):
+        hotel_ids = self._existing(self._hotel_ids, Hotel.id, {values["hotel_id"] for _, values in chunk})
+        self._load_rooms(values["hotel_id"] for _, values in chunk if values["hotel_id"] in hotel_ids)
+        rows = []
+        for line, values in chunk:
+            key = (values["hotel_id"], values["number"])
+            if values["hotel_id"] not in hotel_ids:
+                errors.append(RowError(line, f"hotel {values['hotel_id']} does not exist"))
+            elif key in self._room_ids:
+                errors.append(RowError(line, f"room {values['number']} of hotel {values['hotel_id']} already exists"))
+            else:
+                self._room_ids[key] = None
+                rows.append(dict(values, amenity_mask=self._amenity_mask(values["amenities"])))
+        if not rows:
+            return 0
+        self._connection.execute(insert(Room.__table__), self._assign_ids(Room.__table__, rows))
+        self._room_ids.update(((row["hotel_id"], row["number"]), row["id"]) for row in rows)
+        return len(rows)
+
+    def _booked_nights(self, room_ids, first, last):
+        # Belegte Nächte der Zimmer im Zeitraum des Blocks, aus dem Belegungskalender room_night
+        if not room_ids:
+            return set()
+        return set(self._connection.execute(
+            select(RoomNight.room_id, RoomNight.night).where(
+                RoomNight.room_id.in_(room_ids), RoomNight.night.between(first, last)
+            )
+        ).all())
+
+    def _insert_bookings(self, chunk, errors):
+        self._load_rooms({values["room_hotel_id"] for _, values in chunk})
+        guest_ids = self._existing(self._guest_ids, Guest.id, {values["guest_id"] for _, values in chunk})
+        room_ids = {self._room_ids.get((values["room_hotel_id"], values["room_number"])) for _, values in chunk}
+        room_ids.discard(None)
+        booked = self._booked_nights(
+            room_ids, min(values["start_date"] for _, values in chunk), max(values["end_date"] for _, values in chunk)
+        )
+        rows = []
+        for line, values in chunk:
+            room_id = self._room_ids.get((values["room_hotel_id"], values["room_number"]))
+            if room_id is None:
+                errors.append(RowError(
+                    line, f"room {values['room_number']} of hotel {values['room_hotel_id']} does not exist"
+                ))
+                continue
+            if values["guest_id"] not in guest_ids:
+                errors.append(RowError(line, f"guest {values['guest_id']} does not exist"))
+                continue
+            nights = [(room_id, values["start_date"] + timedelta(days=day))
+                      for day in range((values["end_date"] - values["start_date"]).days + 1)]
+            if any(night in booked for night in nights):
+                errors.append(RowError(line, "room is already booked for these dates"))
+                continue
+            booked.update(nights)
+            rows.append(values)
+        if rows:
+            self._connection.execute(insert(Booking.__table__), rows)
+        return len(rows)
+
+
+def import_files(engine, hotels=None, rooms=None, guests=None, bookings=None, chunk_size: int = 5000):
+    # Importiert die angegebenen Dateien in der Reihenfolge der Fremdschlüssel in einer Transaktion. BEGIN IMMEDIATE
+    # hält andere Schreiber fern, damit die selbst vergebenen ids und die Prüfungen bis zum Commit gültig bleiben.
+    reports = []
+    with engine.connect() as connection, connection.execution_options(**BEGIN_IMMEDIATE).begin():
+        importer = BulkImporter(connection, chunk_size)
+        for path, run in ((hotels, importer.import_hotels), (rooms, importer.import_rooms),
+                          (guests, importer.import_guests), (bookings, importer.import_bookings)):
+            if path is not None:
+                reports.append(run(path))
+    return reports
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_file")
+    parser.add_argument("--hotels")
+    parser.add_argument("--rooms")
+    parser.add_argument("--guests")
+    parser.add_argument("--bookings")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--max-errors", type=int, default=20, help="Anzahl angezeigter Fehler pro Datei")
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.db_file)
+    reports = import_files(engine, args.hotels, args.rooms, args.guests, args.bookings, args.chunk_size)
+    engine.dispose()
+    for report in reports:
+        print(report)
+        for error in report.errors[:args.max_errors]:
+            print(f"    line {error.line}: {error.message}")
+        if len(report.errors) > args.max_errors:
+            print(f"    ... {len(report.errors) - args.max_errors} more")
+
+
+if __name__ == "__main__":
+    main()
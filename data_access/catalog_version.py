@@ -0,0 +1,30 @@
+'''
+Versionszähler des Katalogs (catalog_version): Lesen, Erhöhen und die Trigger auf hotel, address und room.
+Tabelle und Trigger sind in data_models.models deklariert und entstehen mit create_all.
+'''
+from sqlalchemy import Connection, select, update
+
+from data_models.models import CatalogVersion, CATALOG_TRIGGERS
+
+
+def catalog_version_query():
+    return select(CatalogVersion.version).where(CatalogVersion.id == 1)
+
+
+def catalog_version(connection) -> int:
+    # connection ist eine Connection oder Session, ohne Zeile (ältere Datenbank vor upgrade_db) gilt Version 0
+    return connection.execute(catalog_version_query()).scalar() or 0
+
+
+def bump_catalog_version(connection: Connection) -> None:
+    connection.execute(update(CatalogVersion).where(CatalogVersion.id == 1).values(version=CatalogVersion.version + 1))
+
+
+def create_catalog_triggers(connection: Connection) -> None:
+    for name, body in CATALOG_TRIGGERS.items():
+        connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_catalog_triggers(connection: Connection) -> None:
+    for name in CATALOG_TRIGGERS:
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
@@ -1,30 +1,150 @@
 import os
 from pathlib import Path
 
-from sqlalchemy import create_engine
-from sqlalchemy.schema import CreateTable
+from sqlalchemy import create_engine, event, select, update
+from sqlalchemy.schema import CreateTable, CreateIndex
 
 from data_models.models import *
 from data_access.data_generator import *
+from data_access.full_text_index import (
+    CREATE_FULL_TEXT_TABLE, FULL_TEXT_TABLE, FULL_TEXT_TRIGGERS, fill_full_text_index
+)
+from data_access.instrumentation import instrumentation
+# Importiert, damit HOTEL_N_PLUS_ONE in allen Einstiegspunkten wirkt
+from data_access.n_plus_one import n_plus_one
+from data_access.occupancy import fill_room_nights
+from data_access.write_transaction import listen_begin
 
-def init_db(file_path: str, create_ddl: bool = False, generate_example_data: bool = False, verbose: bool = False):
+# Pragma-Profile, werden bei jeder neuen Verbindung gesetzt (siehe create_db_engine)
+PRAGMA_PROFILES = {
+    # SQLite-Standard: Rollback-Journal, synchronous=FULL, 2 MB Cache
+    "default": {},
+    # WAL erlaubt Lesen während geschrieben wird, synchronous=FULL bleibt auch bei Stromausfall dauerhaft
+    "safe": {
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "busy_timeout": 5000,
+    },
+    # Mit WAL verliert synchronous=NORMAL bei Stromausfall höchstens die letzten Commits, die Datenbank bleibt konsistent
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,  # negativ = KiB, also 64 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,
+    },
+}
+DEFAULT_PROFILE = "performance"
+
+
+def apply_pragmas(dbapi_connection, pragmas: dict) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+def listen_pragmas(engine, profile=DEFAULT_PROFILE) -> None:
+    # profile ist der Name eines Profils aus PRAGMA_PROFILES oder direkt ein dict mit Pragmas
+    pragmas = PRAGMA_PROFILES[profile] if isinstance(profile, str) else profile
+    if not pragmas:
+        return
+
+    def on_connect(dbapi_connection, connection_record):
+        apply_pragmas(dbapi_connection, pragmas)
+
+    event.listen(engine, "connect", on_connect)
+
+
+def create_db_engine(file_path, profile=DEFAULT_PROFILE, echo: bool = False, **engine_options):
+    # Gemeinsame Engine-Factory für alle Einstiegspunkte.
+    # journal_mode=WAL bleibt in der Datei gespeichert, auch wenn später mit dem Profil "default" verbunden wird.
+    engine = create_engine(f"sqlite:///{file_path}", echo=echo, **engine_options)
+    listen_pragmas(engine, profile)
+    # Erlaubt Schreibtransaktionen mit BEGIN IMMEDIATE (data_access/write_transaction.py)
+    listen_begin(engine)
+    # Statements und SQL-Zeit pro Manager-Methode (data_access/instrumentation.py)
+    instrumentation.instrument_engine(engine)
+    return engine
+
+
+def migrate_amenities(connection) -> None:
+    # Ergänzt room um amenity_mask und füllt amenity und die Masken aus den bestehenden amenities-Texten
+    columns = {row[1] for row in connection.exec_driver_sql("PRAGMA table_info(room)")}
+    if "amenity_mask" not in columns:
+        connection.exec_driver_sql("ALTER TABLE room ADD COLUMN amenity_mask INTEGER NOT NULL DEFAULT 0")
+    room = Room.__table__
+    # Ein UPDATE pro unterschiedlichem Text, die meisten Zimmer teilen sich wenige Kombinationen
+    texts = connection.execute(
+        select(room.c.amenities).where(room.c.amenity_mask == 0, room.c.amenities.is_not(None)).distinct()
+    ).scalars().all()
+    for text in texts:
+        mask = amenity_mask(connection, text)
+        if mask:
+            connection.execute(update(room).where(room.c.amenities == text).values(amenity_mask=mask))
+
+
+# Indizes früherer Versionen, die keine Abfrage mehr benutzt und die nur jedes Schreiben verlangsamen
+OBSOLETE_INDEXES = {"ix_booking_start_date", "ix_booking_end_date"}
+
+
+def upgrade_db(engine) -> None:
+    # Legt in einer bestehenden Datenbank fehlende Tabellen, Spalten und Indizes an, ohne Daten zu löschen
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        migrate_amenities(connection)
+        # Eine neu angelegte room_night wird aus den bestehenden Buchungen befüllt
+        if connection.execute(select(RoomNight.room_id).limit(1)).first() is None:
+            fill_room_nights(connection)
+        # Direkt aus sqlite_master, da SQLAlchemy Ausdrucks-Indizes wie lower(city) nicht reflektieren kann
+        existing = set(connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(connection)
+        for name in OBSOLETE_INDEXES & existing:
+            connection.exec_driver_sql(f"DROP INDEX {name}")
+        # Ein mit create_all neu angelegter Volltextindex wird aus den bestehenden Zimmern befüllt
+        if connection.exec_driver_sql(f"SELECT 1 FROM {FULL_TEXT_TABLE} LIMIT 1").first() is None:
+            fill_full_text_index(connection)
+
+
+def init_db(file_path: str, create_ddl: bool = False, generate_example_data: bool = False, verbose: bool = False,
+            upgrade: bool = False, profile=DEFAULT_PROFILE):
     path = Path(file_path)
     data_folder = path.parent
-    engine = create_engine(f"sqlite:///{file_path}")
+    engine = create_db_engine(file_path, profile)
 
     if path.is_file():
-        Base.metadata.drop_all(engine)
+        # Mit upgrade=True bleibt eine bestehende Datenbank erhalten und wird nur ergänzt
+        if not upgrade:
+            Base.metadata.drop_all(engine)
     else:
         if not data_folder.exists():
             data_folder.mkdir(parents=True)
 
     Base.metadata.create_all(engine)
+    if upgrade:
+        upgrade_db(engine)
 
     if create_ddl:
         with open(path.with_suffix(".ddl"), "w") as ddl_file:
             for table in Base.metadata.tables.values():
                 create_table = str(CreateTable(table).compile(engine)).strip()
                 ddl_file.write(f"{create_table};{os.linesep}")
+                for index in table.indexes:
+                    create_index = str(CreateIndex(index).compile(engine)).strip()
+                    ddl_file.write(f"{create_index};{os.linesep}")
+            for name, body in ROOM_NIGHT_TRIGGERS.items():
+                ddl_file.write(f"CREATE TRIGGER {name} {body.strip()};{os.linesep}")
+            for name, body in CATALOG_TRIGGERS.items():
+                ddl_file.write(f"CREATE TRIGGER {name} {body.strip()};{os.linesep}")
+            ddl_file.write(f"{CREATE_FULL_TEXT_TABLE.strip()};{os.linesep}")
+            for name, body in FULL_TEXT_TRIGGERS.items():
+                ddl_file.write(f"CREATE TRIGGER {name} {body.strip()};{os.linesep}")
 
     if generate_example_data:
         generate_system_data(engine, verbose=verbose)
@@ -32,4 +152,7 @@ def init_db(file_path: str, create_ddl: bool = False, generate_example_data: boo
         generate_guests(engine, verbose=verbose)
         generate_registered_guests(engine, verbose=verbose)
         generate_random_bookings(engine, verbose=verbose)
-        generate_random_registered_bookings(engine, verbose=verbose)
\ No newline at end of file
+        generate_random_registered_bookings(engine, verbose=verbose)
+
+    # Die Anwendung arbeitet danach mit ihrer eigenen Engine (engine_registry), diese wird nicht mehr gebraucht
+    engine.dispose()
@@ -1,16 +1,23 @@
 import datetime
 import sys
 from datetime import date
-from random import seed, choices
+from random import seed, choices, Random
 
-from sqlalchemy import Engine, select
+from sqlalchemy import Engine, select, insert, func
 from sqlalchemy.orm import Session
 
 from data_models.models import *
+from data_access.full_text_index import (
+    has_full_text_index, create_full_text_triggers, drop_full_text_triggers, fill_full_text_index
+)
+from data_access.occupancy import create_room_night_triggers, drop_room_night_triggers, fill_room_nights
+from data_access.catalog_version import create_catalog_triggers, drop_catalog_triggers, bump_catalog_version
 
 
 def generate_system_data(engine: Engine, verbose: bool = False) -> None:
-    with Session(engine) as session:
+    # expire_on_commit=False in den generate-Funktionen: die verbose-Ausgabe nach dem Commit zeigt die geschriebenen
+    # Werte, die repr der Modelle laden abgelaufene Attribute nicht nach
+    with Session(engine, expire_on_commit=False) as session:
         administrator = Role(name="administrator", access_level=sys.maxsize)
         registered_user = Role(name="registered_user", access_level=1)
         admin_login = Login(username="admin", password="password", role=administrator)
@@ -29,7 +36,7 @@ def generate_system_data(engine: Engine, verbose: bool = False) -> None:
 
 
 def generate_hotels(engine: Engine, verbose: bool = False) -> None:
-    with Session(engine) as session:
+    with Session(engine, expire_on_commit=False) as session:
 
         hotels_to_add = [
             Hotel(
@@ -116,7 +123,7 @@ def generate_hotels(engine: Engine, verbose: bool = False) -> None:
 
 
 def generate_guests(engine: Engine, verbose):
-    with Session(engine) as session:
+    with Session(engine, expire_on_commit=False) as session:
         guests_to_add = [
             Guest(
                 firstname="Hans",
@@ -161,7 +168,7 @@ def generate_guests(engine: Engine, verbose):
 
 
 def generate_registered_guests(engine: Engine, verbose):
-    with Session(engine) as session:
+    with Session(engine, expire_on_commit=False) as session:
         registered_guests_to_add = [
             RegisteredGuest(
                 firstname="Sabrina",
@@ -224,7 +231,7 @@ def generate_random_bookings(engine: Engine, k: int = 20, s: int = 1, verbose: b
     seed(s)
     start_days, end_days = generate_booking_dates(k, s)
 
-    with Session(engine) as session:
+    with Session(engine, expire_on_commit=False) as session:
         possible_guests = session.query(Guest).all()
         if not len(possible_guests) > 0:
             generate_guests(engine)
@@ -261,7 +268,7 @@ def generate_random_bookings(engine: Engine, k: int = 20, s: int = 1, verbose: b
 def generate_random_registered_bookings(engine: Engine, k: int = 5, s: int = 1, verbose: bool = False):
     seed(s)
     start_days, end_days = generate_booking_dates(k, s)
-    with Session(engine) as session:
+    with Session(engine, expire_on_commit=False) as session:
         possible_registered_guests = session.query(RegisteredGuest).all()
         if not len(possible_registered_guests) > 0:
             generate_guests(engine)
@@ -294,4 +301,215 @@ def generate_random_registered_bookings(engine: Engine, k: int = 5, s: int = 1,
                 print(booking)
 
 
+BULK_CITIES = ["Olten", "Zürich", "Basel", "Bern", "Luzern", "Genf", "Lugano", "Chur", "Aarau", "Thun", "St. Gallen",
+               "Lausanne", "Winterthur", "Biel", "Schaffhausen", "Fribourg", "Neuchâtel", "Sion", "Zug", "Solothurn"]
+BULK_STREETS = ["Bahnhofstrasse", "Hauptstrasse", "Dorfstrasse", "Seestrasse", "Kirchweg", "Industriestrasse",
+                "Schulhausstrasse", "Gartenweg", "Bergstrasse", "Poststrasse"]
+BULK_FIRSTNAMES = ["Anna", "Luca", "Mia", "Noah", "Lea", "Leon", "Laura", "David", "Sara", "Jonas", "Nina", "Elias"]
+BULK_LASTNAMES = ["Müller", "Meier", "Schmid", "Keller", "Weber", "Huber", "Schneider", "Meyer", "Steiner", "Fischer"]
+# (type, max_guests, description, price), das Zimmer mit der Nummer n bekommt BULK_ROOM_TYPES[n % len(BULK_ROOM_TYPES)]
+BULK_ROOM_TYPES = [
+    ("single room", 1, "One single bed", 110.0),
+    ("double room", 2, "One double bed", 150.0),
+    ("double room", 2, "Two single beds", 140.0),
+    ("family room", 4, "One queensized bed and two single beds", 220.0),
+]
+BULK_AMENITIES = "TV, Caffe Machine"
 
+
+def _next_id(connection, table) -> int:
+    return (connection.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _insert_chunked(connection, table, rows, chunk_size: int) -> int:
+    # executemany in Blöcken, es liegt nie mehr als ein Block Parameter im Speicher
+    count = 0
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            connection.execute(insert(table), chunk)
+            count += len(chunk)
+            chunk = []
+    if chunk:
+        connection.execute(insert(table), chunk)
+        count += len(chunk)
+    return count
+
+
+def _bulk_address_rows(first_id: int, count: int, rng: Random):
+    for address_id in range(first_id, first_id + count):
+        yield {
+            "id": address_id,
+            "street": f"{rng.choice(BULK_STREETS)} {rng.randint(1, 200)}",
+            "zip": str(rng.randint(1000, 9658)),
+            "city": rng.choice(BULK_CITIES),
+        }
+
+
+def _bulk_hotel_rows(first_id: int, count: int, first_address_id: int, rng: Random):
+    for i in range(count):
+        yield {
+            "id": first_id + i,
+            "name": f"Hotel {first_id + i}",
+            "stars": rng.randint(1, 5),
+            "address_id": first_address_id + i,
+        }
+
+
+def _bulk_room_rows(first_room_id: int, first_hotel_id: int, hotels: int, rooms_per_hotel: int, mask: int):
+    room_id = first_room_id
+    for hotel_id in range(first_hotel_id, first_hotel_id + hotels):
+        for n in range(1, rooms_per_hotel + 1):
+            room_type, max_guests, description, price = BULK_ROOM_TYPES[n % len(BULK_ROOM_TYPES)]
+            yield {
+                "id": room_id,
+                "hotel_id": hotel_id,
+                "number": f"{n:02d}",
+                "type": room_type,
+                "max_guests": max_guests,
+                "description": description,
+                "amenities": BULK_AMENITIES,
+                "amenity_mask": mask,
+                "price": price,
+            }
+            room_id += 1
+
+
+def _bulk_guest_rows(first_id: int, count: int, first_address_id: int, rng: Random):
+    for i in range(count):
+        firstname = rng.choice(BULK_FIRSTNAMES)
+        lastname = rng.choice(BULK_LASTNAMES)
+        yield {
+            "id": first_id + i,
+            "firstname": firstname,
+            "lastname": lastname,
+            "email": f"{firstname.lower()}.{lastname.lower()}.{first_id + i}@example.ch",
+            "address_id": first_address_id + i,
+            "type": "guest",
+        }
+
+
+def _bulk_booking_rows(first_id: int, bookings: int, first_hotel_id: int, hotels: int, rooms_per_hotel: int,
+                       first_guest_id: int, guests: int, start_date: date, days: int, max_nights: int, rng: Random):
+    # Jede Buchung eines Zimmers liegt in einem eigenen Zeitfenster von slot Tagen und endet spätestens am letzten
+    # Tag des Fensters. Die Überschneidungsprüfung ist inklusiv, deshalb beginnt die nächste Buchung frühestens am
+    # Tag nach dem Ende der vorherigen.
+    # rng.random() statt randint() und vorberechnete Tage, das Erzeugen der Zeilen kostet sonst mehr als das Einfügen
+    calendar = [start_date + datetime.timedelta(days=day) for day in range(days + 1)]
+    random = rng.random
+    rooms = hotels * rooms_per_hotel
+    booking_id = first_id
+    for room in range(rooms):
+        room_bookings = bookings // rooms + (1 if room < bookings % rooms else 0)
+        if room_bookings == 0:
+            break
+        slot = days // room_bookings
+        longest = min(max_nights, slot - 1)
+        hotel_id = first_hotel_id + room // rooms_per_hotel
+        n = room % rooms_per_hotel + 1
+        number = f"{n:02d}"
+        max_guests = BULK_ROOM_TYPES[n % len(BULK_ROOM_TYPES)][1]
+        for k in range(room_bookings):
+            nights = 1 + int(random() * longest)
+            first_day = k * slot + int(random() * (slot - nights))
+            yield {
+                "id": booking_id,
+                "room_hotel_id": hotel_id,
+                "room_number": number,
+                "guest_id": first_guest_id + int(random() * guests),
+                "number_of_guests": 1 + int(random() * max_guests),
+                "start_date": calendar[first_day],
+                "end_date": calendar[first_day + nights],
+                "comment": None,
+            }
+            booking_id += 1
+
+
+def generate_bulk_data(engine: Engine, hotels: int = 1000, rooms_per_hotel: int = 20, guests: int = 100000,
+                       bookings: int = 1000000, start_date: date = None, days: int = 730, s: int = 1,
+                       max_nights: int = 5, chunk_size: int = 50000, rebuild_indexes: bool = True,
+                       verbose: bool = False) -> dict:
+    '''
+    Erzeugt grosse Testdatenmengen direkt mit Core insert() (executemany in Blöcken von chunk_size Zeilen), ohne
+    ORM-Objekte. Die Zeilen werden aus Generatoren erzeugt, der Speicherbedarf hängt daher nur von chunk_size ab.
+    Die IDs werden ab dem aktuellen Maximum jeder Tabelle vergeben, bestehende Daten bleiben erhalten.
+    Die Buchungen werden gleichmässig auf alle Zimmer verteilt und überschneiden sich pro Zimmer nicht.
+    Mit rebuild_indexes=True werden die Indizes der befüllten Tabellen vorher gelöscht und am Schluss neu aufgebaut,
+    das ist bei grossen Mengen etwa doppelt so schnell wie das laufende Nachführen bei jedem Insert. Dasselbe gilt für
+    die Trigger des Volltextindex (data_access/full_text_index.py), des Belegungskalenders room_night und der
+    Katalogversion (die am Schluss einmal erhöht wird).
+    '''
+    rng = Random(s)
+    if start_date is None:
+        start_date = date(date.today().year, 1, 1)
+    rooms = hotels * rooms_per_hotel
+    if bookings and (rooms == 0 or guests == 0):
+        raise ValueError("Bookings need at least one room and one guest")
+    if bookings and days // -(-bookings // rooms) < 2:
+        raise ValueError(f"{bookings} bookings do not fit into {rooms} rooms over {days} days")
+
+    address_table = Address.__table__
+    tables = [address_table, Hotel.__table__, Room.__table__, Guest.__table__, Booking.__table__]
+    counts = {}
+    with engine.begin() as connection:
+        dropped = []
+        if rebuild_indexes:
+            # Direkt aus sqlite_master, da SQLAlchemy Ausdrucks-Indizes wie lower(city) nicht reflektieren kann
+            existing = set(connection.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'").scalars())
+            dropped = [index for table in tables for index in table.indexes if index.name in existing]
+            for index in dropped:
+                index.drop(connection)
+        # Der Volltextindex wird ebenfalls erst am Schluss in einem Statement ergänzt statt per Trigger pro Zimmer
+        full_text = rebuild_indexes and has_full_text_index(connection)
+        if full_text:
+            drop_full_text_triggers(connection)
+        if rebuild_indexes:
+            drop_room_night_triggers(connection)
+            drop_catalog_triggers(connection)
+
+        first_address_id = _next_id(connection, address_table)
+        first_hotel_id = _next_id(connection, Hotel.__table__)
+        first_room_id = _next_id(connection, Room.__table__)
+        first_guest_id = _next_id(connection, Guest.__table__)
+        first_booking_id = _next_id(connection, Booking.__table__)
+
+        counts["addresses"] = _insert_chunked(
+            connection, address_table, _bulk_address_rows(first_address_id, hotels + guests, rng), chunk_size
+        )
+        counts["hotels"] = _insert_chunked(
+            connection, Hotel.__table__, _bulk_hotel_rows(first_hotel_id, hotels, first_address_id, rng), chunk_size
+        )
+        mask = amenity_mask(connection, BULK_AMENITIES)
+        counts["rooms"] = _insert_chunked(
+            connection, Room.__table__, _bulk_room_rows(first_room_id, first_hotel_id, hotels, rooms_per_hotel, mask),
+            chunk_size
+        )
+        counts["guests"] = _insert_chunked(
+            connection, Guest.__table__, _bulk_guest_rows(first_guest_id, guests, first_address_id + hotels, rng),
+            chunk_size
+        )
+        counts["bookings"] = _insert_chunked(
+            connection, Booking.__table__,
+            _bulk_booking_rows(first_booking_id, bookings, first_hotel_id, hotels, rooms_per_hotel, first_guest_id,
+                               guests, start_date, days, max_nights, rng),
+            chunk_size
+        )
+
+        for index in dropped:
+            index.create(connection)
+        if full_text:
+            fill_full_text_index(connection, first_room_id)
+            create_full_text_triggers(connection)
+        if rebuild_indexes:
+            fill_room_nights(connection, first_booking_id)
+            create_room_night_triggers(connection)
+            create_catalog_triggers(connection)
+            bump_catalog_version(connection)
+
+    if verbose:
+        print("#" * 50)
+        for name, count in counts.items():
+            print(f"{name.capitalize()} added:", count)
+        print("#" * 50)
+    return counts
@@ -1,11 +1,11 @@
 import os
 from pathlib import Path
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload, joinedload
 
 from sqlalchemy.schema import CreateTable
 
+from data_access.data_base import create_db_engine
 from data_models.models import *
 
 from data_access.data_generator import generate_hotels, generate_guests, generate_registered_guests, generate_random_bookings, \
@@ -16,7 +16,7 @@ def load_data_from_sqlite():
     data_path = Path(os.getcwd()).joinpath("data")
     data_path.mkdir(exist_ok=True)
 
-    engine = create_engine("sqlite:///data/example.data_access")
+    engine = create_db_engine("data/example.data_access")
     with open(data_path.joinpath("example.ddl"), "w") as ddl_file:
         for table in Base.metadata.tables.values():
             create_table = str(CreateTable(table).compile(engine)).strip()
@@ -27,12 +27,12 @@ def load_data_from_sqlite():
 
     generate_hotels(engine)
     with Session(engine) as session:
-        result = session.query(Hotel).all()
+        result = session.query(Hotel).options(selectinload(Hotel.rooms), joinedload(Hotel.address)).all()
         for hotel in result:
             print(f"{hotel}")
             for room in hotel.rooms:
                 print(f"{' ' * 5}{room}")
-                for amenity in room.amenities:
+                for amenity in parse_amenities(room.amenities):
                     print(f"{' ' * 10}{amenity}")
 
     print()
@@ -0,0 +1,103 @@
+import atexit
+from pathlib import Path
+from threading import Lock
+
+from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool
+
+from data_access.data_base import DEFAULT_PROFILE, create_db_engine
+from data_access.write_transaction import WriteQueue
+
+
+class EngineRegistry:
+    '''
+    Eine Engine mit Connection-Pool und eine Session-Factory pro Datenbankdatei für die ganze Anwendung.
+    GUI und Konsolen-Apps holen sich Engine und Sessions hier, statt bei jeder Aktion create_engine aufzurufen.
+    Das Pragma-Profil gilt ab dem ersten Aufruf für eine Datei, spätere Aufrufe bekommen dieselbe Engine.
+    '''
+
+    def __init__(self):
+        self._lock = Lock()
+        self._engines = {}
+        self._session_factories = {}
+        self._scoped_sessions = {}
+        self._write_queues = {}
+
+    @staticmethod
+    def _key(file_path):
+        return str(Path(file_path).resolve())
+
+    def engine(self, file_path, profile=DEFAULT_PROFILE, **engine_options):
+        key = self._key(file_path)
+        with self._lock:
+            engine = self._engines.get(key)
+            if engine is None:
+                engine = self._engines[key] = create_db_engine(file_path, profile, **engine_options)
+            return engine
+
+    def session_factory(self, file_path, profile=DEFAULT_PROFILE) -> sessionmaker:
+        key = self._key(file_path)
+        engine = self.engine(file_path, profile)
+        with self._lock:
+            factory = self._session_factories.get(key)
+            if factory is None:
+                factory = self._session_factories[key] = sessionmaker(bind=engine)
+            return factory
+
+    def scoped_session(self, file_path, profile=DEFAULT_PROFILE) -> scoped_session:
+        # Für die Manager, die eine scoped_session erwarten (eine Session pro Thread)
+        key = self._key(file_path)
+        factory = self.session_factory(file_path, profile)
+        with self._lock:
+            session = self._scoped_sessions.get(key)
+            if session is None:
+                session = self._scoped_sessions[key] = scoped_session(factory)
+            return session
+
+    def write_queue(self, file_path, timeout: float = None) -> WriteQueue:
+        # Eine WriteQueue pro Datenbankdatei für alle Manager des Prozesses, timeout gilt ab dem ersten Aufruf
+        key = self._key(file_path)
+        with self._lock:
+            queue = self._write_queues.get(key)
+            if queue is None:
+                queue = self._write_queues[key] = WriteQueue(timeout)
+            return queue
+
+    def pool_stats(self):
+        with self._lock:
+            engines = dict(self._engines)
+        stats = {}
+        for key, engine in engines.items():
+            pool = engine.pool
+            stats[key] = {"pool": type(pool).__name__, "status": pool.status()}
+            if isinstance(pool, QueuePool):
+                stats[key].update(
+                    size=pool.size(),
+                    checked_in=pool.checkedin(),
+                    checked_out=pool.checkedout(),
+                    overflow=pool.overflow()
+                )
+        return stats
+
+    def dispose(self, file_path):
+        key = self._key(file_path)
+        with self._lock:
+            session = self._scoped_sessions.pop(key, None)
+            self._session_factories.pop(key, None)
+            self._write_queues.pop(key, None)
+            engine = self._engines.pop(key, None)
+        if session is not None:
+            session.remove()
+        if engine is not None:
+            engine.dispose()
+
+    def dispose_all(self):
+        # Shutdown-Hook: offene Sessions schliessen und alle Pools leeren, wird auch über atexit aufgerufen
+        with self._lock:
+            keys = list(self._engines)
+        for key in keys:
+            self.dispose(key)
+
+
+engine_registry = EngineRegistry()
+atexit.register(engine_registry.dispose_all)
@@ -0,0 +1,50 @@
+'''
+Anlegen, Befüllen und Entfernen des FTS5-Volltextindex search_fts. Tabelle und Trigger sind in data_models.models
+definiert und entstehen auch mit Base.metadata.create_all.
+'''
+from sqlalchemy import Connection
+
+from data_models.models import (
+    CONFIGURE_RANK, CREATE_FULL_TEXT_TABLE, FULL_TEXT_TABLE, FULL_TEXT_TRIGGERS, INSERT_FULL_TEXT_ROWS
+)
+
+
+def has_full_text_index(connection: Connection) -> bool:
+    query = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+    return connection.exec_driver_sql(query, (FULL_TEXT_TABLE,)).first() is not None
+
+
+def create_full_text_triggers(connection: Connection) -> None:
+    for name, body in FULL_TEXT_TRIGGERS.items():
+        connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_full_text_triggers(connection: Connection) -> None:
+    for name in FULL_TEXT_TRIGGERS:
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def fill_full_text_index(connection: Connection, first_room_id: int = None) -> None:
+    # Ohne first_room_id wird der ganze Index neu aufgebaut, sonst nur die Zimmer ab dieser id ergänzt
+    if first_room_id is None:
+        connection.exec_driver_sql(f"DELETE FROM {FULL_TEXT_TABLE}")
+        connection.exec_driver_sql(INSERT_FULL_TEXT_ROWS)
+    else:
+        connection.exec_driver_sql(f"{INSERT_FULL_TEXT_ROWS} WHERE room.id >= ?", (first_room_id,))
+    # Fasst die beim Befüllen entstandenen b-Trees zusammen
+    connection.exec_driver_sql(f"INSERT INTO {FULL_TEXT_TABLE}({FULL_TEXT_TABLE}) VALUES ('optimize')")
+
+
+def create_full_text_index(connection: Connection) -> None:
+    # Legt Tabelle und Trigger an, eine neu angelegte Tabelle wird aus den bestehenden Zimmern befüllt
+    existed = has_full_text_index(connection)
+    connection.exec_driver_sql(CREATE_FULL_TEXT_TABLE)
+    connection.exec_driver_sql(CONFIGURE_RANK)
+    create_full_text_triggers(connection)
+    if not existed:
+        fill_full_text_index(connection)
+
+
+def drop_full_text_index(connection: Connection) -> None:
+    drop_full_text_triggers(connection)
+    connection.exec_driver_sql(f"DROP TABLE IF EXISTS {FULL_TEXT_TABLE}")
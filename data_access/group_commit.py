@@ -0,0 +1,118 @@
+'''
+Group Commit: ein Writer-Thread nimmt Schreibaufträge vieler Aufrufer über eine Queue entgegen und führt alle, die
+innerhalb von max_delay Sekunden (oder bis max_batch Aufträge) eintreffen, in einer Transaktion mit einem Commit aus.
+Bei SQLite kostet jeder Commit ein fsync, unter Last teilen sich so viele Schreibzugriffe dasselbe fsync.
+'''
+import queue
+import time
+from concurrent.futures import Future
+from contextvars import copy_context
+from threading import Thread
+
+from data_access.write_transaction import WriteQueue, run_write_transaction
+
+_STOP = object()
+
+
+class GroupCommitWriter:
+    '''
+    Ein Auftrag ist eine Funktion work(session, *args, **kwargs), submit() liefert ein Future mit ihrem Resultat.
+    Jeder Auftrag läuft in einem eigenen SAVEPOINT: wirft er eine Exception, wird nur er zurückgerollt und sein Future
+    bekommt die Exception, die übrigen Aufträge der Gruppe werden trotzdem committet. Scheitert der Commit selbst,
+    bekommen alle Futures der Gruppe den Fehler.
+    Die Sessions des Writers laufen mit expire_on_commit=False, zurückgegebene ORM-Objekte bleiben nach dem Commit
+    lesbar. Sie sind aber von ihrer Session getrennt, Lazy Loads sind darauf nicht möglich.
+    '''
+
+    def __init__(self, session_factory, max_delay: float = 0.005, max_batch: int = 100,
+                 write_queue: WriteQueue = None):
+        self._session_factory = session_factory
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        # Optional dieselbe WriteQueue wie die Manager, die ohne Writer schreiben
+        self._write_queue = write_queue
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self.transactions = 0
+        self.operations = 0
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(target=self._run, name="GroupCommitWriter", daemon=True)
+            self._thread.start()
+        return self
+
+    def close(self):
+        # Führt die bereits eingereihten Aufträge noch aus und beendet dann den Thread
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def submit(self, work, *args, **kwargs) -> Future:
+        if self._thread is None:
+            raise RuntimeError("GroupCommitWriter is not started")
+        future = Future()
+        # Der Auftrag läuft im Kontext des Aufrufers, damit instrumentation seine Statements dem Aufruf zuordnet
+        self._queue.put((future, copy_context(), work, args, kwargs))
+        return future
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._commit([item for item in batch if item[0].set_running_or_notify_cancel()])
+
+    def _commit(self, batch):
+        if not batch:
+            return
+        try:
+            with self._session_factory(expire_on_commit=False) as session:
+                outcomes = run_write_transaction(
+                    session, lambda session: [self._apply(session, *item[1:]) for item in batch], self._write_queue
+                )
+        except Exception as error:
+            for future, *_ in batch:
+                future.set_exception(error)
+            return
+        self.transactions += 1
+        self.operations += len(batch)
+        for (future, *_), (ok, value) in zip(batch, outcomes):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    @staticmethod
+    def _apply(session, context, work, args, kwargs):
+        savepoint = session.begin_nested()
+        try:
+            result = context.run(work, session, *args, **kwargs)
+            savepoint.commit()
+            return True, result
+        except Exception as error:
+            if savepoint.is_active:
+                savepoint.rollback()
+            return False, error
@@ -0,0 +1,267 @@
+'''
+Anzahl SQL-Statements und Laufzeit pro Manager-Methode. instrument_methods umschliesst die öffentlichen Methoden einer
+Manager-Klasse, der laufende Aufruf steht in einer ContextVar (gilt pro Thread und pro asyncio-Task). Die Events
+before_cursor_execute/after_cursor_execute der Engines zählen jedes Statement und seine Zeit zum laufenden Aufruf.
+Verschachtelte Aufrufe zählen für sich und zusätzlich zum äusseren Aufruf, Statements ausserhalb eines Aufrufs
+werden nicht erfasst. Aufträge im GroupCommitWriter laufen im Kontext des Aufrufers, BEGIN und COMMIT der Gruppe
+gehören zu keinem Aufruf.
+
+Laufzeiten werden in logarithmische Buckets (Breite ~9%) einsortiert statt gespeichert, Speicher und Kosten pro Aufruf
+sind konstant. p50/p95/p99 sind die Obergrenze des Buckets, in dem das Perzentil liegt.
+
+Verwendung:
+    instrumentation.snapshot()              # MethodStats pro Methode
+    instrumentation.start_logging(60)       # alle 60 Sekunden eine Zeile im Logger data_access.instrumentation
+    instrumentation.enabled = False         # Methoden rufen direkt durch, Events zählen nichts mehr
+    with instrumentation.measure("HotelReservationApp.search_hotels"):   # UI-Aktion o.ä. als eigener Aufruf
+'''
+import functools
+import inspect
+import logging
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from threading import Lock, Event, Thread
+from typing import NamedTuple
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+HISTOGRAM_RATIO = 2 ** (1 / 8)
+_LOG_RATIO = math.log(HISTOGRAM_RATIO)
+_MIN_SECONDS = 1e-7
+
+_current = ContextVar("instrumented_call", default=None)
+
+
+class MethodStats(NamedTuple):
+    '''
+    Kennzahlen einer Manager-Methode seit dem Start bzw. reset(), Zeiten in Sekunden.
+    '''
+    name: str
+    calls: int
+    errors: int
+    statements: int
+    max_statements: int
+    sql_seconds: float
+    total_seconds: float
+    p50: float
+    p95: float
+    p99: float
+    max: float
+
+    @property
+    def statements_per_call(self) -> float:
+        return self.statements / self.calls if self.calls else 0.0
+
+
+class Histogram:
+    '''
+    Logarithmisches Histogramm: Bucket i enthält Werte zwischen HISTOGRAM_RATIO**i und HISTOGRAM_RATIO**(i+1).
+    '''
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.max = 0.0
+
+    def add(self, value):
+        bucket = math.floor(math.log(max(value, _MIN_SECONDS)) / _LOG_RATIO)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(HISTOGRAM_RATIO ** (bucket + 1), self.max)
+        return self.max
+
+
+class _Call:
+    __slots__ = ("name", "parent", "statements", "sql_seconds", "sql_started", "lazy_loads")
+
+    def __init__(self, name, parent):
+        self.name = name
+        self.parent = parent
+        self.statements = 0
+        self.sql_seconds = 0.0
+        self.sql_started = 0.0
+        # Lazy Loads pro Beziehung, nur mit data_access/n_plus_one.py
+        self.lazy_loads = None
+
+
+def current_call():
+    # Laufender Aufruf (mit name, statements, ...) oder None ausserhalb instrumentierter Methoden
+    return _current.get()
+
+
+class _Method:
+    __slots__ = ("calls", "errors", "statements", "max_statements", "sql_seconds", "total_seconds", "latency")
+
+    def __init__(self):
+        self.calls = self.errors = self.statements = self.max_statements = 0
+        self.sql_seconds = self.total_seconds = 0.0
+        self.latency = Histogram()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    call = _current.get()
+    if call is not None:
+        call.sql_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    call = _current.get()
+    if call is not None:
+        call.statements += 1
+        call.sql_seconds += time.perf_counter() - call.sql_started
+
+
+class Instrumentation:
+    '''
+    Sammelt MethodStats für alle mit instrument_methods bzw. instrumented versehenen Methoden.
+    '''
+
+    def __init__(self):
+        self.enabled = True
+        self._lock = Lock()
+        self._methods = {}
+        self._stop_logging = None
+
+    def instrument_engine(self, engine) -> None:
+        # Bei einer AsyncEngine die synchrone Engine übergeben (engine.sync_engine)
+        if not event.contains(engine, "after_cursor_execute", _after_cursor_execute):
+            event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+    def _enter(self, name):
+        call = _Call(name, _current.get())
+        return call, _current.set(call)
+
+    def _exit(self, name, call, token, started, failed):
+        seconds = time.perf_counter() - started
+        _current.reset(token)
+        parent = call.parent
+        if parent is not None:
+            parent.statements += call.statements
+            parent.sql_seconds += call.sql_seconds
+        with self._lock:
+            method = self._methods.get(name)
+            if method is None:
+                method = self._methods[name] = _Method()
+            method.calls += 1
+            method.errors += failed
+            method.statements += call.statements
+            if call.statements > method.max_statements:
+                method.max_statements = call.statements
+            method.sql_seconds += call.sql_seconds
+            method.total_seconds += seconds
+            method.latency.add(seconds)
+
+    def instrumented(self, function, name=None):
+        # Umschliesst eine Funktion oder Coroutine-Funktion, name ist der Schlüssel in snapshot()
+        name = name or function.__qualname__
+
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return await function(*args, **kwargs)
+                call, token = self._enter(name)
+                started, failed = time.perf_counter(), True
+                try:
+                    result = await function(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    self._exit(name, call, token, started, failed)
+        else:
+            @functools.wraps(function)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return function(*args, **kwargs)
+                call, token = self._enter(name)
+                started, failed = time.perf_counter(), True
+                try:
+                    result = function(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    self._exit(name, call, token, started, failed)
+        return wrapper
+
+    @contextmanager
+    def measure(self, name):
+        # Misst einen Block wie eine instrumentierte Methode, z.B. eine UI-Aktion mit mehreren Manager-Aufrufen
+        if not self.enabled:
+            yield None
+            return
+        call, token = self._enter(name)
+        started, failed = time.perf_counter(), True
+        try:
+            yield call
+            failed = False
+        finally:
+            self._exit(name, call, token, started, failed)
+
+    def instrument_methods(self, cls):
+        # Klassen-Dekorator für die Manager: alle öffentlichen Methoden der Klasse selbst, ohne geerbte
+        for attribute, value in list(vars(cls).items()):
+            if not attribute.startswith("_") and inspect.isfunction(value):
+                setattr(cls, attribute, self.instrumented(value, f"{cls.__name__}.{attribute}"))
+        return cls
+
+    def snapshot(self):
+        # Liefert {name: MethodStats}, sortiert nach gesamter Laufzeit absteigend
+        with self._lock:
+            stats = [
+                MethodStats(name, method.calls, method.errors, method.statements, method.max_statements,
+                            method.sql_seconds, method.total_seconds, method.latency.percentile(0.5),
+                            method.latency.percentile(0.95), method.latency.percentile(0.99), method.latency.max)
+                for name, method in self._methods.items()
+            ]
+        return {stat.name: stat for stat in sorted(stats, key=lambda stat: stat.total_seconds, reverse=True)}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._methods.clear()
+
+    def log_line(self, top=10) -> str:
+        parts = [
+            f"{stat.name} n={stat.calls} p50={stat.p50 * 1000:.1f}ms p95={stat.p95 * 1000:.1f}ms "
+            f"p99={stat.p99 * 1000:.1f}ms sql={stat.statements_per_call:.1f}/call"
+            + (f" errors={stat.errors}" if stat.errors else "")
+            for stat in list(self.snapshot().values())[:top]
+        ]
+        return "manager calls: " + ("; ".join(parts) if parts else "none")
+
+    def start_logging(self, interval=60.0, top=10) -> None:
+        # Schreibt alle interval Sekunden log_line() mit logging.INFO, läuft als Daemon-Thread
+        if self._stop_logging is not None:
+            return
+        stop = self._stop_logging = Event()
+
+        def run():
+            while not stop.wait(interval):
+                logger.info(self.log_line(top))
+
+        Thread(target=run, name="instrumentation-log", daemon=True).start()
+
+    def stop_logging(self) -> None:
+        if self._stop_logging is not None:
+            self._stop_logging.set()
+            self._stop_logging = None
+
+
+instrumentation = Instrumentation()
+instrument_methods = instrumentation.instrument_methods
+instrumented = instrumentation.instrumented
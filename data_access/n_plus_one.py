@@ -0,0 +1,114 @@
+'''
+Erkennung von N+1-Abfragen für Entwicklung und Tests. Jeder Lazy Load, der SQL absetzt, wird der laufenden
+Manager-Methode bzw. dem mit instrumentation.measure() gemessenen Block zugeordnet (data_access/instrumentation.py).
+Lädt ein Aufruf dieselbe Beziehung threshold Mal lazy nach, wird mit Beziehung und Aufrufstelle gewarnt
+(NPlusOneWarning) oder abgebrochen (NPlusOneError). Mit raise_on_sql=True bricht schon der erste Lazy Load mit SQL
+ab, auch ausserhalb eines Aufrufs, wie lazy="raise_on_sql" für alle Beziehungen. Lazy Loads aus der Identity Map
+setzen kein SQL ab und zählen nicht.
+
+Einschalten im Code mit n_plus_one.enable(threshold=3, action="warn") oder beim Import über die Umgebungsvariable
+HOTEL_N_PLUS_ONE=warn|raise|raise_on_sql (Schwelle in HOTEL_N_PLUS_ONE_THRESHOLD), z.B.:
+    HOTEL_N_PLUS_ONE=raise python -m benchmarks.booking_list
+'''
+import os
+import sys
+import warnings
+from pathlib import Path
+
+import sqlalchemy
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from data_access.instrumentation import current_call
+
+ACTIONS = ("warn", "raise")
+DEFAULT_THRESHOLD = 3
+
+_SKIPPED_PATHS = (str(Path(sqlalchemy.__file__).parent), str(Path(__file__).parent / "instrumentation.py"), __file__)
+
+
+class NPlusOneWarning(UserWarning):
+    pass
+
+
+class NPlusOneError(RuntimeError):
+    pass
+
+
+def call_site():
+    # Erste Stelle im Stack ausserhalb von SQLAlchemy und der Instrumentierung: (Datei, Zeile, Funktion)
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.startswith(_SKIPPED_PATHS) and not filename.startswith("<"):
+            return filename, frame.f_lineno, frame.f_code.co_name
+        frame = frame.f_back
+    return "<unknown>", 0, "<unknown>"
+
+
+class NPlusOneDetector:
+    '''
+    Zählt SQL-Lazy-Loads pro Aufruf und Beziehung über den ORM-Event do_orm_execute aller Sessions.
+    '''
+
+    def __init__(self):
+        self.enabled = False
+        self.threshold = DEFAULT_THRESHOLD
+        self.action = "warn"
+        self.raise_on_sql = False
+
+    def enable(self, threshold=DEFAULT_THRESHOLD, action="warn", raise_on_sql=False):
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action {action}, use one of {', '.join(ACTIONS)}")
+        self.threshold, self.action, self.raise_on_sql = threshold, action, raise_on_sql
+        if not self.enabled:
+            event.listen(Session, "do_orm_execute", self._on_execute)
+            self.enabled = True
+        return self
+
+    def disable(self):
+        if self.enabled:
+            event.remove(Session, "do_orm_execute", self._on_execute)
+            self.enabled = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.disable()
+
+    def _on_execute(self, orm_execute_state):
+        if orm_execute_state.lazy_loaded_from is None:
+            return
+        relationship = str(orm_execute_state.loader_strategy_path.prop)
+        if self.raise_on_sql:
+            filename, line, function = call_site()
+            raise NPlusOneError(f"lazy load of {relationship} emits SQL at {filename}:{line} in {function}")
+        call = current_call()
+        if call is None:
+            return
+        if call.lazy_loads is None:
+            call.lazy_loads = {}
+        count = call.lazy_loads[relationship] = call.lazy_loads.get(relationship, 0) + 1
+        if count != self.threshold:
+            return
+        filename, line, function = call_site()
+        message = (f"N+1 queries in {call.name}: {relationship} lazy loaded {count} times, at {filename}:{line} in "
+                   f"{function}. Load it with joinedload/selectinload.")
+        if self.action == "raise":
+            raise NPlusOneError(message)
+        warnings.warn_explicit(message, NPlusOneWarning, filename, line)
+
+
+def enable_from_environment(detector):
+    mode = os.environ.get("HOTEL_N_PLUS_ONE")
+    if mode:
+        threshold = int(os.environ.get("HOTEL_N_PLUS_ONE_THRESHOLD", DEFAULT_THRESHOLD))
+        if mode == "raise_on_sql":
+            detector.enable(threshold, "raise", raise_on_sql=True)
+        else:
+            detector.enable(threshold, mode)
+
+
+n_plus_one = NPlusOneDetector()
+enable_from_environment(n_plus_one)
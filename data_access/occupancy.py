@@ -0,0 +1,84 @@
+'''
+Belegungskalender room_night: Nachführen, Neuaufbau und Konsistenzprüfung gegen booking.
+Die Tabelle und ihre Trigger sind in data_models.models deklariert und entstehen mit create_all.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m data_access.occupancy ./data/database.db [--repair]
+'''
+import argparse
+import sys
+
+from sqlalchemy import Connection
+
+from data_models.models import ROOM_NIGHTS_OF_BOOKING, ROOM_NIGHT_TRIGGERS
+
+_EXPECTED = f"SELECT * FROM ({ROOM_NIGHTS_OF_BOOKING})"
+_ACTUAL = "SELECT room_id, night, booking_id FROM room_night"
+
+
+def create_room_night_triggers(connection: Connection) -> None:
+    for name, body in ROOM_NIGHT_TRIGGERS.items():
+        connection.exec_driver_sql(f"CREATE TRIGGER IF NOT EXISTS {name} {body}")
+
+
+def drop_room_night_triggers(connection: Connection) -> None:
+    for name in ROOM_NIGHT_TRIGGERS:
+        connection.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+
+
+def fill_room_nights(connection: Connection, first_booking_id: int = None) -> None:
+    # Ohne first_booking_id wird die ganze Tabelle neu aufgebaut, sonst nur die Buchungen ab dieser id ergänzt
+    if first_booking_id is None:
+        connection.exec_driver_sql("DELETE FROM room_night")
+        connection.exec_driver_sql(f"INSERT INTO room_night(room_id, night, booking_id) {ROOM_NIGHTS_OF_BOOKING}")
+    else:
+        connection.exec_driver_sql(
+            f"INSERT INTO room_night(room_id, night, booking_id) {ROOM_NIGHTS_OF_BOOKING} WHERE booking.id >= ?",
+            (first_booking_id,)
+        )
+
+
+def check_room_nights(connection: Connection, sample: int = 10) -> dict:
+    # Vergleicht room_night mit den aus booking abgeleiteten Zeilen, liefert die Anzahlen und einige Beispiele
+    report = {}
+    for name, left, right in (("missing", _EXPECTED, _ACTUAL), ("extra", _ACTUAL, _EXPECTED)):
+        difference = f"{left} EXCEPT {right}"
+        report[name] = connection.exec_driver_sql(f"SELECT count(*) FROM ({difference})").scalar()
+        report[f"{name}_sample"] = connection.exec_driver_sql(f"{difference} LIMIT ?", (sample,)).all()
+    return report
+
+
+def rebuild_room_nights(connection: Connection) -> dict:
+    # Baut room_night aus booking neu auf, falls die Prüfung Abweichungen findet
+    report = check_room_nights(connection)
+    if report["missing"] or report["extra"]:
+        fill_room_nights(connection)
+    return report
+
+
+def main():
+    # Import hier, damit data_access.data_base dieses Modul ohne Zyklus importieren kann
+    from data_access.data_base import create_db_engine
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_file")
+    parser.add_argument("--repair", action="store_true", help="room_night bei Abweichungen neu aufbauen")
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.db_file)
+    with engine.begin() as connection:
+        report = rebuild_room_nights(connection) if args.repair else check_room_nights(connection)
+    engine.dispose()
+
+    for name in ("missing", "extra"):
+        print(f"{name}: {report[name]}")
+        for row in report[f"{name}_sample"]:
+            print(f"    room_id={row[0]} night={row[1]} booking_id={row[2]}")
+    if report["missing"] or report["extra"]:
+        print("room_night was rebuilt from booking." if args.repair else "room_night is not consistent with booking.")
+        sys.exit(0 if args.repair else 1)
+    print("room_night is consistent with booking.")
+
+
+if __name__ == "__main__":
+    main()
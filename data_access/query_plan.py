@@ -0,0 +1,114 @@
+'''
+EXPLAIN QUERY PLAN Report für die häufigsten Abfragen von SearchManager und ReservationManager.
+Die Manager-Methoden werden gegen eine bestehende Datenbank ausgeführt, jedes dabei abgesetzte SQL-Statement wird
+mitgeschnitten und mit EXPLAIN QUERY PLAN geprüft. Ein "SCAN <tabelle>" ohne Index gilt als Full Table Scan.
+
+Aufruf aus dem Projektverzeichnis:
+    python -m data_access.query_plan ./data/database.db [--upgrade]
+'''
+import argparse
+import io
+import sys
+from collections import namedtuple
+from contextlib import contextmanager, redirect_stdout
+from datetime import date, timedelta
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import sessionmaker, scoped_session
+
+from data_access.data_base import upgrade_db, create_db_engine
+from data_models.models import Address, Hotel, Room
+
+QueryPlan = namedtuple("QueryPlan", ["name", "statement", "plan", "full_scans"])
+
+
+@contextmanager
+def capture_statements(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def explain_query_plan(connection, statement, parameters=()):
+    rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    return [row[3] for row in rows]
+
+
+def full_table_scans(plan):
+    return [line for line in plan if line.startswith("SCAN ") and " USING " not in line]
+
+
+def hot_queries(session):
+    # Importe hier, damit data_access nicht schon beim Laden vom business-Paket abhängt
+    from business.ReservationManager import ReservationManager
+    from business.SearchManager import SearchManager
+
+    hotel_id, room_number, city = session.execute(
+        select(Room.hotel_id, Room.number, Address.city).select_from(Room).join(Room.hotel).join(Hotel.address).limit(1)
+    ).one()
+    hotel = session.get(Hotel, hotel_id)
+    start_date = date.today()
+    end_date = start_date + timedelta(days=3)
+
+    search_manager = SearchManager(session)
+    reservation_manager = ReservationManager(session)
+    return {
+        "SearchManager.search_hotels_by_city_date_guests_stars":
+            lambda: search_manager.search_hotels_by_city_date_guests_stars(city, start_date, end_date, 1, None),
+        "SearchManager.search_rooms_by_availability":
+            lambda: search_manager.search_rooms_by_availability(start_date, end_date, hotel, 1),
+        "SearchManager.get_rooms_by_hotel":
+            lambda: search_manager.get_rooms_by_hotel(hotel_id, 1),
+        "SearchManager.get_hotels_by_name":
+            lambda: search_manager.get_hotels_by_name(hotel.name),
+        "ReservationManager.is_room_available":
+            lambda: reservation_manager.is_room_available(room_number, hotel_id, start_date, end_date),
+    }
+
+
+def query_plan_report(engine):
+    session = scoped_session(sessionmaker(bind=engine))
+    plans = []
+    try:
+        for name, run in hot_queries(session).items():
+            # Identity Map leeren, damit auch Lazy Loads wie im Betrieb abgesetzt werden
+            session.expunge_all()
+            with capture_statements(engine) as statements, redirect_stdout(io.StringIO()):
+                run()
+            with engine.connect() as connection:
+                for statement, parameters in statements:
+                    plan = explain_query_plan(connection, statement, parameters)
+                    plans.append(QueryPlan(name, statement, plan, full_table_scans(plan)))
+    finally:
+        session.remove()
+    return plans
+
+
+def print_report(plans):
+    for plan in plans:
+        status = "FULL SCAN" if plan.full_scans else "OK"
+        print(f"[{status}] {plan.name}")
+        print(f"    {' '.join(plan.statement.split())}")
+        for line in plan.plan:
+            print(f"        {line}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("db_file")
+    parser.add_argument("--upgrade", action="store_true", help="fehlende Indizes vor dem Report anlegen")
+    args = parser.parse_args()
+
+    engine = create_db_engine(args.db_file)
+    if args.upgrade:
+        upgrade_db(engine)
+    plans = query_plan_report(engine)
+    print_report(plans)
+    sys.exit(1 if any(plan.full_scans for plan in plans) else 0)
@@ -0,0 +1,126 @@
+'''
+Schreibtransaktionen ohne Race Conditions: Prüfen und Schreiben laufen in einer Transaktion, die mit
+BEGIN IMMEDIATE die Schreibsperre der Datenbank sofort holt. Zwei Prozesse können so nicht beide dasselbe Zimmer als
+frei sehen und buchen. Ist die Datenbank länger als busy_timeout gesperrt, wird mit Backoff wiederholt.
+'''
+import random
+import sqlite3
+import time
+from threading import Lock
+
+from sqlalchemy import event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import scoped_session
+
+# Execution-Option für Session.connection() bzw. Connection.execution_options(), siehe listen_begin
+BEGIN_IMMEDIATE = {"sqlite_begin": "IMMEDIATE"}
+
+# Standardwerte für Wiederholungen nach SQLITE_BUSY, zusätzlich zum Warten von busy_timeout in SQLite selbst
+WRITE_RETRIES = 8
+WRITE_BACKOFF = 0.01
+WRITE_MAX_BACKOFF = 0.5
+
+_BUSY_CODES = {sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED}
+
+
+def listen_begin(engine) -> None:
+    # pysqlite beginnt eine Transaktion erst vor dem ersten Schreiben (DEFERRED). Mit der Execution-Option
+    # sqlite_begin wird BEGIN selbst abgesetzt, pysqlite erkennt die offene Transaktion und beginnt keine zweite.
+    def on_begin(connection):
+        mode = connection.get_execution_options().get("sqlite_begin")
+        if mode:
+            connection.exec_driver_sql(f"BEGIN {mode}")
+
+    event.listen(engine, "begin", on_begin)
+
+
+def is_busy_error(error) -> bool:
+    orig = getattr(error, "orig", error)
+    if not isinstance(orig, sqlite3.OperationalError):
+        return False
+    code = getattr(orig, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xff in _BUSY_CODES
+    return "database is locked" in str(orig) or "database table is locked" in str(orig)
+
+
+def backoff_delays(retries: int, backoff: float, max_backoff: float):
+    # Exponentiell wachsende Wartezeiten mit Jitter, damit wiederholende Schreiber nicht gleichzeitig aufwachen
+    for attempt in range(retries):
+        yield random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+
+class WriteQueue:
+    '''
+    Serialisiert die Schreiber eines Prozesses: Threads warten hier in Ankunftsreihenfolge, statt gleichzeitig um die
+    Schreibsperre von SQLite zu konkurrieren und in busy_timeout oder Retries zu laufen. Mit timeout wartet ein
+    Schreiber höchstens so viele Sekunden und bekommt sonst einen TimeoutError.
+    '''
+
+    def __init__(self, timeout: float = None):
+        self.timeout = timeout
+        self._lock = Lock()
+        self._waiting = []
+
+    def __enter__(self):
+        # Ticket-Lock: jeder Schreiber wartet auf ein eigenes Lock, das sein Vorgänger beim Verlassen freigibt
+        ticket = Lock()
+        ticket.acquire()
+        with self._lock:
+            self._waiting.append(ticket)
+            first = len(self._waiting) == 1
+        if first:
+            return self
+        if not ticket.acquire(timeout=-1 if self.timeout is None else self.timeout):
+            with self._lock:
+                if self._waiting[0] is not ticket:
+                    self._waiting.remove(ticket)
+                    raise TimeoutError(f"no write slot within {self.timeout} s")
+            # Der Vorgänger hat das Lock nach dem Timeout noch freigegeben, der Schreiber ist an der Reihe
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._lock:
+            self._waiting.pop(0)
+            if self._waiting:
+                self._waiting[0].release()
+
+    def __len__(self):
+        # Anzahl Schreiber, die gerade schreiben oder warten
+        with self._lock:
+            return len(self._waiting)
+
+
+def run_write_transaction(session, work, write_queue: WriteQueue = None, retries: int = WRITE_RETRIES,
+                          backoff: float = WRITE_BACKOFF, max_backoff: float = WRITE_MAX_BACKOFF):
+    # Führt work(session) in einer BEGIN IMMEDIATE Transaktion aus und committet. Eine bereits offene Transaktion der
+    # Session wird vorher committet, wie es der Commit am Ende ohnehin täte. Bei SQLITE_BUSY wird die ganze
+    # Transaktion nach einer Wartezeit wiederholt, work muss daher wiederholbar sein.
+    if isinstance(session, scoped_session):
+        # Die Einstiegspunkte übergeben die scoped_session aus engine_registry, sie hat kein in_transaction()
+        session = session()
+    delays = backoff_delays(retries, backoff, max_backoff)
+    while True:
+        try:
+            if write_queue is not None:
+                with write_queue:
+                    return _run_once(session, work)
+            return _run_once(session, work)
+        except OperationalError as error:
+            delay = next(delays, None)
+            if delay is None or not is_busy_error(error):
+                raise
+            time.sleep(delay)
+
+
+def _run_once(session, work):
+    if session.in_transaction():
+        session.commit()
+    try:
+        session.connection(execution_options=BEGIN_IMMEDIATE)
+        result = work(session)
+        session.commit()
+        return result
+    except Exception:
+        session.rollback()
+        raise
@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import date
 
 from typing import List
-from sqlalchemy import ForeignKey, ForeignKeyConstraint
+from sqlalchemy import ForeignKey, ForeignKeyConstraint, Index, DDL, func, event, select, insert, inspect, literal
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import Mapped
 from sqlalchemy.orm import mapped_column
@@ -11,6 +11,14 @@ from sqlalchemy.orm import relationship
 from sqlalchemy.ext.hybrid import hybrid_property
 
 
+def loaded_repr(obj, *names) -> str:
+    # Liest nur bereits geladene Werte aus obj.__dict__: ein repr setzt nie eine Abfrage ab, weder für Beziehungen
+    # noch für abgelaufene Attribute nach einem Commit. Beziehungen erscheinen über ihre Fremdschlüssel.
+    values = obj.__dict__
+    fields = ", ".join(f"{name}={values[name]!r}" if name in values else f"{name}=<not loaded>" for name in names)
+    return f"{type(obj).__name__}({fields})"
+
+
 class Base(DeclarativeBase):
     '''
     Basis Klasse für unser Model. Daraus kann SQLAlchemy herleiten welche Klassen zu unserem Modell gehören.
@@ -29,8 +37,17 @@ class Address(Base):
     zip: Mapped[str] = mapped_column("zip")
     city: Mapped[str] = mapped_column("city")
 
+    __table_args__ = (
+        # Adress-Lookup beim Hinzufügen von Hotels (filter_by(street, zip, city))
+        Index("ix_address_street_zip_city", "street", "zip", "city"),
+    )
+
     def __repr__(self) -> str:
-        return f"Address(id={self.id!r}, street={self.street!r}, city={self.city!r}, zip={self.zip!r})"
+        return loaded_repr(self, "id", "street", "city", "zip")
+
+
+# Ausdrucks-Index für die Suche nach Stadt mit func.lower(Address.city) == city.lower()
+Index("ix_address_city_lower", func.lower(Address.city))
 
 
 class Role(Base):
@@ -41,7 +58,7 @@ class Role(Base):
     access_level: Mapped[int] = mapped_column()
 
     def __repr__(self) -> str:
-        return f"Role(id={self.id!r}, name={self.name!r}, access_level={self.access_level!r})"
+        return loaded_repr(self, "id", "name", "access_level")
 
 
 class Login(Base):
@@ -54,7 +71,7 @@ class Login(Base):
     role: Mapped[Role] = relationship()
 
     def __repr__(self):
-        return f"Login(id={self.id!r}, username={self.username!r}, password={self.password!r}, role={self.role!r})"
+        return loaded_repr(self, "id", "username", "password", "role_id")
 
 
 class Guest(Base):
@@ -66,7 +83,7 @@ class Guest(Base):
     id: Mapped[int] = mapped_column("id", primary_key=True)
     firstname: Mapped[str] = mapped_column("firstname")
     lastname: Mapped[str] = mapped_column("lastname")
-    email: Mapped[str] = mapped_column("email")
+    email: Mapped[str] = mapped_column("email", index=True)
     address_id: Mapped[int] = mapped_column("address_id", ForeignKey("address.id"))
     address: Mapped["Address"] = relationship()
     bookings: Mapped[List["Booking"]] = relationship(back_populates="guest")
@@ -78,7 +95,7 @@ class Guest(Base):
     }
 
     def __repr__(self) -> str:
-        return f"Guest(id={self.id!r}, firstname={self.firstname!r}, lastname={self.lastname!r}, address={self.address!r})"
+        return loaded_repr(self, "id", "firstname", "lastname", "address_id")
 
 
 class RegisteredGuest(Guest):
@@ -96,7 +113,7 @@ class RegisteredGuest(Guest):
     }
 
     def __repr__(self) -> str:
-        return f"RegisteredGuest(id={self.id!r}, firstname={self.firstname!r}, lastname={self.lastname!r}, email={self.email!r}, address={self.address!r})"
+        return loaded_repr(self, "id", "firstname", "lastname", "email", "address_id", "login_id")
 
 
 class Hotel(Base):
@@ -106,14 +123,14 @@ class Hotel(Base):
     __tablename__ = "hotel"
 
     id: Mapped[int] = mapped_column("id", primary_key=True)
-    name: Mapped[str] = mapped_column("name")
+    name: Mapped[str] = mapped_column("name", index=True)
     stars: Mapped[int] = mapped_column("stars", default=0)
-    address_id: Mapped[int] = mapped_column("address_id", ForeignKey("address.id"))
+    address_id: Mapped[int] = mapped_column("address_id", ForeignKey("address.id"), index=True)
     address: Mapped["Address"] = relationship()
     rooms: Mapped[List["Room"]] = relationship(back_populates="hotel")
 
     def __repr__(self) -> str:
-        return f"Hotel(id={self.id!r}, name={self.name!r}, stars={self.stars}, address={self.address})"
+        return loaded_repr(self, "id", "name", "stars", "address_id")
 
 
 class Room(Base):
@@ -130,10 +147,90 @@ class Room(Base):
     max_guests: Mapped[int] = mapped_column("max_guests")
     description: Mapped[str] = mapped_column("description", nullable=True) # e.g. "Room with sea view"
     amenities: Mapped[str] = mapped_column("amenities", nullable=True)
+    # Bit amenity.bit ist gesetzt, wenn das Zimmer die Ausstattung hat. Wird beim Flush aus amenities berechnet.
+    amenity_mask: Mapped[int] = mapped_column("amenity_mask", default=0, server_default="0")
     price: Mapped[float] = mapped_column("price")
 
+    __table_args__ = (
+        # Deckt den Join über hotel_id und den zusammengesetzten Fremdschlüssel von booking ab
+        Index("ix_room_hotel_id_number", "hotel_id", "number"),
+    )
+
+    def __repr__(self) -> str:
+        return loaded_repr(self, "id", "hotel_id", "number", "type", "max_guests", "description", "amenities", "price")
+
+
+class Amenity(Base):
+    '''
+    Ausstattung Entitätstyp. Jede Ausstattung belegt ein Bit in Room.amenity_mask.
+    '''
+    __tablename__ = "amenity"
+
+    id: Mapped[int] = mapped_column("id", primary_key=True)
+    name: Mapped[str] = mapped_column("name")
+    bit: Mapped[int] = mapped_column("bit", unique=True)
+
+    @hybrid_property
+    def mask(self) -> int:
+        return 1 << self.bit
+
+    @mask.inplace.expression
+    @classmethod
+    def _mask_expression(cls):
+        return literal(1).op("<<")(cls.bit)
+
     def __repr__(self) -> str:
-        return f"Room(hotel={self.hotel!r}, room_number={self.number!r}, type={self.type!r}, max_guests={self.max_guests!r}, description={self.description!r}, amenities={self.amenities!r}, price={self.price!r})"
+        return loaded_repr(self, "id", "name", "bit")
+
+
+# Gross-/Kleinschreibung spielt beim Namen keine Rolle ("TV" und "tv" sind dieselbe Ausstattung)
+Index("ix_amenity_name_lower", func.lower(Amenity.name), unique=True)
+
+# SQLite rechnet mit 64-Bit Integer mit Vorzeichen, Bit 63 bleibt frei
+MAX_AMENITIES = 63
+
+
+def parse_amenities(amenities) -> List[str]:
+    # "TV, Caffe Machine" oder eine Liste von Namen, doppelte Einträge werden ohne Gross-/Kleinschreibung erkannt
+    if not amenities:
+        return []
+    if isinstance(amenities, str):
+        amenities = amenities.split(",")
+    names = {}
+    for name in amenities:
+        name = name.strip()
+        if name:
+            names.setdefault(name.lower(), name)
+    return list(names.values())
+
+
+def amenity_mask(connection, amenities) -> int:
+    # Berechnet die Bitmaske und legt dabei noch unbekannte Ausstattungen mit dem nächsten freien Bit an
+    names = parse_amenities(amenities)
+    if not names:
+        return 0
+    table = Amenity.__table__
+    bits = dict(connection.execute(
+        select(func.lower(table.c.name), table.c.bit).where(func.lower(table.c.name).in_([n.lower() for n in names]))
+    ).all())
+    for name in names:
+        if name.lower() not in bits:
+            bit = connection.execute(select(func.coalesce(func.max(table.c.bit), -1) + 1)).scalar()
+            if bit >= MAX_AMENITIES:
+                raise ValueError(f"Too many amenities, {name!r} does not fit into amenity_mask")
+            connection.execute(insert(table).values(name=name, bit=bit))
+            bits[name.lower()] = bit
+    mask = 0
+    for bit in bits.values():
+        mask |= 1 << bit
+    return mask
+
+
+@event.listens_for(Room, "before_insert")
+@event.listens_for(Room, "before_update")
+def _update_amenity_mask(mapper, connection, room):
+    if room.amenity_mask is None or inspect(room).attrs.amenities.history.has_changes():
+        room.amenity_mask = amenity_mask(connection, room.amenities)
 
 
 class Booking(Base):
@@ -146,7 +243,7 @@ class Booking(Base):
     room_hotel_id: Mapped[int] = mapped_column("room_hotel_id")
     room_number: Mapped[str] = mapped_column("room_number")
     room: Mapped["Room"] = relationship()
-    guest_id: Mapped[int] = mapped_column("guest_id", ForeignKey("guest.id"))
+    guest_id: Mapped[int] = mapped_column("guest_id", ForeignKey("guest.id"), index=True)
     guest: Mapped["Guest"] = relationship(back_populates="bookings")
     number_of_guests: Mapped[int] = mapped_column("number_of_guests")
     start_date: Mapped[date] = mapped_column("start_date")
@@ -158,8 +255,219 @@ class Booking(Base):
             ['room_hotel_id', 'room_number'],
             ['room.hotel_id', 'room.number'],
         ),
+        # Buchungen eines Zimmers in einem Zeitraum (OccupancyMatrix, Join über den Fremdschlüssel auf room).
+        # Belegte Zimmer suchen is_room_available und SearchManager über room_night, reine Datums-Indizes auf booking
+        # (früher ix_booking_start_date, ix_booking_end_date) benutzt keine Abfrage mehr, upgrade_db entfernt sie.
+        Index("ix_booking_room_dates", "room_hotel_id", "room_number", "start_date", "end_date"),
     )
 
     def __repr__(self) -> str:
-        return f"Booking(room={self.room!r}, guest={self.guest!r}, start_date={self.start_date!r}, end_date={self.end_date!r}, comment={self.comment!r})"
+        return loaded_repr(self, "id", "room_hotel_id", "room_number", "guest_id", "number_of_guests", "start_date",
+                           "end_date", "comment")
 
+
+
+class RoomNight(Base):
+    '''
+    Belegung eines Zimmers pro Tag, abgeleitet aus booking. Wie bei der Überschneidungsprüfung zählen Start- und
+    Enddatum einer Buchung beide als belegt. Die Trigger auf booking (ROOM_NIGHT_TRIGGERS) halten die Tabelle aktuell.
+    '''
+    __tablename__ = "room_night"
+
+    room_id: Mapped[int] = mapped_column("room_id", ForeignKey("room.id"), primary_key=True)
+    night: Mapped[date] = mapped_column("night", primary_key=True)
+    booking_id: Mapped[int] = mapped_column("booking_id", ForeignKey("booking.id"), primary_key=True)
+
+    __table_args__ = (
+        # Nachführen bei Änderung oder Löschung einer Buchung
+        Index("ix_room_night_booking_id", "booking_id"),
+        # Ohne rowid liegen die Zeilen direkt im Primärschlüssel, eine Zeitraumabfrage ist ein Range-Scan
+        {"sqlite_with_rowid": False},
+    )
+
+    def __repr__(self) -> str:
+        return loaded_repr(self, "room_id", "night", "booking_id")
+
+
+class CalendarNight(Base):
+    '''
+    Alle Tage von CALENDAR_START bis CALENDAR_END. Die Trigger von room_night zerlegen damit eine Buchung in einzelne
+    Tage, da SQLite in Triggern keine rekursiven CTEs erlaubt.
+    '''
+    __tablename__ = "calendar"
+
+    night: Mapped[date] = mapped_column("night", primary_key=True)
+
+    __table_args__ = {"sqlite_with_rowid": False}
+
+
+CALENDAR_START = date(2000, 1, 1)
+CALENDAR_END = date(2099, 12, 31)
+
+# Zimmer und Tage einer Buchung, NEW wird im Trigger durch die neue Zeile ersetzt
+ROOM_NIGHTS_OF_BOOKING = """
+    SELECT room.id, calendar.night, booking.id
+    FROM booking
+    JOIN room ON room.hotel_id = booking.room_hotel_id AND room.number = booking.room_number
+    JOIN calendar ON calendar.night BETWEEN booking.start_date AND booking.end_date
+"""
+
+_INSERT_ROOM_NIGHTS = f"""
+    SELECT RAISE(ABORT, 'booking dates outside of calendar')
+    WHERE NEW.start_date < '{CALENDAR_START}' OR NEW.end_date > '{CALENDAR_END}';
+    INSERT INTO room_night(room_id, night, booking_id) {ROOM_NIGHTS_OF_BOOKING} WHERE booking.id = NEW.id;
+"""
+
+ROOM_NIGHT_TRIGGERS = {
+    "booking_room_night_insert": f"""
+        AFTER INSERT ON booking BEGIN
+            {_INSERT_ROOM_NIGHTS}
+        END
+    """,
+    "booking_room_night_update": f"""
+        AFTER UPDATE OF id, room_hotel_id, room_number, start_date, end_date ON booking BEGIN
+            DELETE FROM room_night WHERE booking_id = OLD.id;
+            {_INSERT_ROOM_NIGHTS}
+        END
+    """,
+    "booking_room_night_delete": """
+        AFTER DELETE ON booking BEGIN
+            DELETE FROM room_night WHERE booking_id = OLD.id;
+        END
+    """,
+}
+
+
+class CatalogVersion(Base):
+    '''
+    Versionszähler des Katalogs (Hotels, Adressen, Zimmer) in einer einzigen Zeile mit id 1. Die Trigger
+    CATALOG_TRIGGERS erhöhen ihn bei jeder Änderung, Buchungen ändern ihn nicht. business/CatalogSnapshot.py lädt den
+    Katalog nur neu, wenn sich die Version geändert hat.
+    '''
+    __tablename__ = "catalog_version"
+
+    id: Mapped[int] = mapped_column("id", primary_key=True)
+    version: Mapped[int] = mapped_column("version", default=0)
+
+
+CATALOG_TRIGGERS = {
+    f"{_table}_catalog_version_{_event.lower()}": f"""
+        AFTER {_event} ON {_table} BEGIN
+            UPDATE catalog_version SET version = version + 1 WHERE id = 1;
+        END
+    """
+    for _table in ("hotel", "address", "room") for _event in ("INSERT", "UPDATE", "DELETE")
+}
+
+# FTS5-Volltextindex über Hotelname, Stadt, Zimmertyp, Beschreibung und Ausstattung, eine Zeile pro Zimmer mit
+# rowid = room.id. Die Trigger FULL_TEXT_TRIGGERS auf room, hotel und address halten ihn bei jeder Änderung nachgeführt,
+# auch bei Core-Inserts und Updates ohne ORM. Befüllen und Neuaufbau: data_access/full_text_index.py
+FULL_TEXT_TABLE = "search_fts"
+
+# unicode61 mit remove_diacritics: "zurich" findet "Zürich". Die Präfix-Indizes beschleunigen Suchen wie "que*".
+CREATE_FULL_TEXT_TABLE = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS {FULL_TEXT_TABLE} USING fts5(
+    hotel_name, city, room_type, description, amenities,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+# Gewichtung für bm25 in der Reihenfolge der Spalten, ein Treffer im Hotelnamen zählt am meisten.
+# Die Einstellung wird in der Datenbank gespeichert und gilt für ORDER BY rank.
+CONFIGURE_RANK = (
+    f"INSERT INTO {FULL_TEXT_TABLE}({FULL_TEXT_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 5.0, 3.0, 1.0, 1.0)')"
+)
+
+INSERT_FULL_TEXT_ROWS = f"""
+INSERT INTO {FULL_TEXT_TABLE}(rowid, hotel_name, city, room_type, description, amenities)
+SELECT room.id, hotel.name, address.city, room.type, room.description, room.amenities
+FROM room
+LEFT JOIN hotel ON hotel.id = room.hotel_id
+LEFT JOIN address ON address.id = hotel.address_id
+"""
+
+_UPDATE_HOTEL = f"""
+    UPDATE {FULL_TEXT_TABLE}
+    SET hotel_name = NEW.name, city = (SELECT city FROM address WHERE address.id = NEW.address_id)
+    WHERE rowid IN (SELECT id FROM room WHERE room.hotel_id = NEW.id);
+"""
+
+FULL_TEXT_TRIGGERS = {
+    "room_fts_insert": f"""
+        AFTER INSERT ON room BEGIN
+            {INSERT_FULL_TEXT_ROWS} WHERE room.id = NEW.id;
+        END
+    """,
+    "room_fts_update": f"""
+        AFTER UPDATE OF id, hotel_id, type, description, amenities ON room BEGIN
+            DELETE FROM {FULL_TEXT_TABLE} WHERE rowid = OLD.id;
+            {INSERT_FULL_TEXT_ROWS} WHERE room.id = NEW.id;
+        END
+    """,
+    "room_fts_delete": f"""
+        AFTER DELETE ON room BEGIN
+            DELETE FROM {FULL_TEXT_TABLE} WHERE rowid = OLD.id;
+        END
+    """,
+    # Nur nötig, wenn die Zimmer vor ihrem Hotel eingefügt werden
+    "hotel_fts_insert": f"""
+        AFTER INSERT ON hotel BEGIN
+            {_UPDATE_HOTEL}
+        END
+    """,
+    "hotel_fts_update": f"""
+        AFTER UPDATE OF name, address_id ON hotel BEGIN
+            {_UPDATE_HOTEL}
+        END
+    """,
+    "hotel_fts_delete": f"""
+        AFTER DELETE ON hotel BEGIN
+            UPDATE {FULL_TEXT_TABLE} SET hotel_name = NULL, city = NULL
+            WHERE rowid IN (SELECT id FROM room WHERE room.hotel_id = OLD.id);
+        END
+    """,
+    "address_fts_update": f"""
+        AFTER UPDATE OF city ON address BEGIN
+            UPDATE {FULL_TEXT_TABLE} SET city = NEW.city
+            WHERE rowid IN (
+                SELECT room.id FROM room JOIN hotel ON hotel.id = room.hotel_id WHERE hotel.address_id = NEW.id
+            );
+        END
+    """,
+}
+
+# Kalender und Trigger entstehen mit create_all, auch in Benchmarks und Tests ohne init_db
+event.listen(CalendarNight.__table__, "after_create", DDL(f"""
+    INSERT INTO calendar(night)
+    WITH RECURSIVE days(night) AS (
+        SELECT '{CALENDAR_START}' UNION ALL SELECT date(night, '+1 day') FROM days WHERE night < '{CALENDAR_END}'
+    )
+    SELECT night FROM days
+""").execute_if(dialect="sqlite"))
+for _name, _body in ROOM_NIGHT_TRIGGERS.items():
+    event.listen(
+        RoomNight.__table__, "after_create",
+        DDL(f"CREATE TRIGGER IF NOT EXISTS {_name} {_body}").execute_if(dialect="sqlite")
+    )
+event.listen(CatalogVersion.__table__, "after_create", DDL(
+    "INSERT OR IGNORE INTO catalog_version(id, version) VALUES (1, 0)"
+).execute_if(dialect="sqlite"))
+# Nach allen Tabellen, die Trigger gehören zu hotel, address und room
+for _name, _body in CATALOG_TRIGGERS.items():
+    event.listen(
+        Base.metadata, "after_create",
+        DDL(f"CREATE TRIGGER IF NOT EXISTS {_name} {_body}").execute_if(dialect="sqlite")
+    )
+# Volltextindex wie die Katalog-Trigger nach allen Tabellen, eine mit create_all neu angelegte search_fts ist leer
+for _statement in (CREATE_FULL_TEXT_TABLE, CONFIGURE_RANK):
+    event.listen(Base.metadata, "after_create", DDL(_statement).execute_if(dialect="sqlite"))
+for _name, _body in FULL_TEXT_TRIGGERS.items():
+    event.listen(
+        Base.metadata, "after_create",
+        DDL(f"CREATE TRIGGER IF NOT EXISTS {_name} {_body}").execute_if(dialect="sqlite")
+    )
+# Die virtuelle Tabelle gehört nicht zu Base.metadata und würde drop_all sonst mit veralteten Zeilen überleben
+event.listen(
+    Base.metadata, "before_drop", DDL(f"DROP TABLE IF EXISTS {FULL_TEXT_TABLE}").execute_if(dialect="sqlite")
+)
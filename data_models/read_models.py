@@ -0,0 +1,97 @@
+'''
+Read-Models: leichte Zeilen (NamedTuple) für Listen und Ausgaben. Sie kommen direkt aus Core-Selects, ohne ORM-Objekte,
+Identity Map und Lazy Loads: eine Liste braucht genau eine Abfrage, pro Zeile entsteht nur ein Tupel.
+
+    rows = read_rows(session, BookingRow, booking_rows_query(guest_id=7))
+'''
+from datetime import date
+from typing import NamedTuple, Optional
+
+from sqlalchemy import select
+
+from data_models.models import Address, Hotel, Room, Booking
+
+
+class HotelRow(NamedTuple):
+    '''
+    Hotel mit Adresse.
+    '''
+    id: int
+    name: str
+    stars: int
+    street: Optional[str]
+    zip: Optional[str]
+    city: Optional[str]
+
+
+class RoomRow(NamedTuple):
+    '''
+    Zimmer mit hotel_id statt Hotel-Objekt.
+    '''
+    id: int
+    hotel_id: int
+    number: str
+    type: Optional[str]
+    max_guests: int
+    description: Optional[str]
+    amenities: Optional[str]
+    price: float
+
+
+class BookingRow(NamedTuple):
+    '''
+    Buchung mit den Schlüsseln von Zimmer und Gast statt der Objekte.
+    '''
+    id: int
+    room_hotel_id: int
+    room_number: str
+    guest_id: int
+    number_of_guests: int
+    start_date: date
+    end_date: date
+    comment: Optional[str]
+
+
+def _page(query, key, after_id, limit):
+    # Keyset-Pagination über den Primärschlüssel wie hotel_list_query
+    if after_id is not None:
+        query = query.where(key > after_id)
+    query = query.order_by(key)
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
+def hotel_rows_query(hotel_ids=None, after_id=None, limit=None):
+    query = select(
+        Hotel.id, Hotel.name, Hotel.stars, Address.street, Address.zip, Address.city
+    ).outerjoin(Address, Hotel.address_id == Address.id)
+    if hotel_ids is not None:
+        query = query.where(Hotel.id.in_(hotel_ids))
+    return _page(query, Hotel.id, after_id, limit)
+
+
+def room_rows_query(hotel_id=None, after_id=None, limit=None):
+    query = select(
+        Room.id, Room.hotel_id, Room.number, Room.type, Room.max_guests, Room.description, Room.amenities, Room.price
+    )
+    if hotel_id is not None:
+        query = query.where(Room.hotel_id == hotel_id)
+    return _page(query, Room.id, after_id, limit)
+
+
+def booking_rows_query(hotel_id=None, guest_id=None, after_id=None, limit=None):
+    query = select(
+        Booking.id, Booking.room_hotel_id, Booking.room_number, Booking.guest_id, Booking.number_of_guests,
+        Booking.start_date, Booking.end_date, Booking.comment
+    )
+    if hotel_id is not None:
+        query = query.where(Booking.room_hotel_id == hotel_id)
+    if guest_id is not None:
+        query = query.where(Booking.guest_id == guest_id)
+    return _page(query, Booking.id, after_id, limit)
+
+
+def read_rows(connection, row_type, query):
+    # connection ist eine Connection oder Session, die Spalten von query stehen in der Reihenfolge von row_type
+    return list(map(row_type._make, connection.execute(query)))
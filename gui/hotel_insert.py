@@ -3,11 +3,13 @@ import sys
 from PyQt5 import QtCore, QtGui
 from PyQt5 import uic
 from PyQt5.QtWidgets import QLineEdit, QComboBox, QPushButton, QMainWindow, QApplication, QMessageBox
-from sqlalchemy import create_engine, exc
-from sqlalchemy.orm import Session
+from sqlalchemy import exc
 
+from data_access.engine_registry import engine_registry
 from data_models.models import *
 
+DB_FILE = "data/example.db"
+
 
 class NameAddressValidator(QtGui.QRegularExpressionValidator):
     validationChanged = QtCore.pyqtSignal(QtGui.QValidator.State)
@@ -86,20 +88,14 @@ class HotelUIForm(QMainWindow):
         result_ort, _, _ = ort_validator.validate(self.lineEdit_ort.text(), 0)
 
         if result_name and result_strasse and result_plz and result_ort == QtGui.QValidator.Acceptable == QtGui.QValidator.Acceptable:
-            engine = create_engine("sqlite:///data/example.db", echo=True)
-            try:
-                engine.connect()
-                print("Connection successful")
-            except SQLAlchemyError as err:
-                print("Connection not successful", err.__cause__)
-
             hotel_name = self.lineEdit_name.text()
             hotel_sterne = int(self.comboBox_sterne.currentText())
             adresse_strasse = self.lineEdit_strasse.text()
             adresse_plz = self.lineEdit_plz.text()
             adresse_ort = self.lineEdit_ort.text()
 
-            with Session(engine) as session:
+            # Engine und Pool werden beim ersten Speichern angelegt und danach wiederverwendet
+            with engine_registry.session_factory(DB_FILE)() as session:
                 try:
                     hotel = Hotel(name=hotel_name, stars=hotel_sterne,
                                   address=Address(street=adresse_strasse,
@@ -177,6 +173,7 @@ class HotelUIForm(QMainWindow):
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(engine_registry.dispose_all)
     window = HotelUIForm()
     window.show()
     sys.exit(app.exec())
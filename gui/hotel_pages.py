@@ -0,0 +1,95 @@
+from collections import OrderedDict
+
+from business.SearchManager import SearchManager
+
+
+class HotelPageCache:
+    '''
+    Seitenweise geladene Hotelliste für HotelTableModel, ohne Abhängigkeit von Qt.
+    fetch_next() lädt die nächste Seite per Keyset-Pagination, im Speicher bleiben nur die zuletzt benutzten
+    max_pages Seiten als Tupel. Von jeder Seite wird die id vor ihrer ersten Zeile gemerkt, damit eine verdrängte
+    Seite beim Zurückscrollen mit einer einzigen Abfrage neu geladen werden kann.
+    fetch_next() und row() fragen direkt mit session ab. Wer nicht blockieren darf (HotelTableModel), lädt die Seiten
+    mit SearchManager.get_hotel_list_page() selbst und übergibt sie mit append_page() und store_page().
+    '''
+
+    def __init__(self, session, name=None, page_size: int = 200, max_pages: int = 10):
+        self._search_manager = SearchManager(session)
+        self.name = name
+        self.page_size = page_size
+        self._max_pages = max_pages
+        self._pages = OrderedDict()
+        # _page_starts[i] ist die letzte id vor Seite i (None für die erste Seite)
+        self._page_starts = [None]
+        self.row_count = 0
+        self.exhausted = False
+
+    def _load(self, page):
+        return self._search_manager.get_hotel_list_page(self.name, self.page_start(page), self.page_size)
+
+    def _cache(self, page, rows):
+        self._pages[page] = rows
+        self._pages.move_to_end(page)
+        while len(self._pages) > self._max_pages:
+            self._pages.popitem(last=False)
+
+    def can_fetch_more(self):
+        return not self.exhausted
+
+    @property
+    def next_page_number(self):
+        return len(self._page_starts) - 1
+
+    def page_start(self, page):
+        # after_id für die Abfrage von Seite page
+        return self._page_starts[page]
+
+    def page_of(self, row):
+        return row // self.page_size
+
+    def next_page(self):
+        # Lädt die nächste Seite, übernimmt sie aber erst mit append_page() (für beginInsertRows/endInsertRows)
+        if self.exhausted:
+            return []
+        return self._load(self.next_page_number)
+
+    def append_page(self, rows):
+        if len(rows) < self.page_size:
+            self.exhausted = True
+        if not rows:
+            return
+        page = self.next_page_number
+        self._page_starts.append(rows[-1].id)
+        self._cache(page, rows)
+        self.row_count += len(rows)
+
+    def fetch_next(self):
+        rows = self.next_page()
+        self.append_page(rows)
+        return len(rows)
+
+    def row(self, row):
+        if self.page_of(row) not in self._pages:
+            page = self.page_of(row)
+            self.store_page(page, self._load(page))
+        return self.cached_row(row)
+
+    def cached_row(self, row):
+        # Wie row(), lädt eine verdrängte Seite aber nicht nach (None), dafür gibt es store_page()
+        page, offset = divmod(row, self.page_size)
+        rows = self._pages.get(page)
+        if rows is None:
+            return None
+        self._pages.move_to_end(page)
+        # Wurden inzwischen Hotels gelöscht, kann eine neu geladene Seite kürzer sein
+        return rows[offset] if offset < len(rows) else None
+
+    def has_page(self, page):
+        return page in self._pages
+
+    def store_page(self, page, rows):
+        # Übernimmt eine verdrängte Seite, die ausserhalb (z.B. in einem Worker-Thread) neu geladen wurde
+        self._cache(page, rows)
+
+    def cached_rows(self):
+        return sum(len(rows) for rows in self._pages.values())
@@ -1,14 +1,55 @@
 from PyQt5 import uic
 from PyQt5.QtWidgets import QMainWindow, QLineEdit, QPushButton, QTableView, QHeaderView
-from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
 
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, sessionmaker
 
 from data_models.models import *
+from business.SearchManager import SearchManager
+from gui.hotel_pages import HotelPageCache
+
+
+class HotelPageSignals(QObject):
+    # generation, Seite, Zeilen als Liste von HotelListRow
+    finished = pyqtSignal(int, int, list)
+    failed = pyqtSignal(int, str)
+
+
+class HotelPageWorker(QRunnable):
+    '''
+    Lädt eine Seite der Hotelliste im QThreadPool mit einer eigenen Session, für die erste Seite einer Namenssuche
+    ebenso wie für fetchMore() und verdrängte Seiten. Ist die Seite beim Start schon überholt (neuere generation),
+    wird gar nicht erst abgefragt.
+    '''
+
+    def __init__(self, session_factory, generation: int, page: int, name: str, after_id, page_size: int,
+                 is_current):
+        QRunnable.__init__(self)
+        self.signals = HotelPageSignals()
+        self.session_factory = session_factory
+        self.generation = generation
+        self.page = page
+        self.name = name
+        self.after_id = after_id
+        self.page_size = page_size
+        self.is_current = is_current
+
+    def run(self):
+        if not self.is_current(self.generation):
+            return
+        try:
+            with self.session_factory() as session:
+                rows = SearchManager(session).get_hotel_list_page(self.name, self.after_id, self.page_size)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+            return
+        self.signals.finished.emit(self.generation, self.page, rows)
 
 
 class HotelTableView(QMainWindow):
+    # Wartezeit nach dem letzten Tastendruck, bevor gesucht wird
+    search_delay_ms = 300
+
     def __init__(self, session, *args):
         QMainWindow.__init__(self, *args)
         uic.loadUi("./gui/hotel_search.ui", self)
@@ -16,7 +57,13 @@ class HotelTableView(QMainWindow):
         self.btn_search: QPushButton = self.btn_search
         self.hotelTableView: QTableView = self.hotelTableView
         self.session = session
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(self.search_delay_ms)
+        self.search_timer.timeout.connect(self.start_search)
         self.hotelTableModel = HotelTableModel(self, self.session)
+        self.hotelTableModel.search_finished.connect(self.search_finished)
+        self.hotelTableModel.load_failed.connect(self.search_failed)
         self.hotelTableModel.all()
         self.hotelTableView.setModel(self.hotelTableModel)
 
@@ -26,10 +73,25 @@ class HotelTableView(QMainWindow):
         self.hotelTableView.horizontalHeader().setSectionResizeMode(3, QHeaderView.Stretch)
 
         self.btn_search.clicked.connect(self.btn_search_clicked)
+        self.txt_name.textChanged.connect(self.txt_name_changed)
+
+    def txt_name_changed(self, text):
+        # Jeder Tastendruck startet den Timer neu, gesucht wird erst nach einer Pause
+        self.search_timer.start()
 
     def btn_search_clicked(self):
+        self.search_timer.stop()
+        self.start_search()
+
+    def start_search(self):
+        self.statusBar().showMessage("Suche läuft ...")
         self.hotelTableModel.search_name(self.txt_name.text())
-        self.hotelTableView.viewport().update()
+
+    def search_finished(self):
+        self.statusBar().clearMessage()
+
+    def search_failed(self, message):
+        self.statusBar().showMessage(f"Fehler bei der Suche: {message}")
 
 
 class HotelTableModel(QAbstractTableModel):
@@ -37,8 +99,11 @@ class HotelTableModel(QAbstractTableModel):
     name = "Name"
     number_of_rooms = "# of rooms"
     address = "Address"
+    # Die erste Seite einer Suche ist angezeigt bzw. das Laden einer Seite ist fehlgeschlagen
+    search_finished = pyqtSignal()
+    load_failed = pyqtSignal(str)
 
-    def __init__(self, parent, session: Session, *args) -> None:
+    def __init__(self, parent, session: Session, *args, page_size: int = 200, max_pages: int = 10) -> None:
         QAbstractTableModel.__init__(self, parent, *args)
         self.header = [
             HotelTableModel.id,
@@ -46,34 +111,121 @@ class HotelTableModel(QAbstractTableModel):
             HotelTableModel.number_of_rooms,
             HotelTableModel.address
         ]
+        # Spalte -> Feld in HotelListRow
+        self.fields = {
+            HotelTableModel.id: "id",
+            HotelTableModel.name: "name",
+            HotelTableModel.number_of_rooms: "number_of_rooms",
+            HotelTableModel.address: "address"
+        }
         self.session = session
-        self.hotels: List[Hotel] = []
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.pages = HotelPageCache(self.session, page_size=page_size, max_pages=max_pages)
+        # Alle Seiten werden im Hintergrund mit eigenen Sessions geladen, sie teilen sich die Engine (und den Pool)
+        # der GUI-Session. Eine neue Suche erhöht generation, Seiten älterer Suchen werden verworfen.
+        self.session_factory = sessionmaker(bind=session.get_bind())
+        self.thread_pool = QThreadPool(self)
+        self.generation = 0
+        self._pages_generation = 0
+        self._search_name = None
+        # Seiten, die gerade im Hintergrund geladen werden
+        self._loading = set()
+
+    def is_current(self, generation):
+        return generation == self.generation
+
+    def _load_page(self, page, name, after_id):
+        if page in self._loading:
+            return
+        self._loading.add(page)
+        worker = HotelPageWorker(self.session_factory, self.generation, page, name, after_id, self.page_size,
+                                 self.is_current)
+        worker.signals.finished.connect(self.page_loaded)
+        worker.signals.failed.connect(self.page_failed)
+        self.thread_pool.start(worker)
+
+    def _reset(self, name=None):
+        # Bis die erste Seite da ist, bleibt die bisherige Liste sichtbar, fetchMore() lädt für sie nichts mehr nach
+        self.generation += 1
+        self._search_name = name
+        self._loading = set()
+        self._load_page(0, name, None)
 
     def all(self):
-        self.hotels = self.session.query(Hotel).all()
+        self._reset()
 
     def search_name(self, like: str):
-        like = like.lower()
-        self.hotels = self.session.query(Hotel).filter(func.lower(Hotel.name).like(f'%{like}%')).all()
+        self._reset(like)
+
+    def page_loaded(self, generation, page, rows):
+        if not self.is_current(generation):
+            return
+        self._loading.discard(page)
+        if self._pages_generation != generation:
+            # Erste Seite einer neuen Suche
+            self.beginResetModel()
+            self.pages = HotelPageCache(self.session, self._search_name, self.page_size, self.max_pages)
+            self._pages_generation = generation
+            self.pages.append_page(rows)
+            self.endResetModel()
+            self.search_finished.emit()
+        elif page == self.pages.next_page_number:
+            self._append_page(rows)
+        else:
+            # Neu geladene, vorher verdrängte Seite
+            self.pages.store_page(page, rows)
+            first = page * self.page_size
+            last = min(first + self.page_size, self.pages.row_count) - 1
+            self.dataChanged.emit(self.index(first, 0), self.index(last, len(self.header) - 1))
+
+    def _append_page(self, rows):
+        if rows:
+            first = self.pages.row_count
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self.pages.append_page(rows)
+            self.endInsertRows()
+        else:
+            self.pages.append_page(rows)
+
+    def page_failed(self, generation, message):
+        if self.is_current(generation):
+            self._loading = set()
+            self.load_failed.emit(message)
+
+    def rowCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return self.pages.row_count
+
+    def columnCount(self, parent: QModelIndex = QModelIndex()) -> int:
+        if parent.isValid():
+            return 0
+        return len(self.header)
 
-    def rowCount(self, parent: QModelIndex = ...) -> int:
-        return len(self.hotels)
+    def canFetchMore(self, parent: QModelIndex) -> bool:
+        return not parent.isValid() and self.pages.can_fetch_more()
 
-    def columnCount(self, parent: QModelIndex = ...) -> int:
-        return len(self.header)
+    def fetchMore(self, parent: QModelIndex) -> None:
+        # Startet nur den Worker, die Zeilen werden in page_loaded() eingefügt. Läuft noch eine neue Suche, wird für
+        # die alte Liste nichts mehr nachgeladen.
+        if parent.isValid() or self._pages_generation != self.generation:
+            return
+        page = self.pages.next_page_number
+        self._load_page(page, self.pages.name, self.pages.page_start(page))
 
     def data(self, index: QModelIndex, role: int = ...):
         if not index.isValid():
             return None
         if role == Qt.DisplayRole:
-            if self.header[index.column()] == HotelTableModel.id:
-                return self.hotels[index.row()].id
-            elif self.header[index.column()] == HotelTableModel.name:
-                return self.hotels[index.row()].name
-            elif self.header[index.column()] == HotelTableModel.number_of_rooms:
-                return len(self.hotels[index.row()].rooms)
-            elif self.header[index.column()] == HotelTableModel.address:
-                return f"{self.hotels[index.row()].address.street}, {self.hotels[index.row()].address.zip} {self.hotels[index.row()].address.city}"
+            row = self.pages.cached_row(index.row())
+            if row is None:
+                # Verdrängte Seite: im Hintergrund neu laden, page_loaded() meldet die Zeilen mit dataChanged
+                page = self.pages.page_of(index.row())
+                if not self.pages.has_page(page) and self._pages_generation == self.generation:
+                    self._load_page(page, self.pages.name, self.pages.page_start(page))
+                return None
+            return getattr(row, self.fields[self.header[index.column()]])
 
     def headerData(self, section: int, orientation: Qt.Orientation, role: int = ...):
         if orientation == Qt.Horizontal and role == Qt.DisplayRole:
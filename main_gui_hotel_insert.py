@@ -2,10 +2,12 @@ import sys
 
 from PyQt5.QtWidgets import QApplication
 
+from data_access.engine_registry import engine_registry
 from gui.hotel_insert import HotelUIForm
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    app.aboutToQuit.connect(engine_registry.dispose_all)
     window = HotelUIForm()
     window.show()
     sys.exit(app.exec())
@@ -11,6 +11,7 @@ from sqlalchemy import create_engine, func
 from sqlalchemy.schema import CreateTable
 from data_access.data_base import *
 from data_access.data_generator import *
+from data_access.engine_registry import engine_registry
 from gui.hotel_search import *
 
 
@@ -20,10 +21,9 @@ DB_PATH = './data/hotel_reservation.db'
 
 def main():
     init_db(DB_PATH, True, True, True)
-    engine = create_engine(f"sqlite:///{DB_PATH}")
-
-    with Session(engine) as session:
+    with engine_registry.session_factory(DB_PATH)() as session:
         app = QApplication(sys.argv)
+        app.aboutToQuit.connect(engine_registry.dispose_all)
         main_window = HotelTableView(session)
         main_window.show()
         sys.exit(app.exec_())
@@ -1,8 +1,8 @@
-from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.scoping import scoped_session
 
 from console.console_base import *
 from data_access.data_base import *
+from data_access.engine_registry import engine_registry
 from data_models.models import *
 
 
@@ -94,7 +94,6 @@ if __name__ == '__main__':
     else:
         if not os.path.exists(DB_FILE):
             init_db(DB_FILE, generate_example_data=TEST_DATA)
-    engine = create_engine(f'sqlite:///{DB_FILE}', echo=False)
-    session_factory = sessionmaker(bind=engine)
+    session_factory = engine_registry.session_factory(DB_FILE)
     app = Application(MainMenu())
     app.run()
@@ -0,0 +1,67 @@
+from datetime import date
+
+import pytest
+from sqlalchemy.orm import Session
+
+from business.CatalogSnapshot import Catalog
+from business.SearchManager import SearchManager
+from data_access.data_base import create_db_engine
+from data_models.models import Address, Base, Booking, Guest, Hotel, Room
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_db_engine(tmp_path / "catalog.db")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        bern = Address(street="Bahnhofstrasse 1", zip="3000", city="Bern")
+        hotels = [
+            Hotel(name="Mit Zimmern", stars=3, address=bern),
+            Hotel(name="Zürich", stars=4, address=Address(street="Seestrasse 5", zip="8000", city="Zürich")),
+            # Hotels ohne Zimmer am Ende der ids
+            Hotel(name="Leer 1", stars=3, address=bern),
+            Hotel(name="Leer 2", stars=4, address=bern),
+        ]
+        session.add_all(hotels)
+        session.flush()
+        for number, price, max_guests in (("101", 100.0, 2), ("102", 90.0, 3), ("103", 50.0, 1)):
+            session.add(Room(hotel_id=hotels[0].id, number=number, max_guests=max_guests, price=price))
+        for number, price in (("1", 200.0), ("2", 70.0)):
+            session.add(Room(hotel_id=hotels[1].id, number=number, max_guests=2, price=price, amenities="TV"))
+        guest = Guest(firstname="Anna", lastname="Muster", email="anna@example.ch", address=bern)
+        session.add(Booking(room_hotel_id=hotels[0].id, room_number="103", guest=guest, number_of_guests=1,
+                            start_date=date(2025, 3, 1), end_date=date(2025, 3, 4)))
+        session.commit()
+        yield session
+    engine.dispose()
+
+
+@pytest.mark.parametrize("criteria", [
+    {},
+    dict(city="Bern"),
+    dict(city="bern", max_guest=2),
+    dict(stars=4),
+    dict(min_price=60, max_price=150),
+    dict(amenities="TV"),
+    dict(amenities="Unbekannt"),
+    dict(start_date=date(2025, 3, 2), end_date=date(2025, 3, 3)),
+    dict(city="Bern", start_date=date(2025, 2, 1), end_date=date(2025, 3, 1)),
+])
+def test_catalog_matches_sql(session, criteria):
+    expected = SearchManager(session).search_available_hotels(**criteria)
+    assert SearchManager(session, catalog=Catalog()).search_available_hotels(**criteria) == expected
+
+
+def test_min_price_with_empty_hotels_at_end(session):
+    hotels = SearchManager(session, catalog=Catalog()).search_available_hotels(city="Bern")
+    assert [(hotel.name, hotel.available_rooms, hotel.min_price) for hotel in hotels] == [("Mit Zimmern", 3, 50.0)]
+
+
+def test_catalog_reloads_after_change(session):
+    catalog = Catalog()
+    manager = SearchManager(session, catalog=catalog)
+    manager.search_available_hotels()
+    session.get(Room, 1).price = 5.0
+    session.commit()
+    assert manager.search_available_hotels(max_price=5)[0].min_price == 5.0
+    assert catalog.loads == 2
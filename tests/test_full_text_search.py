@@ -0,0 +1,22 @@
+from sqlalchemy.orm import Session
+
+from business.SearchManager import SearchManager
+from data_access.data_base import create_db_engine
+from data_models.models import Address, Base, Hotel, Room
+
+
+def test_full_text_index_with_create_all(tmp_path):
+    engine = create_db_engine(tmp_path / "fts.db")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        hotel = Hotel(name="Seeblick", stars=3, address=Address(street="Quai 1", zip="8000", city="Zürich"))
+        session.add(Room(hotel=hotel, number="1", type="Queen", max_guests=2, price=120.0))
+        session.commit()
+        assert [match.hotel_name for match in SearchManager(session).full_text_search("queen zurich")] == ["Seeblick"]
+
+    # drop_all entfernt auch search_fts, nach create_all ist der Index wieder leer
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        assert SearchManager(session).full_text_search("queen") == []
+    engine.dispose()
@@ -0,0 +1,44 @@
+import pytest
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from business.InventoryManager import InventoryManager
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_models.models import Base
+
+# Abfragen pro Seite, unabhängig von der Seitengrösse
+QUERIES_PER_PAGE = {"joined": 1, "selectin": 5}
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    engine = create_db_engine(tmp_path_factory.mktemp("bookings") / "bookings.db")
+    Base.metadata.create_all(engine)
+    generate_bulk_data(engine, hotels=20, guests=200, bookings=600)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def queries(engine):
+    statements = []
+    count = lambda *_: statements.append(1)
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
+
+
+@pytest.mark.parametrize("loader", QUERIES_PER_PAGE)
+@pytest.mark.parametrize("limit", [10, 100])
+def test_queries_per_page(engine, queries, loader, limit):
+    manager = InventoryManager(sessionmaker(bind=engine))
+    manager.user_manager.is_admin = lambda: True
+    after_id = None
+    for _ in range(3):
+        del queries[:]
+        rows = manager.list_bookings(after_id=after_id, limit=limit, loader=loader)
+        assert len(rows) == limit
+        assert len(queries) == QUERIES_PER_PAGE[loader]
+        assert all(row.guest_name and row.hotel_name for row in rows)
+        after_id = rows[-1].id
@@ -0,0 +1,60 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import event, select
+
+from business.ReservationManager import ReservationManager
+from data_access.data_generator import generate_bulk_data
+from data_access.engine_registry import engine_registry
+from data_models.models import Base, Booking, Guest, Room
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    db_file = tmp_path / "reservations.db"
+    engine = engine_registry.engine(db_file)
+    Base.metadata.create_all(engine)
+    generate_bulk_data(engine, hotels=3, rooms_per_hotel=5, guests=10, bookings=20, start_date=date(2030, 1, 1))
+    yield db_file
+    engine_registry.dispose(db_file)
+
+
+def test_create_booking_with_scoped_session(db_file):
+    # Die Einstiegspunkte übergeben die scoped_session aus engine_registry, nicht eine Session
+    session = engine_registry.scoped_session(db_file)
+    manager = ReservationManager(session)
+    room = session.execute(select(Room).order_by(Room.id).limit(1)).scalar_one()
+    guest_id = session.execute(select(Guest.id).limit(1)).scalar_one()
+    # Eine offene Lesetransaktion der Session wird vor BEGIN IMMEDIATE committet
+    assert manager.is_room_available(room.number, room.hotel_id, date(2090, 5, 1), date(2090, 5, 3))
+
+    result = manager.create_booking(room.hotel_id, room.number, guest_id, 1, date(2090, 5, 1), date(2090, 5, 3))
+    assert result.startswith("Booking successfully created")
+    again = manager.create_booking(room.hotel_id, room.number, guest_id, 1, date(2090, 5, 3), date(2090, 5, 4))
+    assert again == "Room is not available for the selected dates."
+    assert session.execute(select(Booking).where(Booking.start_date == date(2090, 5, 1))).scalar_one()
+
+
+def test_create_bookings_inserts_with_one_statement(db_file):
+    session = engine_registry.scoped_session(db_file)
+    manager = ReservationManager(session)
+    guest_id = session.execute(select(Guest.id).limit(1)).scalar_one()
+    rooms = session.execute(select(Room.hotel_id, Room.number).order_by(Room.id)).all()
+    requests = [(hotel_id, number, guest_id, 1, date(2091, 1, 1), date(2091, 1, 3)) for hotel_id, number in rooms]
+    # Die zweite Anfrage für das erste Zimmer überschneidet sich mit der ersten und wird abgewiesen
+    requests.append(requests[0])
+
+    statements = []
+    count = lambda connection, cursor, statement, *args: statements.append(statement)
+    event.listen(session.get_bind(), "before_cursor_execute", count)
+    results = manager.create_bookings(requests)
+    event.remove(session.get_bind(), "before_cursor_execute", count)
+
+    assert [result.error is None for result in results] == [True] * len(rooms) + [False]
+    inserts = [statement for statement in statements if statement.startswith("INSERT INTO booking")]
+    assert len(inserts) == 1
+    booking_ids = [result.booking_id for result in results[:-1]]
+    stored = session.execute(
+        select(Booking.id, Booking.room_number).where(Booking.id.in_(booking_ids)).order_by(Booking.id)
+    ).all()
+    assert stored == [(booking_id, number) for booking_id, (_, number) in zip(booking_ids, rooms)]
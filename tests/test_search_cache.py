@@ -0,0 +1,95 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from business.ReservationManager import ReservationManager
+from business.SearchCache import CacheTags, MemoryCacheBackend, SearchCache, SqliteCacheBackend
+from business.SearchManager import SearchManager
+from data_access.data_base import create_db_engine
+from data_access.data_generator import generate_bulk_data
+from data_models.models import Base, Guest, Room
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    engine = create_db_engine(tmp_path_factory.mktemp("search_cache") / "search_cache.db")
+    Base.metadata.create_all(engine)
+    generate_bulk_data(engine, hotels=100, rooms_per_hotel=2, guests=10, bookings=20, start_date=date(2030, 1, 1))
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def queries(engine):
+    statements = []
+    count = lambda *_: statements.append(1)
+    event.listen(engine, "before_cursor_execute", count)
+    yield statements
+    event.remove(engine, "before_cursor_execute", count)
+
+
+def test_orm_hit_after_commit_without_queries(engine, queries, capsys):
+    with Session(engine) as session:
+        manager = SearchManager(session, SearchCache())
+        city = manager.get_all_hotels()[0].address.city
+        manager.search_hotels_by_city_date_guests_stars(city, date(2031, 1, 1), date(2031, 1, 3))
+        # Der Commit markiert alle Objekte der Session als abgelaufen, die Objekte im Cache nicht
+        session.commit()
+
+        del queries[:]
+        hotels = manager.get_all_hotels()
+        assert len({hotel.name for hotel in hotels}) == 100
+        found = manager.search_hotels_by_city_date_guests_stars(city, date(2031, 1, 1), date(2031, 1, 3))
+        assert found and all(hotel.address.city == city for hotel in found)
+        assert queries == []
+        assert manager._cache.stats()["hits"] == 2
+
+
+def test_orm_hit_with_pending_changes(engine):
+    cache = SearchCache()
+    with Session(engine) as session, Session(engine) as other:
+        manager = SearchManager(session, cache)
+        hotel = manager.get_all_hotels()[0]
+        name = hotel.name
+        hotel.name = "Geändert"
+        # Ungespeicherte Änderungen bleiben in der eigenen Session und gelangen nicht in den Cache
+        assert manager.get_all_hotels()[0] is hotel
+        assert hotel.name == "Geändert"
+        assert SearchManager(other, cache).get_all_hotels()[0].name == name
+        session.rollback()
+
+
+def test_booking_after_search_with_start_date_only(engine):
+    cache = SearchCache()
+    with Session(engine) as session:
+        manager = SearchManager(session, cache)
+        room = session.execute(select(Room).order_by(Room.id).limit(1)).scalar_one()
+        guest_id = session.execute(select(Guest.id).limit(1)).scalar_one()
+        # Ohne end_date filtert die Suche keine Buchungen, der Eintrag bekommt keinen Zeitraum
+        rooms = manager.search_rooms_by_availability(date(2032, 1, 1), None, room.hotel)
+        assert room in rooms
+
+        reservations = ReservationManager(session, search_cache=cache)
+        result = reservations.create_booking(room.hotel_id, room.number, guest_id, 1, date(2032, 1, 1),
+                                             date(2032, 1, 3))
+        assert result.startswith("Booking successfully created")
+        assert room in manager.search_rooms_by_availability(date(2032, 1, 1), None, room.hotel)
+        assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("backend", ["memory", "sqlite"])
+def test_entry_with_one_date_is_evicted_by_every_booking(tmp_path, backend):
+    # Einträge mit nur einem Datum können aus einer älteren Cache-Datei stammen
+    backend = MemoryCacheBackend() if backend == "memory" else SqliteCacheBackend(tmp_path / "cache.db")
+    backend.set("start", [], CacheTags(city="bern", start_date=date(2032, 1, 1)), ttl=60)
+    backend.set("end", [], CacheTags(city="bern", end_date=date(2032, 1, 1)), ttl=60)
+    backend.set("range", [], CacheTags(city="bern", start_date=date(2032, 1, 1), end_date=date(2032, 1, 5)), ttl=60)
+    backend.set("other", [], CacheTags(city="olten", start_date=date(2032, 1, 1)), ttl=60)
+    backend.set("none", [], CacheTags(city="bern"), ttl=60)
+
+    assert backend.invalidate_booking(1, "bern", date(2040, 1, 1), date(2040, 1, 3)) == 2
+    assert [key for key in ["start", "end", "range", "other", "none"] if backend.get(key) is not None] == [
+        "range", "other", "none"
+    ]
@@ -2,10 +2,8 @@ import sys
 
 from pathlib import Path
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, scoped_session
-
 from data_access.data_base import init_db
+from data_access.engine_registry import engine_registry
 from business.UserManager import UserManager
 from business.SearchManager import SearchManager
 
@@ -209,7 +207,7 @@ if __name__ == '__main__':
     database_path = Path(db_file)
     if not database_path.is_file():
         init_db(db_file, generate_example_data=True)
-    session = scoped_session(sessionmaker(bind=create_engine(f"sqlite:///{database_path}", echo=False)))
+    session = engine_registry.scoped_session(database_path)
     user_manager = UserManager(session)
     search_manager = SearchManager(session)
 